@@ -0,0 +1,153 @@
+from statistics import NormalDist
+import math
+import threading
+
+
+def is_correct(actual_answer, expected_answer, relative_tolerance=0.01):
+    """
+    Whether an answer is within `relative_tolerance` of the expected answer (exact if the
+    expected answer is 0), as scored in analysis.ipynb. Unparseable answers are wrong.
+    """
+    try:
+        actual_answer = float(actual_answer)
+    except (TypeError, ValueError):
+        return False
+    if expected_answer == 0:
+        return actual_answer == 0
+    return abs(actual_answer - expected_answer) <= relative_tolerance * abs(
+        expected_answer
+    )
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+    Wilson score interval for a success rate, which stays sensible for small samples and
+    rates of 0 or 1.
+
+    Returns:
+        tuple: (low, high), or (0.0, 1.0) without trials
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (rate + z**2 / (2 * trials)) / denominator
+    half_width = (
+        z * math.sqrt(rate * (1 - rate) / trials + z**2 / (4 * trials**2)) / denominator
+    )
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+class SequentialSampler:
+    """
+    Decides how many times each combination of a sweep is asked, from the answers so far.
+
+    Every combination is asked `min_iterations` times. After that, a combination is
+    settled once the Wilson interval on its accuracy is at most `max_interval_width`
+    wide, and gets no more requests. Unsettled combinations are asked again, one request
+    at a time and up to `max_iterations`, paid for out of the iterations that settled
+    combinations didn't use. The total never exceeds what the fixed number of iterations
+    would have cost.
+
+    With the defaults, three correct (or three wrong) answers out of three settle a
+    combination, while a split keeps it sampling.
+
+    Args:
+        min_iterations (int): Requests every combination gets.
+        max_iterations (int): Most requests a combination can get.
+        confidence (float): Confidence level of the interval.
+        max_interval_width (float): Interval width at which a combination is settled.
+        relative_tolerance (float): How close to the expected answer counts as correct.
+    """
+
+    def __init__(
+        self,
+        min_iterations=3,
+        max_iterations=10,
+        confidence=0.9,
+        max_interval_width=0.5,
+        relative_tolerance=0.01,
+    ):
+        self.min_iterations = min_iterations
+        self.max_iterations = max_iterations
+        self.confidence = confidence
+        self.max_interval_width = max_interval_width
+        self.relative_tolerance = relative_tolerance
+        self.num_iterations = 0
+        self.budget = 0
+        self.fixed_iterations = 0
+        self.iterations = 0
+        self.settled = 0
+        self.unsettled = 0
+        self._lock = threading.Lock()
+
+    def start(self, num_combinations, num_iterations):
+        """
+        Sets the budget to what `num_iterations` per combination would cost.
+        """
+        with self._lock:
+            self.num_iterations = num_iterations
+            self.fixed_iterations = 0
+            self.budget = 0
+            self.iterations = 0
+            self.settled = 0
+            self.unsettled = 0
+        self.add_combinations(num_combinations)
+
+    def add_combinations(self, num_combinations):
+        """
+        Adds the budget of combinations beyond those counted at `start`, for sweeps over
+        an iterable of unknown length.
+        """
+        with self._lock:
+            min_iterations = min(self.min_iterations, self.num_iterations)
+            self.fixed_iterations += num_combinations * self.num_iterations
+            self.budget += num_combinations * (self.num_iterations - min_iterations)
+            self.iterations += num_combinations * min_iterations
+
+    def interval(self, responses, expected_answer):
+        """
+        Args:
+            responses: (parsed_output, usage, message_index) tuples for one combination
+
+        Returns:
+            tuple: (low, high) bounds on the combination's accuracy
+        """
+        successes = sum(
+            is_correct(
+                getattr(parsed, "final_answer", None),
+                expected_answer,
+                self.relative_tolerance,
+            )
+            for parsed, _, _ in responses
+        )
+        return wilson_interval(successes, len(responses), self.confidence)
+
+    def request_more(self, responses, expected_answer):
+        """
+        Called once all of a combination's requests so far have answered.
+
+        Returns:
+            int: How many more requests to send for it (0 when it is finished)
+        """
+        low, high = self.interval(responses, expected_answer)
+        with self._lock:
+            if high - low <= self.max_interval_width:
+                self.settled += 1
+                return 0
+            if len(responses) >= self.max_iterations or self.budget <= 0:
+                self.unsettled += 1
+                return 0
+            self.budget -= 1
+            self.iterations += 1
+            return 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "iterations": self.iterations,
+                "fixed_iterations": self.fixed_iterations,
+                "settled": self.settled,
+                "unsettled": self.unsettled,
+            }
@@ -1,5 +1,6 @@
 from enum import Enum
 
+
 class AIModels(Enum):
     DEEPSEEK_CHAT = "deepseek-chat"
     GPT_3_5_TURBO = "gpt-3.5-turbo"
@@ -17,3 +18,32 @@ class AIModels(Enum):
     GPT_5_MINI = "gpt-5-mini"
     GPT_5_NANO = "gpt-5-turbo"
 
+
+# Per-model request and token budgets used by the shared rate limiter. These are
+# usage tier 1 limits; raise them to match your account.
+DEFAULT_RATE_LIMITS = {"requests_per_minute": 500, "tokens_per_minute": 30000}
+
+MODEL_RATE_LIMITS = {
+    AIModels.DEEPSEEK_CHAT.value: {
+        "requests_per_minute": 1000,
+        "tokens_per_minute": 1000000,
+    },
+    AIModels.GPT_3_5_TURBO.value: {
+        "requests_per_minute": 3500,
+        "tokens_per_minute": 200000,
+    },
+    AIModels.GPT_4.value: {"requests_per_minute": 500, "tokens_per_minute": 10000},
+    AIModels.GPT_4O.value: {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    AIModels.GPT_4O_MINI.value: {
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200000,
+    },
+    AIModels.GPT_4_1.value: {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    AIModels.O4_MINI.value: {"requests_per_minute": 1000, "tokens_per_minute": 100000},
+    AIModels.O3_MINI.value: {"requests_per_minute": 1000, "tokens_per_minute": 100000},
+    AIModels.GPT_5.value: {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    AIModels.GPT_5_MINI.value: {
+        "requests_per_minute": 500,
+        "tokens_per_minute": 200000,
+    },
+}
@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+
+from answers import (
+    calculate_monthly_payment,
+    calculate_monthly_payment_batch,
+    calculate_remaining_balance,
+)
+
+
+class AmortizationSchedule:
+    """
+    Full month-by-month amortization schedule for a fully amortized loan.
+
+    Every column is computed once, in a single vectorized pass, when the schedule is
+    built. Looking up a month or a year afterwards is an O(1) array index, so the same
+    schedule can answer any number of balance or interest questions about one loan.
+
+    Attributes:
+        principal: The loan amount
+        annual_interest_rate: Annual interest rate as a whole number (e.g., 9.00 for 9%)
+        loan_term_years: Loan term in years
+        payment: Monthly payment for the loan
+        balance: Balance after each month, indexed by month (balance[0] is the principal)
+        interest: Interest portion of each payment, indexed by month (interest[0] is 0)
+        principal_paid: Principal portion of each payment, indexed by month
+        cumulative_interest: Total interest paid up to and including each month
+        cumulative_principal: Total principal paid up to and including each month
+    """
+
+    def __init__(self, principal, annual_interest_rate, loan_term_years):
+        self.principal = principal
+        self.annual_interest_rate = annual_interest_rate
+        self.loan_term_years = loan_term_years
+        self.num_payments = int(round(loan_term_years * 12))
+        self.payment = calculate_monthly_payment(
+            principal, annual_interest_rate, loan_term_years
+        )
+
+        monthly_interest_rate = annual_interest_rate / 12 / 100
+        months = np.arange(self.num_payments + 1, dtype=float)
+        if monthly_interest_rate == 0:
+            # Without interest every payment goes to principal.
+            self.balance = principal - self.payment * months
+        else:
+            growth = (1 + monthly_interest_rate) ** months
+            self.balance = principal * growth - (
+                self.payment * (growth - 1) / monthly_interest_rate
+            )
+        self.balance[0] = principal
+
+        self.interest = np.zeros(self.num_payments + 1)
+        self.interest[1:] = self.balance[:-1] * monthly_interest_rate
+        self.principal_paid = np.zeros(self.num_payments + 1)
+        self.principal_paid[1:] = self.payment - self.interest[1:]
+
+        self.cumulative_interest = np.cumsum(self.interest)
+        self.cumulative_principal = np.cumsum(self.principal_paid)
+
+    def _check_month(self, month_number):
+        if not 0 <= month_number <= self.num_payments:
+            raise IndexError(
+                f"Month {month_number} is outside of a {self.num_payments}-month schedule"
+            )
+
+    def remaining_balance(self, years_elapsed):
+        """
+        Remaining balance after `years_elapsed` years, matching `calculate_remaining_balance`.
+
+        Read from the schedule when `years_elapsed` is a whole number of months; otherwise
+        the balance falls between two payments and comes from the closed form.
+        """
+        months_elapsed = years_elapsed * 12
+        month_number = int(round(months_elapsed))
+        self._check_month(month_number)
+        if abs(months_elapsed - month_number) > 1e-9:
+            return calculate_remaining_balance(
+                self.principal,
+                self.annual_interest_rate,
+                self.loan_term_years,
+                years_elapsed,
+            )
+        return float(self.balance[month_number])
+
+    def interest_principal_payment(self, month_number):
+        """
+        Interest and principal portions of a payment, matching `calculate_interest_principal_payment`.
+
+        Returns:
+            Tuple of (interest_payment, principal_payment)
+        """
+        self._check_month(month_number)
+        if month_number < 1:
+            raise IndexError("Payments start at month 1")
+        return float(self.interest[month_number]), float(
+            self.principal_paid[month_number]
+        )
+
+    def month(self, month_number):
+        """
+        All schedule columns for a single month.
+
+        Returns:
+            dict with the payment, interest, principal, balance and cumulative totals
+        """
+        self._check_month(month_number)
+        return {
+            "month": month_number,
+            "payment": self.payment if month_number > 0 else 0.0,
+            "interest": float(self.interest[month_number]),
+            "principal": float(self.principal_paid[month_number]),
+            "balance": float(self.balance[month_number]),
+            "cumulative_interest": float(self.cumulative_interest[month_number]),
+            "cumulative_principal": float(self.cumulative_principal[month_number]),
+        }
+
+    def year(self, year_number):
+        """
+        Totals for a single year of the loan (months 12 * (year - 1) + 1 through 12 * year).
+
+        Returns:
+            dict with the interest and principal paid during the year and the balance at its end
+        """
+        end = year_number * 12
+        start = end - 12
+        self._check_month(end)
+        if year_number < 1:
+            raise IndexError("Years start at year 1")
+        return {
+            "year": year_number,
+            "interest": float(
+                self.cumulative_interest[end] - self.cumulative_interest[start]
+            ),
+            "principal": float(
+                self.cumulative_principal[end] - self.cumulative_principal[start]
+            ),
+            "balance": float(self.balance[end]),
+            "cumulative_interest": float(self.cumulative_interest[end]),
+            "cumulative_principal": float(self.cumulative_principal[end]),
+        }
+
+    def to_frame(self):
+        """
+        The schedule as a DataFrame with one row per payment.
+        """
+        return pd.DataFrame(
+            {
+                "month": np.arange(1, self.num_payments + 1),
+                "payment": np.full(self.num_payments, self.payment),
+                "interest": self.interest[1:],
+                "principal": self.principal_paid[1:],
+                "balance": self.balance[1:],
+                "cumulative_interest": self.cumulative_interest[1:],
+                "cumulative_principal": self.cumulative_principal[1:],
+            }
+        )
+
+
+def _balance_after(balance, monthly_interest_rate, monthly_payment, months):
+    """
+    Closed-form balance of a loan after `months` payments of `monthly_payment`.
+    """
+    growth = (1 + monthly_interest_rate) ** months
+    safe_rate = np.where(monthly_interest_rate == 0, 1.0, monthly_interest_rate)
+    payments_value = np.where(
+        monthly_interest_rate == 0, months, (growth - 1) / safe_rate
+    )
+    return balance * growth - monthly_payment * payments_value
+
+
+def _months_to_payoff(balance, monthly_interest_rate, monthly_payment):
+    """
+    Closed-form number of whole payments of `monthly_payment` needed to pay off `balance`.
+    """
+    safe_rate = np.where(monthly_interest_rate == 0, 1.0, monthly_interest_rate)
+    months = np.where(
+        monthly_interest_rate == 0,
+        balance / monthly_payment,
+        -np.log1p(-safe_rate * balance / monthly_payment) / np.log1p(safe_rate),
+    )
+    # Guard against 360.0000001 style round-off pushing the count up a month.
+    return np.where(balance > 0, np.ceil(months - 1e-6), 0)
+
+
+def calculate_prepayment_batch(
+    principal,
+    annual_interest_rate,
+    loan_term_years,
+    extra_monthly=0,
+    lump_sum=0,
+    lump_sum_month=0,
+):
+    """
+    Effect of recurring and lump-sum extra payments on a fully amortized loan.
+
+    The regular payment stays fixed at the payment for the original term. `extra_monthly`
+    is added to every payment and `lump_sum` is paid once, right after payment number
+    `lump_sum_month` (0 means up front). The payoff month is found in closed form rather
+    than by stepping month by month, and all arguments are broadcast against each other so
+    many extra-payment scenarios for one loan can be evaluated at once.
+
+    Args:
+        principal: The loan amount(s)
+        annual_interest_rate: Annual interest rate(s) as a whole number (e.g., 9.00 for 9%)
+        loan_term_years: Loan term(s) in years
+        extra_monthly: Extra amount(s) paid with every monthly payment
+        lump_sum: One-time extra payment(s)
+        lump_sum_month: The payment number after which the lump sum is paid
+
+    Returns:
+        dict of np.ndarrays:
+            - "payoff_month": Number of the month with the final payment
+            - "months_saved": Months cut from the original term
+            - "total_interest": Total interest paid with the extra payments
+            - "interest_saved": Interest saved compared to the original schedule
+    """
+    principal = np.asarray(principal, dtype=float)
+    annual_interest_rate = np.asarray(annual_interest_rate, dtype=float)
+    loan_term_years = np.asarray(loan_term_years, dtype=float)
+    extra_monthly = np.asarray(extra_monthly, dtype=float)
+    lump_sum = np.asarray(lump_sum, dtype=float)
+    lump_sum_month = np.asarray(lump_sum_month, dtype=float)
+
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    num_payments = loan_term_years * 12
+    payment = calculate_monthly_payment_batch(
+        principal, annual_interest_rate, loan_term_years
+    )
+    monthly_payment = payment + extra_monthly
+
+    with np.errstate(all="ignore"):
+        # Without the lump sum (or if the loan is paid off before it is due).
+        payoff_without_lump = _months_to_payoff(
+            principal, monthly_interest_rate, monthly_payment
+        )
+        paid_without_lump = monthly_payment * (
+            payoff_without_lump - 1
+        ) + _balance_after(
+            principal, monthly_interest_rate, monthly_payment, payoff_without_lump - 1
+        ) * (
+            1 + monthly_interest_rate
+        )
+
+        # With the lump sum applied after payment `lump_sum_month`.
+        balance_at_lump = _balance_after(
+            principal, monthly_interest_rate, monthly_payment, lump_sum_month
+        )
+        balance_after_lump = balance_at_lump - lump_sum
+        months_after_lump = _months_to_payoff(
+            balance_after_lump, monthly_interest_rate, monthly_payment
+        )
+        payoff_with_lump = lump_sum_month + months_after_lump
+        paid_with_lump = np.where(
+            balance_after_lump > 0,
+            monthly_payment * (payoff_with_lump - 1)
+            + lump_sum
+            + _balance_after(
+                balance_after_lump,
+                monthly_interest_rate,
+                monthly_payment,
+                months_after_lump - 1,
+            )
+            * (1 + monthly_interest_rate),
+            monthly_payment * lump_sum_month + balance_at_lump,
+        )
+
+    lump_applies = (lump_sum > 0) & (lump_sum_month < payoff_without_lump)
+    payoff_month = np.where(lump_applies, payoff_with_lump, payoff_without_lump)
+    total_interest = (
+        np.where(lump_applies, paid_with_lump, paid_without_lump) - principal
+    )
+    original_interest = payment * num_payments - principal
+
+    return {
+        "payoff_month": payoff_month.astype(int),
+        "months_saved": (num_payments - payoff_month).astype(int),
+        "total_interest": total_interest,
+        "interest_saved": original_interest - total_interest,
+    }
+
+
+def prepayment_balance_path(
+    principal,
+    annual_interest_rate,
+    loan_term_years,
+    extra_monthly=0,
+    lump_sum=0,
+    lump_sum_month=0,
+):
+    """
+    Month-by-month balances under the extra payments described in `calculate_prepayment_batch`.
+
+    Returns:
+        np.ndarray with the scenarios along the leading axes and the month (0 through the
+        longest term) along the last axis. Balances are 0 once the loan is paid off.
+    """
+    principal = np.asarray(principal, dtype=float)[..., np.newaxis]
+    annual_interest_rate = np.asarray(annual_interest_rate, dtype=float)[
+        ..., np.newaxis
+    ]
+    loan_term_years = np.asarray(loan_term_years, dtype=float)[..., np.newaxis]
+    extra_monthly = np.asarray(extra_monthly, dtype=float)[..., np.newaxis]
+    lump_sum = np.asarray(lump_sum, dtype=float)[..., np.newaxis]
+    lump_sum_month = np.asarray(lump_sum_month, dtype=float)[..., np.newaxis]
+
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    monthly_payment = (
+        calculate_monthly_payment_batch(
+            principal, annual_interest_rate, loan_term_years
+        )
+        + extra_monthly
+    )
+    months = np.arange(int(round(np.max(loan_term_years) * 12)) + 1, dtype=float)
+
+    balance_at_lump = _balance_after(
+        principal, monthly_interest_rate, monthly_payment, lump_sum_month
+    )
+    balance = np.where(
+        months <= lump_sum_month,
+        _balance_after(principal, monthly_interest_rate, monthly_payment, months),
+        _balance_after(
+            balance_at_lump - lump_sum,
+            monthly_interest_rate,
+            monthly_payment,
+            months - lump_sum_month,
+        ),
+    )
+    balance = np.where(months == lump_sum_month, balance - lump_sum, balance)
+
+    # Once the balance reaches zero it stays there.
+    paid_off = np.maximum.accumulate(balance <= 1e-6, axis=-1)
+    return np.where(paid_off, 0.0, balance)
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import functools
+import numbers
+import threading
+
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Bounded LRU cache for the scalar answer functions in `answers.py`.
+
+    Float arguments are normalized to a fixed number of significant digits before they are
+    used as keys, so `2`, `2.0` and `np.float64(2.0000000000001)` all share one entry.
+
+    Args:
+        maxsize: Maximum number of results to keep before evicting the least recently used
+        precision: Number of significant digits float arguments are rounded to in keys
+    """
+
+    def __init__(self, maxsize=4096, precision=12):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize(self, value):
+        """
+        Turns an argument into a hashable key component, or returns None if it can't be cached.
+        """
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, numbers.Real):
+            return float(f"{float(value):.{self.precision}g}")
+        if isinstance(value, str):
+            return value
+        return None
+
+    def make_key(self, function_name, args, kwargs):
+        """
+        Builds the cache key for a call, or returns None if an argument can't be cached.
+        """
+        key = [function_name]
+        values = list(args)
+        for name, value in sorted(kwargs.items()):
+            key.append(name)
+            values.append(value)
+        for value in values:
+            normalized = self.normalize(value)
+            if normalized is None:
+                return None
+            key.append(normalized)
+        return tuple(key)
+
+    def get(self, key):
+        """
+        Returns (True, result) on a hit and (False, None) on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses, evictions, current size, maxsize and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_active_cache = None
+
+
+def enable_answer_cache(maxsize=4096, precision=12):
+    """
+    Turns on caching for every function in `answers.py` decorated with `memoize_answer`.
+
+    Returns:
+        AnswerCache: The new active cache, whose `stats()` report hits and misses
+    """
+    global _active_cache
+    _active_cache = AnswerCache(maxsize=maxsize, precision=precision)
+    return _active_cache
+
+
+def disable_answer_cache():
+    global _active_cache
+    _active_cache = None
+
+
+def get_answer_cache():
+    """
+    Returns:
+        AnswerCache or None: The active cache, if caching is enabled
+    """
+    return _active_cache
+
+
+def memoize_answer(function):
+    """
+    Decorator that serves results from the active `AnswerCache`, if one is enabled.
+
+    Calls with arguments that can't be normalized (such as NumPy arrays) always go
+    straight to the wrapped function.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        cache = _active_cache
+        if cache is None:
+            return function(*args, **kwargs)
+
+        key = cache.make_key(function.__qualname__, args, kwargs)
+        if key is None:
+            return function(*args, **kwargs)
+
+        hit, result = cache.get(key)
+        if hit:
+            return result
+        result = function(*args, **kwargs)
+        cache.put(key, result)
+        return result
+
+    return wrapper
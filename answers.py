@@ -1,8 +1,56 @@
 from scipy import optimize
+import inspect
 import numpy as np
 import numpy_financial as npf
+import pandas as pd
 
+from answer_cache import memoize_answer
 
+# Argument types sent to the `*_batch` kernels; anything else takes the plain float path.
+_ARRAY_TYPES = (np.ndarray, pd.Series, list, tuple)
+
+
+def _is_array(*values):
+    return any(isinstance(value, _ARRAY_TYPES) for value in values)
+
+
+# The formulas below are shared by the scalar functions, which compute in plain floats,
+# and the `*_batch` kernels, which pass NumPy arrays. Rates must be non-zero; the callers
+# handle 0% loans, which are repaid in equal installments.
+
+
+def _annuity_payment(principal, monthly_rate, num_payments):
+    return (monthly_rate * principal) / (1 - (1 + monthly_rate) ** (-num_payments))
+
+
+def _balance_after_payments(principal, payment, monthly_rate, payments_made):
+    growth = (1 + monthly_rate) ** payments_made
+    return principal * growth - payment * (growth - 1) / monthly_rate
+
+
+def _interest_principal_split(remaining_balance, payment, monthly_rate):
+    interest_payment = remaining_balance * monthly_rate
+    return interest_payment, payment - interest_payment
+
+
+def _total_cost_difference(
+    monthly_payment,
+    principal_a1,
+    rate_a1,
+    principal_a2,
+    rate_a2,
+    principal_b,
+    rate_b,
+    term,
+):
+    num_payments = term * 12
+    total_cost_a1 = monthly_payment(principal_a1, rate_a1, term) * num_payments
+    total_cost_a2 = monthly_payment(principal_a2, rate_a2, term) * num_payments
+    total_cost_b = monthly_payment(principal_b, rate_b, term) * num_payments
+    return total_cost_a1 + total_cost_a2 - total_cost_b
+
+
+@memoize_answer
 def calculate_monthly_payment(principal, annual_interest_rate, loan_term_years):
     """
     Calculate monthly payment for a fully amortized loan.
@@ -15,16 +63,20 @@ def calculate_monthly_payment(principal, annual_interest_rate, loan_term_years):
     Returns:
         Monthly payment amount
     """
+    if _is_array(principal, annual_interest_rate, loan_term_years):
+        return calculate_monthly_payment_batch(
+            principal, annual_interest_rate, loan_term_years
+        )
+
     num_payments = loan_term_years * 12
     monthly_interest_rate = annual_interest_rate / 12 / 100
+    if monthly_interest_rate == 0:
+        return float(principal / num_payments)
 
-    monthly_payment = (monthly_interest_rate * principal) / (
-        1 - (1 + monthly_interest_rate) ** (-num_payments)
-    )
-
-    return monthly_payment
+    return float(_annuity_payment(principal, monthly_interest_rate, num_payments))
 
 
+@memoize_answer
 def calculate_remaining_balance(
     principal, annual_interest_rate, loan_term_years, years_elapsed
 ):
@@ -41,21 +93,27 @@ def calculate_remaining_balance(
     Returns:
         Remaining balance
     """
+    if _is_array(principal, annual_interest_rate, loan_term_years, years_elapsed):
+        return calculate_remaining_balance_batch(
+            principal, annual_interest_rate, loan_term_years, years_elapsed
+        )
+
     payment = calculate_monthly_payment(
         principal, annual_interest_rate, loan_term_years
     )
     monthly_interest_rate = annual_interest_rate / 12 / 100
     payments_made = years_elapsed * 12
+    if monthly_interest_rate == 0:
+        return float(principal - payment * payments_made)
 
-    remaining_balance = principal * (1 + monthly_interest_rate) ** payments_made - (
-        payment
-        * ((1 + monthly_interest_rate) ** payments_made - 1)
-        / monthly_interest_rate
+    return float(
+        _balance_after_payments(
+            principal, payment, monthly_interest_rate, payments_made
+        )
     )
 
-    return remaining_balance
-
 
+@memoize_answer
 def calculate_interest_principal_payment(
     principal, annual_interest_rate, loan_term_years, month_number
 ):
@@ -72,6 +130,11 @@ def calculate_interest_principal_payment(
     Returns:
         Tuple of (interest_payment, principal_payment)
     """
+    if _is_array(principal, annual_interest_rate, loan_term_years, month_number):
+        return calculate_interest_principal_payment_batch(
+            principal, annual_interest_rate, loan_term_years, month_number
+        )
+
     monthly_interest_rate = annual_interest_rate / 12 / 100
     payment = calculate_monthly_payment(
         principal, annual_interest_rate, loan_term_years
@@ -86,13 +149,14 @@ def calculate_interest_principal_payment(
     else:
         remaining_balance = principal
 
-    interest_payment = remaining_balance * monthly_interest_rate
-
-    principal_payment = payment - interest_payment
+    interest_payment, principal_payment = _interest_principal_split(
+        remaining_balance, payment, monthly_interest_rate
+    )
 
-    return interest_payment, principal_payment
+    return float(interest_payment), float(principal_payment)
 
 
+@memoize_answer
 def find_incremental_rate(
     principal_1,
     interest_rate_1,
@@ -131,6 +195,7 @@ def find_incremental_rate(
     return float(result)
 
 
+@memoize_answer
 def find__better_loan_option(
     principal_a1, rate_a1, principal_a2, rate_a2, principal_b, rate_b, term
 ):
@@ -150,15 +215,28 @@ def find__better_loan_option(
         float: The difference in total cost between loan option A (sum of A1 and A2) and loan option B.
                A positive value indicates option A is more expensive; a negative value indicates option B is more expensive.
     """
-    total_cost_a1 = calculate_monthly_payment(principal_a1, rate_a1, term) * term * 12
-    total_cost_a2 = calculate_monthly_payment(principal_a2, rate_a2, term) * term * 12
-    total_cost_b = calculate_monthly_payment(principal_b, rate_b, term) * term * 12
-
-    total_cost_a = total_cost_a1 + total_cost_a2
+    if _is_array(
+        principal_a1, rate_a1, principal_a2, rate_a2, principal_b, rate_b, term
+    ):
+        return find__better_loan_option_batch(
+            principal_a1, rate_a1, principal_a2, rate_a2, principal_b, rate_b, term
+        )
 
-    return total_cost_a - total_cost_b
+    return float(
+        _total_cost_difference(
+            calculate_monthly_payment,
+            principal_a1,
+            rate_a1,
+            principal_a2,
+            rate_a2,
+            principal_b,
+            rate_b,
+            term,
+        )
+    )
 
 
+@memoize_answer
 def calculate_refinance_npv(
     principal,
     term_1,
@@ -215,3 +293,632 @@ def calculate_refinance_npv(
     npv = npf.npv(discount_rate, cash_flows)
 
     return float(npv)
+
+
+def calculate_monthly_payment_batch(principal, annual_interest_rate, loan_term_years):
+    """
+    Vectorized version of `calculate_monthly_payment`.
+
+    All arguments may be scalars or array-likes; they are broadcast against each other
+    and the payments for every scenario are computed in a single NumPy pass. A 0% rate
+    pays the principal back in equal installments.
+
+    Args:
+        principal: The loan amount(s)
+        annual_interest_rate: Annual interest rate(s) as a whole number (e.g., 9.00 for 9%)
+        loan_term_years: Loan term(s) in years
+
+    Returns:
+        np.ndarray of monthly payment amounts
+    """
+    principal = np.asarray(principal, dtype=float)
+    annual_interest_rate = np.asarray(annual_interest_rate, dtype=float)
+    loan_term_years = np.asarray(loan_term_years, dtype=float)
+
+    num_payments = loan_term_years * 12
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    zero_rate = monthly_interest_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_interest_rate)
+
+    return np.where(
+        zero_rate,
+        principal / num_payments,
+        _annuity_payment(principal, safe_rate, num_payments),
+    )
+
+
+def calculate_remaining_balance_batch(
+    principal, annual_interest_rate, loan_term_years, years_elapsed
+):
+    """
+    Vectorized version of `calculate_remaining_balance`.
+
+    Args:
+        principal: The original loan amount(s)
+        annual_interest_rate: Annual interest rate(s) as whole numbers
+        loan_term_years: Total loan term(s) in years
+        years_elapsed: Number of years that have passed
+
+    Returns:
+        np.ndarray of remaining balances
+    """
+    principal = np.asarray(principal, dtype=float)
+    annual_interest_rate = np.asarray(annual_interest_rate, dtype=float)
+    years_elapsed = np.asarray(years_elapsed, dtype=float)
+
+    payment = calculate_monthly_payment_batch(
+        principal, annual_interest_rate, loan_term_years
+    )
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    payments_made = years_elapsed * 12
+    zero_rate = monthly_interest_rate == 0
+    safe_rate = np.where(zero_rate, 1.0, monthly_interest_rate)
+
+    return np.where(
+        zero_rate,
+        principal - payment * payments_made,
+        _balance_after_payments(principal, payment, safe_rate, payments_made),
+    )
+
+
+def calculate_interest_principal_payment_batch(
+    principal, annual_interest_rate, loan_term_years, month_number
+):
+    """
+    Vectorized version of `calculate_interest_principal_payment`.
+
+    Args:
+        principal: The original loan amount(s)
+        annual_interest_rate: Annual interest rate(s) as whole numbers
+        loan_term_years: Total loan term(s) in years
+        month_number: The month(s) for which to calculate the breakdown
+
+    Returns:
+        Tuple of np.ndarrays (interest_payment, principal_payment)
+    """
+    principal = np.asarray(principal, dtype=float)
+    annual_interest_rate = np.asarray(annual_interest_rate, dtype=float)
+    month_number = np.asarray(month_number, dtype=float)
+
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    payment = calculate_monthly_payment_batch(
+        principal, annual_interest_rate, loan_term_years
+    )
+
+    months_elapsed = month_number - 1
+    years_elapsed = months_elapsed / 12
+    remaining_balance = np.where(
+        month_number > 1,
+        calculate_remaining_balance_batch(
+            principal, annual_interest_rate, loan_term_years, years_elapsed
+        ),
+        principal,
+    )
+
+    return _interest_principal_split(remaining_balance, payment, monthly_interest_rate)
+
+
+def find__better_loan_option_batch(
+    principal_a1, rate_a1, principal_a2, rate_a2, principal_b, rate_b, term
+):
+    """
+    Vectorized version of `find__better_loan_option`.
+
+    Args:
+        principal_a1: Principal amount(s) for loan A1.
+        rate_a1: Annual interest rate(s) (as a percent) for loan A1.
+        principal_a2: Principal amount(s) for loan A2.
+        rate_a2: Annual interest rate(s) (as a percent) for loan A2.
+        principal_b: Principal amount(s) for loan B.
+        rate_b: Annual interest rate(s) (as a percent) for loan B.
+        term: Loan term(s) in years.
+
+    Returns:
+        np.ndarray of differences in total cost (option A minus option B).
+    """
+    return _total_cost_difference(
+        calculate_monthly_payment_batch,
+        principal_a1,
+        rate_a1,
+        principal_a2,
+        rate_a2,
+        principal_b,
+        rate_b,
+        np.asarray(term, dtype=float),
+    )
+
+
+def evaluate_scenarios(batch_function, scenarios):
+    """
+    Evaluate a batch function over a DataFrame of scenarios.
+
+    The columns of `scenarios` are matched by name to the parameters of `batch_function`,
+    so a frame with `principal`, `annual_interest_rate` and `loan_term_years` columns can
+    be passed straight to `calculate_monthly_payment_batch`.
+
+    Args:
+        batch_function: One of the `*_batch` functions in this module
+        scenarios (pd.DataFrame): One row per scenario
+
+    Returns:
+        np.ndarray (or tuple of np.ndarrays) with one entry per row of `scenarios`
+    """
+    parameters = inspect.signature(batch_function).parameters
+    missing = [name for name in parameters if name not in scenarios.columns]
+    if missing:
+        raise KeyError(f"Scenarios are missing columns: {', '.join(missing)}")
+
+    return batch_function(
+        **{name: scenarios[name].to_numpy(dtype=float) for name in parameters}
+    )
+
+
+def _annuity_factor(monthly_rate, num_payments):
+    """
+    Payment per dollar borrowed, r / (1 - (1 + r)^-n), and its derivative with respect to r.
+    The r -> 0 limit (1 / n) is substituted where the closed form is 0 / 0.
+    """
+    near_zero = np.abs(monthly_rate) < 1e-12
+    rate = np.where(near_zero, 1e-12, monthly_rate)
+    discount = (1 + rate) ** (-num_payments)
+    denominator = 1 - discount
+
+    factor = rate / denominator
+    derivative = (
+        denominator - num_payments * rate * discount / (1 + rate)
+    ) / denominator**2
+
+    factor = np.where(near_zero, 1 / num_payments, factor)
+    derivative = np.where(
+        near_zero, (num_payments + 1) / (2 * num_payments), derivative
+    )
+    return factor, derivative
+
+
+def find_incremental_rate_batch(
+    principal_1,
+    interest_rate_1,
+    term,
+    principal_2,
+    interest_rate_2,
+    initial_guess=5.0,
+    tol=1e-8,
+    maxiter=100,
+):
+    """
+    Vectorized version of `find_incremental_rate`.
+
+    Solves every scenario at once with Newton's method using the analytic derivative of
+    the annuity payment formula. Elements where Newton fails to converge (non-finite
+    steps, rates at or below -100%, or running out of iterations) are re-solved by
+    bisection. The payment is monotonic in the rate, so a root exists only if the
+    incremental payment lies between the payments at the ends of the bisection bracket;
+    it does not when, for example, the incremental principal is positive but the
+    incremental payment is not. Such elements are returned as NaN, not converged.
+
+    Args:
+        principal_1: The principal amount(s) of the first loan.
+        interest_rate_1: The annual interest rate(s) (in percent) of the first loan.
+        term: The loan term(s) in years.
+        principal_2: The principal amount(s) of the second loan.
+        interest_rate_2: The annual interest rate(s) (in percent) of the second loan.
+        initial_guess: Starting annual rate (in percent) for Newton's method.
+        tol: Convergence tolerance on the annual rate (in percent).
+        maxiter: Maximum number of Newton iterations.
+
+    Returns:
+        Tuple of np.ndarrays (rate, converged, used_bracketing):
+            - rate: The incremental annual interest rate (in percent), NaN where unsolved.
+            - converged: Whether a root was found for the element.
+            - used_bracketing: Whether the element fell back to bisection.
+    """
+    principal_1 = np.asarray(principal_1, dtype=float)
+    principal_2 = np.asarray(principal_2, dtype=float)
+    term = np.asarray(term, dtype=float)
+
+    incremental_principal = principal_2 - principal_1
+    incremental_payment = calculate_monthly_payment_batch(
+        principal_2, interest_rate_2, term
+    ) - calculate_monthly_payment_batch(principal_1, interest_rate_1, term)
+    shape = np.broadcast_shapes(
+        incremental_principal.shape, incremental_payment.shape, term.shape
+    )
+    incremental_principal, incremental_payment, num_payments = (
+        np.broadcast_to(values, shape).ravel()
+        for values in (incremental_principal, incremental_payment, term * 12)
+    )
+
+    def payment_function(rate_percent, index):
+        factor, derivative = _annuity_factor(
+            rate_percent / 12 / 100, num_payments[index]
+        )
+        value = factor * incremental_principal[index] - incremental_payment[index]
+        return value, derivative * incremental_principal[index] / 12 / 100
+
+    rate = np.full(incremental_payment.shape, float(initial_guess))
+    converged = np.zeros(rate.shape, dtype=bool)
+    active = np.flatnonzero(incremental_principal != 0)
+
+    with np.errstate(all="ignore"):
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            value, slope = payment_function(rate[active], active)
+            step = value / slope
+            new_rate = rate[active] - step
+
+            diverged = ~np.isfinite(new_rate) | (new_rate <= -1200)
+            done = ~diverged & (np.abs(step) < tol)
+            rate[active[~diverged]] = new_rate[~diverged]
+            converged[active[done]] = True
+            active = active[~diverged & ~done]
+
+        used_bracketing = ~converged & (incremental_principal != 0)
+        fallback = np.flatnonzero(used_bracketing)
+        if fallback.size:
+            rate[fallback], converged[fallback] = _bisect_incremental_rate(
+                payment_function, fallback, tol
+            )
+
+    rate[~converged] = np.nan
+    return (
+        rate.reshape(shape),
+        converged.reshape(shape),
+        used_bracketing.reshape(shape),
+    )
+
+
+def _bisect_incremental_rate(payment_function, index, tol):
+    """
+    Bisection fallback for `find_incremental_rate_batch`, run on the elements in `index`.
+    """
+    low = np.full(index.shape, -600.0)
+    high = np.full(index.shape, 100.0)
+    low_value = payment_function(low, index)[0]
+    high_value = payment_function(high, index)[0]
+
+    # The payment grows roughly linearly in the rate, so doubling finds an upper bracket quickly.
+    for _ in range(64):
+        unbracketed = np.sign(low_value) == np.sign(high_value)
+        if not unbracketed.any():
+            break
+        high = np.where(unbracketed, high * 2, high)
+        high_value = payment_function(high, index)[0]
+
+    bracketed = np.sign(low_value) != np.sign(high_value)
+    for _ in range(200):
+        middle = (low + high) / 2
+        middle_value = payment_function(middle, index)[0]
+        same_side = np.sign(middle_value) == np.sign(low_value)
+        low = np.where(same_side, middle, low)
+        low_value = np.where(same_side, middle_value, low_value)
+        high = np.where(same_side, high, middle)
+        if np.all(high - low < tol):
+            break
+
+    return (low + high) / 2, bracketed & np.isfinite(low_value)
+
+
+def _annuity_present_value(rate, num_periods):
+    """
+    Present value of 1 paid at the end of each of `num_periods` periods, (1 - (1 + i)^-n) / i.
+    """
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    return np.where(
+        rate == 0, num_periods, (1 - (1 + safe_rate) ** (-num_periods)) / safe_rate
+    )
+
+
+def calculate_refinance_npv_batch(
+    principal,
+    term_1,
+    rate_1,
+    years_elapsed,
+    term_2,
+    rate_2,
+    penalty_rate,
+    fee,
+    out_of_pocket=True,
+):
+    """
+    Vectorized, closed-form version of `calculate_refinance_npv`.
+
+    Instead of building the list of monthly cash flows, the discounted monthly gains and
+    the discounted refinance payments that run past the original term are each valued as
+    an annuity, so the cost does not depend on the length of the loans. All arguments
+    may be scalars or array-likes and are broadcast against each other.
+
+    Args:
+        principal: Original loan amount(s)
+        term_1: Original loan term(s) (years)
+        rate_1: Original annual interest rate(s) (percent)
+        years_elapsed: Years passed on original loan
+        term_2: New loan term(s) (years)
+        rate_2: New annual interest rate(s) (percent)
+        penalty_rate: Prepayment penalty rate(s) (percent)
+        fee: Refinance fee(s) (absolute amount)
+        out_of_pocket: If True, fees are paid upfront; if False, fees are rolled into the new loan
+
+    Returns:
+        np.ndarray of Net Present Values (NPV) of refinancing
+    """
+    term_1 = np.asarray(term_1, dtype=float)
+    term_2 = np.asarray(term_2, dtype=float)
+    rate_2 = np.asarray(rate_2, dtype=float)
+    years_elapsed = np.asarray(years_elapsed, dtype=float)
+    penalty_rate = np.asarray(penalty_rate, dtype=float)
+    fee = np.asarray(fee, dtype=float)
+    out_of_pocket = np.asarray(out_of_pocket, dtype=bool)
+
+    payment_now = calculate_monthly_payment_batch(principal, rate_1, term_1)
+    remaining_balance = calculate_remaining_balance_batch(
+        principal, rate_1, term_1, years_elapsed
+    )
+
+    refinance_cost = fee + remaining_balance * penalty_rate / 100
+    refinance_principal = np.where(
+        out_of_pocket, remaining_balance, remaining_balance + refinance_cost
+    )
+    upfront_cost = np.where(out_of_pocket, refinance_cost, 0)
+
+    payment_refinance = calculate_monthly_payment_batch(
+        refinance_principal, rate_2, term_2
+    )
+    monthly_gain = payment_now - payment_refinance
+
+    discount_rate = rate_2 / 12 / 100
+
+    remaining_months = np.maximum(np.trunc((term_1 - years_elapsed) * 12), 0)
+    extra_months = np.maximum(np.trunc((term_2 - (term_1 - years_elapsed)) * 12), 0)
+
+    npv = (
+        -upfront_cost
+        + monthly_gain * _annuity_present_value(discount_rate, remaining_months)
+        - payment_refinance
+        * (1 + discount_rate) ** (-remaining_months)
+        * _annuity_present_value(discount_rate, extra_months)
+    )
+
+    return npv
+
+
+@memoize_answer
+def calculate_refinance_npv_closed_form(
+    principal,
+    term_1,
+    rate_1,
+    years_elapsed,
+    term_2,
+    rate_2,
+    penalty_rate,
+    fee,
+    out_of_pocket=True,
+):
+    """
+    Calculate the NPV of refinancing a loan without building the cash-flow list.
+
+    Takes the same arguments as `calculate_refinance_npv` and returns the same value,
+    using `calculate_refinance_npv_batch` for a single scenario.
+
+    Returns:
+        Net Present Value (NPV) of refinancing
+    """
+    return float(
+        calculate_refinance_npv_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            rate_2,
+            penalty_rate,
+            fee,
+            out_of_pocket,
+        )
+    )
+
+
+def find_break_even_refinance_rate_batch(
+    principal,
+    term_1,
+    rate_1,
+    years_elapsed,
+    term_2,
+    penalty_rate,
+    fee,
+    out_of_pocket=True,
+    low=0.01,
+    high=100.0,
+    tol=1e-8,
+):
+    """
+    Find the new annual interest rate (`rate_2`) at which refinancing has an NPV of zero.
+
+    Every scenario is solved at once by vectorized bisection on
+    `calculate_refinance_npv_batch` between `low` and `high`. `rate_2` is also the
+    discount rate, so the NPV is not always monotone in it (for instance when `term_2` is
+    shorter than the remaining term); the bisection only relies on the NPV having
+    opposite signs at `low` and `high`. Scenarios where the signs match (refinancing
+    never or always pays off, or crosses zero an even number of times) are returned as NaN.
+
+    Args:
+        principal: Original loan amount(s)
+        term_1: Original loan term(s) (years)
+        rate_1: Original annual interest rate(s) (percent)
+        years_elapsed: Years passed on original loan
+        term_2: New loan term(s) (years)
+        penalty_rate: Prepayment penalty rate(s) (percent)
+        fee: Refinance fee(s) (absolute amount)
+        out_of_pocket: If True, fees are paid upfront; if False, fees are rolled into the new loan
+        low: Lowest annual rate (percent) to search
+        high: Highest annual rate (percent) to search
+        tol: Convergence tolerance on the annual rate (percent)
+
+    Returns:
+        np.ndarray of break-even annual interest rates (percent)
+    """
+
+    def npv_at(rate_2):
+        return calculate_refinance_npv_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            rate_2,
+            penalty_rate,
+            fee,
+            out_of_pocket,
+        )
+
+    low_npv = npv_at(low)
+    low = np.full(low_npv.shape, float(low))
+    high = np.full(low_npv.shape, float(high))
+    bracketed = np.sign(low_npv) != np.sign(npv_at(high))
+
+    while np.any(high - low > tol):
+        middle = (low + high) / 2
+        middle_npv = npv_at(middle)
+        same_side = np.sign(middle_npv) == np.sign(low_npv)
+        low = np.where(same_side, middle, low)
+        low_npv = np.where(same_side, middle_npv, low_npv)
+        high = np.where(same_side, high, middle)
+
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def find_break_even_refinance_fee_batch(
+    principal,
+    term_1,
+    rate_1,
+    years_elapsed,
+    term_2,
+    rate_2,
+    penalty_rate,
+    out_of_pocket=True,
+):
+    """
+    Find the largest refinance fee that still leaves the refinance NPV at or above zero.
+
+    The NPV is linear in the fee whether it is paid out of pocket or rolled into the new
+    loan, so two NPV evaluations per scenario give the break-even fee exactly.
+
+    Args:
+        principal: Original loan amount(s)
+        term_1: Original loan term(s) (years)
+        rate_1: Original annual interest rate(s) (percent)
+        years_elapsed: Years passed on original loan
+        term_2: New loan term(s) (years)
+        rate_2: New annual interest rate(s) (percent)
+        penalty_rate: Prepayment penalty rate(s) (percent)
+        out_of_pocket: If True, fees are paid upfront; if False, fees are rolled into the new loan
+
+    Returns:
+        np.ndarray of break-even fees (negative where refinancing loses money even without fees)
+    """
+
+    def npv_at(fee):
+        return calculate_refinance_npv_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            rate_2,
+            penalty_rate,
+            fee,
+            out_of_pocket,
+        )
+
+    npv_without_fee = npv_at(0.0)
+    npv_per_dollar = npv_at(1.0) - npv_without_fee
+
+    return -npv_without_fee / npv_per_dollar
+
+
+def refinance_break_even_surface(
+    principal,
+    term_1,
+    rate_1,
+    years_elapsed,
+    term_2,
+    rate_2,
+    penalty_rate,
+    fee,
+    out_of_pocket=True,
+):
+    """
+    Build a dense break-even surface over a grid of original loans.
+
+    Every combination of the `principal`, `term_1`, `rate_1` and `years_elapsed` values
+    is solved at once for the break-even new rate (given `fee`) and the break-even fee
+    (given `rate_2`), which is useful for picking interesting question parameters.
+
+    Args:
+        principal: Original loan amounts to include in the grid
+        term_1: Original loan terms (years) to include in the grid
+        rate_1: Original annual interest rates (percent) to include in the grid
+        years_elapsed: Years passed on original loan to include in the grid
+        term_2: New loan term (years)
+        rate_2: New annual interest rate (percent), used for the break-even fee
+        penalty_rate: Prepayment penalty rate (percent)
+        fee: Refinance fee (absolute amount), used for the break-even rate
+        out_of_pocket: If True, fees are paid upfront; if False, fees are rolled into the new loan
+
+    Returns:
+        pd.DataFrame with one row per grid point and the columns principal, term_1, rate_1,
+        years_elapsed, break_even_rate, break_even_fee and npv (at `rate_2` and `fee`)
+    """
+    grid = np.meshgrid(
+        np.atleast_1d(principal),
+        np.atleast_1d(term_1),
+        np.atleast_1d(rate_1),
+        np.atleast_1d(years_elapsed),
+        indexing="ij",
+    )
+    principal, term_1, rate_1, years_elapsed = (axis.ravel() for axis in grid)
+
+    with np.errstate(all="ignore"):
+        break_even_rate = find_break_even_refinance_rate_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            penalty_rate,
+            fee,
+            out_of_pocket,
+        )
+        break_even_fee = find_break_even_refinance_fee_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            rate_2,
+            penalty_rate,
+            out_of_pocket,
+        )
+        npv = calculate_refinance_npv_batch(
+            principal,
+            term_1,
+            rate_1,
+            years_elapsed,
+            term_2,
+            rate_2,
+            penalty_rate,
+            fee,
+            out_of_pocket,
+        )
+
+    return pd.DataFrame(
+        {
+            "principal": principal,
+            "term_1": term_1,
+            "rate_1": rate_1,
+            "years_elapsed": years_elapsed,
+            "break_even_rate": break_even_rate,
+            "break_even_fee": break_even_fee,
+            "npv": npv,
+        }
+    )
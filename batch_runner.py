@@ -0,0 +1,216 @@
+from run_ai_tests import *
+import run_ai_tests
+import json
+import time
+
+BATCH_ENDPOINT = "/v1/responses"
+
+# Structured output format equivalent to passing `text_format=QuestionOutput` to `responses.parse`.
+QUESTION_OUTPUT_FORMAT = {
+    "type": "json_schema",
+    "name": QuestionOutput.__name__,
+    "schema": {
+        **QuestionOutput.model_json_schema(),
+        "additionalProperties": False,
+    },
+    "strict": True,
+}
+
+
+def build_batch_requests(
+    question_list,
+    num_iterations=1,
+    ai_model=AIModels.GPT_4O,
+    use_code_interpreter=False,
+):
+    """
+    Serializes a question suite into Batch API request lines.
+
+    Each line carries a `custom_id` with the same question index `run_ai_tests` uses, so the
+    batch results can be mapped back to the questions.
+
+    Returns:
+        list: One dict per request, in the order they should be written to the JSONL file.
+    """
+    model_name = getattr(ai_model, "value", ai_model)
+    return [
+        {
+            "custom_id": f"question-{index}",
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model_name,
+                "input": message_input,
+                "instructions": (
+                    ASSISTANT_INSTRUCTIONS_CODE
+                    if use_code_interpreter
+                    else ASSISTANT_INSTRUCTIONS
+                ),
+                "tools": (
+                    [{"type": "code_interpreter", "container": {"type": "auto"}}]
+                    if use_code_interpreter
+                    else []
+                ),
+                "text": {"format": QUESTION_OUTPUT_FORMAT},
+            },
+        }
+        for message_input, index in build_messages(question_list, num_iterations)
+    ]
+
+
+def write_batch_file(path, batch_requests):
+    with open(path, "w") as f:
+        for request in batch_requests:
+            f.write(json.dumps(request) + "\n")
+
+
+def default_batch_client():
+    """
+    The OpenAI client with the SDK's own retries, which the batch endpoints keep since
+    they don't go through the rate limiter.
+    """
+    return run_ai_tests.client.with_options(max_retries=2)
+
+
+def submit_batch(path, batch_client=None):
+    """
+    Uploads a batch request file and creates the batch.
+
+    Returns:
+        The created batch object
+    """
+    batch_client = batch_client or default_batch_client()
+    with open(path, "rb") as f:
+        input_file = batch_client.files.create(file=f, purpose="batch")
+    return batch_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+
+
+def wait_for_batch(batch_id, batch_client=None, poll_interval=30, timeout=None):
+    """
+    Polls a batch until it reaches a final status.
+
+    Returns:
+        The finished batch object
+
+    Raises:
+        TimeoutError: If the batch is still running after `timeout` seconds
+        RuntimeError: If the batch failed, expired or was cancelled
+    """
+    batch_client = batch_client or default_batch_client()
+    start_time = time.time()
+    while True:
+        batch = batch_client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(
+            f"Batch {batch_id}: {batch.status}"
+            + (f" ({counts.completed}/{counts.total} completed)" if counts else "")
+        )
+        if batch.status == "completed":
+            return batch
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {batch_id} finished with status {batch.status}")
+        if timeout is not None and time.time() - start_time > timeout:
+            raise TimeoutError(
+                f"Batch {batch_id} still {batch.status} after {timeout}s"
+            )
+        time.sleep(poll_interval)
+
+
+def parse_batch_line(line):
+    """
+    Turns one line of a batch output or error file into (parsed_output, usage, message_index).
+
+    Failed requests come back with no parsed output and empty usage; requests whose output
+    doesn't parse come back with no parsed output and their usage.
+    """
+    record = json.loads(line)
+    index = int(record["custom_id"].rsplit("-", 1)[1])
+    response = record.get("response") or {}
+    body = response.get("body") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        print(
+            f"Batch request {record['custom_id']} failed: {record.get('error') or body}"
+        )
+        return None, {}, index
+
+    text = "".join(
+        content.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    )
+    usage = body.get("usage") or {}
+    try:
+        return QuestionOutput.model_validate_json(text), usage, index
+    except ValueError as e:  # Includes pydantic's ValidationError.
+        print(f"Batch request {record['custom_id']} returned malformed output: {e}")
+        return None, usage, index
+
+
+def read_batch_results(batch, batch_client=None):
+    """
+    Downloads the output (and error) file of a finished batch.
+
+    Returns:
+        list: (parsed_output, usage, message_index) tuples, as `summarize_responses` expects.
+    """
+    batch_client = batch_client or default_batch_client()
+    responses = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = batch_client.files.content(file_id).text
+        responses.extend(
+            parse_batch_line(line) for line in content.splitlines() if line.strip()
+        )
+    return responses
+
+
+def run_ai_tests_batch(
+    question_list,
+    num_iterations=1,
+    ai_model=AIModels.GPT_4O,
+    use_code_interpreter=False,
+    output_file="ai_responses.json",
+    batch_file="batch_requests.jsonl",
+    poll_interval=30,
+    timeout=None,
+    batch_client=None,
+):
+    """
+    Runs a question suite through the Batch API instead of one request at a time.
+
+    Writes the batch request JSONL to `batch_file`, submits it, polls until it finishes and
+    maps the results back into the records `run_ai_tests` returns. Pass a client pointed at
+    `MockOpenAIServer` as `batch_client` to run it offline.
+
+    Returns:
+        list: The same result dicts as `run_ai_tests`.
+    """
+    batch_requests = build_batch_requests(
+        question_list, num_iterations, ai_model, use_code_interpreter
+    )
+    write_batch_file(batch_file, batch_requests)
+
+    batch = submit_batch(batch_file, batch_client)
+    print(f"Submitted batch {batch.id} with {len(batch_requests)} requests")
+
+    batch = wait_for_batch(batch.id, batch_client, poll_interval, timeout)
+    responses = read_batch_results(batch, batch_client)
+
+    missing = len(batch_requests) - len(responses)
+    if missing:
+        print(f"Batch {batch.id} returned no result for {missing} requests")
+        answered = {index for _, _, index in responses}
+        responses.extend(
+            (None, {}, index)
+            for _, index in build_messages(question_list, num_iterations)
+            if index not in answered
+        )
+
+    return summarize_responses(responses, question_list, output_file)
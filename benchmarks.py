@@ -0,0 +1,169 @@
+from answers import *
+from parallel_generation import ScenarioGrid, generate_question_dataset
+from question_dataset import read_question_dataset, write_question_dataset
+import os
+import tempfile
+import time
+
+
+def time_call(function, *args, repeat=3, **kwargs):
+    """
+    Runs a function several times and returns its fastest wall-clock time and last result.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+
+def benchmark_incremental_rate(num_scenarios=5000, seed=0):
+    """
+    Compares `find_incremental_rate_batch` against calling `find_incremental_rate` once per scenario.
+    """
+    rng = np.random.default_rng(seed)
+    principal_1 = rng.uniform(100000, 1200000, num_scenarios).round(-3)
+    principal_2 = principal_1 + rng.uniform(10000, 300000, num_scenarios).round(-3)
+    interest_rate_1 = rng.uniform(1, 10, num_scenarios).round(2)
+    interest_rate_2 = interest_rate_1 + rng.uniform(0, 2, num_scenarios).round(2)
+    term = rng.choice([15, 30], num_scenarios)
+
+    def per_call():
+        return np.array(
+            [
+                find_incremental_rate(*scenario)
+                for scenario in zip(
+                    principal_1, interest_rate_1, term, principal_2, interest_rate_2
+                )
+            ]
+        )
+
+    scalar_time, scalar_rates = time_call(per_call, repeat=1)
+    batch_time, (batch_rates, converged, used_bracketing) = time_call(
+        find_incremental_rate_batch,
+        principal_1,
+        interest_rate_1,
+        term,
+        principal_2,
+        interest_rate_2,
+    )
+
+    print(f"find_incremental_rate ({num_scenarios} scenarios)")
+    print(f"  per-call newton: {scalar_time:.4f}s")
+    print(f"  batch newton:    {batch_time:.4f}s ({scalar_time / batch_time:.1f}x)")
+    print(
+        f"  converged: {converged.sum()}/{num_scenarios}, "
+        f"bracketing fallbacks: {used_bracketing.sum()}, "
+        f"max difference: {np.max(np.abs(batch_rates - scalar_rates)):.2e}"
+    )
+
+
+def benchmark_refinance_npv(num_scenarios=5000, seed=0):
+    """
+    Compares `calculate_refinance_npv_batch` against calling `calculate_refinance_npv` once per scenario.
+
+    The cent-for-cent agreement of the two is tested in tests/test_refinance_npv.py.
+    """
+    rng = np.random.default_rng(seed)
+    principal = rng.uniform(100000, 2000000, num_scenarios).round(-3)
+    term_1 = rng.choice([15, 20, 30], num_scenarios)
+    rate_1 = rng.uniform(1, 10, num_scenarios).round(2)
+    years_elapsed = rng.integers(0, 14, num_scenarios)
+    term_2 = rng.choice([10, 15, 20, 30], num_scenarios)
+    rate_2 = rng.uniform(0.5, 10, num_scenarios).round(2)
+    penalty_rate = rng.integers(0, 5, num_scenarios)
+    fee = rng.uniform(0, 10000, num_scenarios).round()
+    out_of_pocket = rng.random(num_scenarios) < 0.5
+    scenarios = (
+        principal,
+        term_1,
+        rate_1,
+        years_elapsed,
+        term_2,
+        rate_2,
+        penalty_rate,
+        fee,
+        out_of_pocket,
+    )
+
+    def per_call():
+        return np.array(
+            [calculate_refinance_npv(*scenario) for scenario in zip(*scenarios)]
+        )
+
+    scalar_time, scalar_npv = time_call(per_call, repeat=1)
+    batch_time, batch_npv = time_call(calculate_refinance_npv_batch, *scenarios)
+
+    mismatches = np.sum(np.round(batch_npv, 2) != np.round(scalar_npv, 2))
+    print(f"calculate_refinance_npv ({num_scenarios} scenarios)")
+    print(f"  per-call cash flows: {scalar_time:.4f}s")
+    print(f"  batch closed form:   {batch_time:.4f}s ({scalar_time / batch_time:.1f}x)")
+    print(
+        f"  max difference: {np.max(np.abs(batch_npv - scalar_npv)):.2e}, "
+        f"cent mismatches: {mismatches}"
+    )
+
+
+def benchmark_question_generation(num_workers=None):
+    """
+    Compares `generate_question_dataset` across processes against a single-process
+    `write_question_dataset` of the same scenarios, and checks the files are identical.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    scenarios = ScenarioGrid(
+        principal_1=range(200000, 400000, 10000),
+        interest_rate_1=[3, 3.5, 4, 4.5, 5],
+        term_1=[15, 30],
+        years_elapsed_1=[3, 5, 7],
+        month_number_1=[12, 60],
+        principal_2=[450000],
+        interest_rate_2=[5.5, 6],
+        term_2=[30],
+        years_elapsed_2=[5],
+        extra_amount=[200],
+        penalty_rate=[2],
+        fees=[3000],
+        out_of_pocket=[True],
+        principal_a2=[50000],
+        rate_a2=[7],
+        principal_b=[350000],
+        rate_b=[5.25],
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        single_path = os.path.join(directory, "single.arrow")
+        parallel_path = os.path.join(directory, "parallel.arrow")
+        single_time, _ = time_call(
+            write_question_dataset,
+            single_path,
+            (scenarios[index] for index in range(len(scenarios))),
+            repeat=1,
+        )
+        parallel_time, num_questions = time_call(
+            generate_question_dataset,
+            parallel_path,
+            scenarios,
+            num_workers,
+            repeat=1,
+        )
+        identical = read_question_dataset(single_path).equals(
+            read_question_dataset(parallel_path)
+        )
+
+    print(
+        f"question generation ({len(scenarios)} scenarios, {num_questions} questions)"
+    )
+    print(f"  single process:      {single_time:.4f}s")
+    print(
+        f"  {num_workers} worker(s):         {parallel_time:.4f}s "
+        f"({single_time / parallel_time:.1f}x)"
+    )
+    if not identical:
+        raise AssertionError("Sharded generation produced a different dataset")
+
+
+if __name__ == "__main__":
+    benchmark_incremental_rate()
+    benchmark_refinance_npv()
+    benchmark_question_generation()
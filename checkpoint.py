@@ -0,0 +1,273 @@
+import gzip
+import json
+import os
+import zlib
+
+
+def _is_compressed(path):
+    return path.endswith(".gz")
+
+
+def _open_checkpoint(path, mode):
+    if _is_compressed(path):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _read_gzip_prefix(path, block_size=4096):
+    """
+    Decompresses as much of a (possibly truncated) multi-member gzip file as possible.
+
+    `gzip.open` drops everything decoded in a read call that hits the torn end, so the
+    members are decoded here in small blocks instead.
+
+    Returns:
+        tuple: (decompressed bytes, whether the file ended mid-member or was corrupt)
+    """
+    chunks = []
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    in_member = False
+    try:
+        with open(path, "rb") as f:
+            while block := f.read(block_size):
+                while block:
+                    in_member = True
+                    chunks.append(decompressor.decompress(block))
+                    if not decompressor.eof:
+                        break
+                    block = decompressor.unused_data
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    in_member = False
+    except zlib.error:
+        return b"".join(chunks), True
+    return b"".join(chunks), in_member
+
+
+def _trim_partial_record(path):
+    """
+    Cuts a checkpoint back to its last complete record, so records appended after a crash
+    don't merge with a torn last line.
+
+    Plain files are truncated after their last newline. A gzip file with a truncated last
+    member can't be appended to, so its readable prefix is rewritten into a fresh file.
+    """
+    if not os.path.exists(path):
+        return
+    if not _is_compressed(path):
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                block_start = max(0, position - 65536)
+                f.seek(block_start)
+                newline = f.read(position - block_start).rfind(b"\n")
+                if newline >= 0:
+                    position = block_start + newline + 1
+                    break
+                position = block_start
+            if position != end:
+                f.truncate(position)
+        return
+
+    data, truncated = _read_gzip_prefix(path)
+    if not truncated and (not data or data.endswith(b"\n")):
+        return
+    temporary_path = f"{path}.repairing.gz"
+    with gzip.open(temporary_path, "wb") as f:
+        f.write(data[: data.rfind(b"\n") + 1])
+    os.replace(temporary_path, path)
+
+
+def combination_key(combo):
+    """
+    Identifies a combination independently of its results.
+    """
+    return json.dumps(
+        [
+            combo.get("model"),
+            combo.get("interest_rate"),
+            combo.get("loan_amount"),
+            combo.get("loan_term"),
+            combo.get("run_code"),
+            combo.get("question_id"),
+        ]
+    )
+
+
+def strip_question_copies(ai_response):
+    """
+    Drops the question text and expected answer from a combination's responses; with a
+    `QuestionRegistry` they are recorded once per question, keyed by `question_id`.
+    """
+    if not isinstance(ai_response, list):
+        return ai_response
+    return [
+        {
+            key: value
+            for key, value in response.items()
+            if key not in ("question", "expected_answer")
+        }
+        for response in ai_response
+    ]
+
+
+class CheckpointWriter:
+    """
+    Append-only JSONL checkpoint for combination sweeps.
+
+    Every completed combination is appended as one line and flushed to disk, so the cost
+    of a checkpoint does not grow with the size of the sweep and a crash can at worst
+    leave a partial last line, which `iter_checkpoint` skips. Paths ending in `.gz` are
+    written gzip compressed and sync-flushed after every record.
+
+    Args:
+        path (str): The checkpoint file.
+        fsync (bool): Whether to fsync after every record.
+        resume (bool): Append to an existing checkpoint, after dropping a partial last
+            record left by a crash. Otherwise the file is started over, so results of
+            earlier sweeps don't end up in this one's.
+    """
+
+    def __init__(self, path, fsync=True, resume=False):
+        self.path = path
+        self.fsync = fsync
+        self._written_questions = set()
+        if resume:
+            _trim_partial_record(path)
+        self._file = _open_checkpoint(path, "a" if resume else "w")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync and not _is_compressed(self.path):
+            os.fsync(self._file.fileno())
+
+    def write_question(self, question_id, question):
+        """
+        Records a registry question once per writer.
+        """
+        if question_id in self._written_questions:
+            return
+        self._written_questions.add(question_id)
+        self._write({"type": "question", "question_id": question_id, **question})
+
+    def write_combination(self, combo):
+        self._write({"type": "combination", **combo})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_checkpoint(path):
+    """
+    Yields the records in a checkpoint, skipping a truncated or corrupt trailing record.
+    """
+    if not os.path.exists(path):
+        return
+    if _is_compressed(path):
+        data, truncated = _read_gzip_prefix(path)
+        if truncated:
+            print(f"Checkpoint {path} ends with a truncated record")
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        yield from _parse_records(path, lines)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from _parse_records(path, f)
+
+
+def _parse_records(path, lines):
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Skipping corrupt checkpoint record in {path}")
+
+
+def finished_combination_keys(path):
+    """
+    The `combination_key`s of the combinations a checkpoint holds a result for, so a
+    resumed sweep can skip them. Combinations recorded with an error are left out and run
+    again.
+    """
+    finished = set()
+    for record in iter_checkpoint(path):
+        if record.get("type", "combination") != "combination":
+            continue
+        key = combination_key(record)
+        ai_response = record.get("ai_response")
+        if isinstance(ai_response, dict) and "error" in ai_response:
+            finished.discard(key)
+        else:
+            finished.add(key)
+    return finished
+
+
+def load_checkpoint(path):
+    """
+    Rebuilds the sweep results from a checkpoint.
+
+    If a combination was recorded more than once, the last record wins.
+
+    Returns:
+        The list of combinations, or the `{"questions": ..., "combinations": ...}` layout
+        if the checkpoint holds registry questions.
+    """
+    questions = {}
+    combinations = {}
+    for record in iter_checkpoint(path):
+        record_type = record.pop("type", "combination")
+        if record_type == "question":
+            questions[record.pop("question_id")] = record
+        else:
+            key = combination_key(record)
+            combinations.pop(key, None)
+            combinations[key] = record
+
+    if questions:
+        return {"questions": questions, "combinations": list(combinations.values())}
+    return list(combinations.values())
+
+
+def compact_checkpoint(path, output_file=None):
+    """
+    Rewrites a checkpoint without duplicate or corrupt records, atomically.
+
+    Args:
+        path (str): The checkpoint file.
+        output_file (str, optional): Also write the rebuilt results here as one JSON document.
+
+    Returns:
+        The rebuilt results, as returned by `load_checkpoint`.
+    """
+    results = load_checkpoint(path)
+    if isinstance(results, dict):
+        questions = results["questions"]
+        combinations = results["combinations"]
+    else:
+        questions = {}
+        combinations = results
+
+    temporary_path = f"{path}.compacting"
+    if _is_compressed(path):
+        temporary_path += ".gz"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+    with CheckpointWriter(temporary_path, fsync=False) as writer:
+        for question_id, question in questions.items():
+            writer.write_question(question_id, question)
+        for combo in combinations:
+            writer.write_combination(combo)
+    os.replace(temporary_path, path)
+
+    if output_file:
+        temporary_output = f"{output_file}.tmp"
+        with open(temporary_output, "w") as f:
+            json.dump(results, f, indent=4)
+        os.replace(temporary_output, output_file)
+    return results
@@ -1,6 +1,7 @@
 import pandas as pd
 import json
 import sys
+from question_grid import expand_results
 
 
 def convert_json_to_csv(
@@ -10,7 +11,8 @@ def convert_json_to_csv(
     Convert loan calculation data from JSON format to CSV
 
     Parameters:
-    json_data (list): List of dictionaries containing loan data
+    json_data (list or dict): List of dictionaries containing loan data, or the
+        deduplicated {"questions", "combinations"} layout
     output_file (str): Path to the output CSV file
 
     Returns:
@@ -18,7 +20,7 @@ def convert_json_to_csv(
     """
     flattened_data = []
 
-    for entry in json_data:
+    for entry in expand_results(json_data):
         model = entry.get("model", "")
         interest_rate = entry.get("interest_rate", "")
         loan_amount = entry.get("loan_amount", "")
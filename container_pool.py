@@ -0,0 +1,238 @@
+from contextlib import contextmanager
+import atexit
+import collections
+import concurrent.futures
+import threading
+import time
+
+# Containers in the shared pool used by code-interpreter runs.
+DEFAULT_CONTAINER_POOL_SIZE = 4
+
+
+class ContainerPool:
+    """
+    Pool of code interpreter containers leased to concurrent requests.
+
+    Containers are created once (`fill` creates all of them up front) and handed out one
+    request at a time, so code-enabled runs can send several requests in parallel and
+    later runs reuse the same containers instead of paying for startup every time.
+    A container is recycled (deleted and replaced) once it has served `max_uses` requests
+    or is older than `max_age_seconds`, and it is health checked with a `retrieve` before
+    it is leased if it sat idle for more than `health_check_interval` seconds or its last
+    request failed. Containers the API reports as anything but running are replaced too.
+
+    Args:
+        container_client: The OpenAI client used to manage containers.
+        size (int): Number of containers in the pool.
+        name_prefix (str): Prefix of the container names.
+        max_uses (int): Requests a container serves before it is recycled.
+        max_age_seconds (float): Age after which a container is recycled.
+        health_check_interval (float): Idle seconds after which a container is checked before reuse.
+    """
+
+    def __init__(
+        self,
+        container_client,
+        size=DEFAULT_CONTAINER_POOL_SIZE,
+        name_prefix="code-interpreter-container",
+        max_uses=100,
+        max_age_seconds=15 * 60,
+        health_check_interval=60,
+    ):
+        self.container_client = container_client
+        self.size = size
+        self.name_prefix = name_prefix
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.health_check_interval = health_check_interval
+
+        self.created_count = 0
+        self.recycled_count = 0
+        self.lease_count = 0
+        self._idle = collections.deque()
+        self._leased = {}
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    def _create(self):
+        container = self.container_client.containers.create(
+            name=f"{self.name_prefix}-{self.created_count + 1}"
+        )
+        now = time.monotonic()
+        with self._condition:
+            self.created_count += 1
+        return {"id": container.id, "created": now, "checked": now, "uses": 0}
+
+    def _delete(self, record):
+        try:
+            self.container_client.containers.delete(record["id"])
+        except Exception as e:
+            print(f"Could not delete container {record['id']}: {e}")
+
+    def _needs_recycling(self, record, now):
+        return (
+            record["uses"] >= self.max_uses
+            or now - record["created"] > self.max_age_seconds
+        )
+
+    def _is_healthy(self, record):
+        try:
+            container = self.container_client.containers.retrieve(record["id"])
+        except Exception as e:
+            print(f"Health check of container {record['id']} failed: {e}")
+            return False
+        record["checked"] = time.monotonic()
+        return getattr(container, "status", "running") == "running"
+
+    def fill(self):
+        """
+        Creates containers in parallel until the pool holds `size` of them.
+        """
+        with self._condition:
+            missing = self.size - len(self._idle) - len(self._leased) - self._pending
+            self._pending += max(0, missing)
+        if missing <= 0:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=missing) as executor:
+            futures = [executor.submit(self._create) for _ in range(missing)]
+        for future in futures:
+            with self._condition:
+                self._pending -= 1
+                if future.exception() is None:
+                    self._idle.append(future.result())
+                self._condition.notify()
+        for future in futures:
+            if future.exception() is not None:
+                raise future.exception()
+
+    def acquire(self, timeout=None):
+        """
+        Leases a healthy container, creating one if the pool isn't full yet.
+
+        Blocks until a container is free.
+
+        Returns:
+            str: The container id
+        Raises:
+            TimeoutError: If no container became free within `timeout` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                while not self._idle and (
+                    len(self._leased) + self._pending >= self.size
+                ):
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No code interpreter container became free")
+                    self._condition.wait(remaining)
+                record = self._idle.popleft() if self._idle else None
+                self._pending += 1
+
+            try:
+                now = time.monotonic()
+                if record is not None and self._needs_recycling(record, now):
+                    self._recycle(record)
+                    record = None
+                elif (
+                    record is not None
+                    and now - record["checked"] > self.health_check_interval
+                    and not self._is_healthy(record)
+                ):
+                    self._recycle(record)
+                    record = None
+                if record is None:
+                    record = self._create()
+            except Exception:
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify()
+                raise
+
+            with self._condition:
+                self._pending -= 1
+                record["uses"] += 1
+                self.lease_count += 1
+                self._leased[record["id"]] = record
+            return record["id"]
+
+    def _recycle(self, record):
+        with self._condition:
+            self.recycled_count += 1
+        self._delete(record)
+
+    def release(self, container_id, failed=False):
+        """
+        Returns a leased container to the pool.
+
+        Args:
+            container_id (str): The container to return.
+            failed (bool): Whether the request using it failed, so it is health checked
+                before it is leased again.
+        """
+        with self._condition:
+            record = self._leased.pop(container_id)
+            if failed:
+                record["checked"] = float("-inf")
+            else:
+                record["checked"] = time.monotonic()
+            self._idle.append(record)
+            self._condition.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Leases a container for the duration of a `with` block.
+        """
+        container_id = self.acquire(timeout)
+        failed = False
+        try:
+            yield container_id
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.release(container_id, failed)
+
+    def close(self):
+        """
+        Deletes the idle containers. Leased containers are left to expire.
+        """
+        with self._condition:
+            records = list(self._idle)
+            self._idle.clear()
+        for record in records:
+            self._delete(record)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "created": self.created_count,
+                "recycled": self.recycled_count,
+                "leases": self.lease_count,
+            }
+
+
+_container_pools = {}
+_container_pools_lock = threading.Lock()
+
+
+def get_container_pool(container_client, size=DEFAULT_CONTAINER_POOL_SIZE):
+    """
+    The process-wide pool for a client, created and filled on first use.
+
+    Its containers are reused by every run in the process and deleted at exit.
+    """
+    with _container_pools_lock:
+        pool = _container_pools.get(id(container_client))
+        if pool is None:
+            pool = ContainerPool(container_client, size)
+            _container_pools[id(container_client)] = pool
+            atexit.register(pool.close)
+    pool.fill()
+    return pool
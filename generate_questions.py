@@ -1,4 +1,5 @@
 from answers import *
+from amortization import AmortizationSchedule, calculate_prepayment_batch
 import json
 
 
@@ -60,6 +61,9 @@ def get_questions_list(
     )
     question_list.append(question_6)
 
+    question_7 = get_question_7(principal_1, interest_rate_1, term_1, extra_amount)
+    question_list.append(question_7)
+
     return question_list
 
 
@@ -91,7 +95,7 @@ def get_question_1(principal, interest_rate, term):
     return question
 
 
-def get_question_2(principal, interest_rate, term, years_elapsed):
+def get_question_2(principal, interest_rate, term, years_elapsed, schedule=None):
     """
     Generates a loan balance question and its answer after a specified number of years.
     Args:
@@ -99,6 +103,7 @@ def get_question_2(principal, interest_rate, term, years_elapsed):
         interest_rate (float): The annual interest rate as a percentage (e.g., 5.5 for 5.5%).
         term (int): The total term of the loan in years.
         years_elapsed (int): The number of years that have passed since the loan started.
+        schedule (AmortizationSchedule, optional): A prebuilt schedule for this loan to read the answer from.
     Returns:
         dict: A dictionary containing:
             - "role": The role of the message sender (always "user").
@@ -106,7 +111,12 @@ def get_question_2(principal, interest_rate, term, years_elapsed):
             - "answer": The remaining loan balance after the specified years, rounded to two decimal places.
     """
 
-    answer = calculate_remaining_balance(principal, interest_rate, term, years_elapsed)
+    if schedule is not None:
+        answer = schedule.remaining_balance(years_elapsed)
+    else:
+        answer = calculate_remaining_balance(
+            principal, interest_rate, term, years_elapsed
+        )
     question = {
         "role": "user",
         "content": (
@@ -118,7 +128,7 @@ def get_question_2(principal, interest_rate, term, years_elapsed):
     return question
 
 
-def get_question_3(principal, interest_rate, term, month_number):
+def get_question_3(principal, interest_rate, term, month_number, schedule=None):
     """
     Generates a question dictionary about the interest portion of a specific monthly loan payment.
     Args:
@@ -126,12 +136,16 @@ def get_question_3(principal, interest_rate, term, month_number):
         interest_rate (float): The annual interest rate as a percentage (e.g., 5.5 for 5.5%).
         term (int): The term of the loan in years.
         month_number (int): The month number for which to calculate the interest portion of the payment.
+        schedule (AmortizationSchedule, optional): A prebuilt schedule for this loan to read the answer from.
     Returns:
         dict: A dictionary containing the question prompt and the correct answer (interest portion of the specified payment).
     """
-    (answer_1, answer_2) = calculate_interest_principal_payment(
-        principal, interest_rate, term, month_number
-    )
+    if schedule is not None:
+        answer_1, answer_2 = schedule.interest_principal_payment(month_number)
+    else:
+        answer_1, answer_2 = calculate_interest_principal_payment(
+            principal, interest_rate, term, month_number
+        )
     question = {
         "role": "user",
         "content": (
@@ -143,6 +157,32 @@ def get_question_3(principal, interest_rate, term, month_number):
     return question
 
 
+def get_schedule_questions(
+    principal, interest_rate, term, years_elapsed, month_numbers
+):
+    """
+    Generates many question 2 and question 3 variants for the same loan from a single amortization schedule.
+    Args:
+        principal (float): The initial amount of the loan.
+        interest_rate (float): The annual interest rate as a percentage (e.g., 5.5 for 5.5%).
+        term (int): The term of the loan in years.
+        years_elapsed (list): The years elapsed to ask remaining balance questions (question 2) about.
+        month_numbers (list): The months to ask interest portion questions (question 3) about.
+    Returns:
+        list: The question 2 variants followed by the question 3 variants.
+    """
+    schedule = AmortizationSchedule(principal, interest_rate, term)
+    question_list = [
+        get_question_2(principal, interest_rate, term, years, schedule=schedule)
+        for years in years_elapsed
+    ]
+    question_list.extend(
+        get_question_3(principal, interest_rate, term, month, schedule=schedule)
+        for month in month_numbers
+    )
+    return question_list
+
+
 def get_question_4(principal_1, interest_rate_1, principal_2, interest_rate_2, term):
     """
     Calculates the incremental interest rate (cost of borrowing) on an additional amount when increasing loan size and rate.
@@ -236,7 +276,7 @@ def get_question_6(
             - "content": The generated question string describing the refinancing scenario.
             - "answer": The calculated NPV savings (or loss, as a negative number) rounded to two decimal places.
     """
-    answer = calculate_refinance_npv(
+    answer = calculate_refinance_npv_closed_form(
         principal,
         term_1,
         rate_1,
@@ -262,3 +302,33 @@ def get_question_6(
         "answer": round(answer, 2),
     }
     return question
+
+
+def get_question_7(principal, interest_rate, term, extra_amount):
+    """
+    Generates a question about the interest saved by paying a fixed extra amount every month.
+    Args:
+        principal (float): The initial amount of the loan.
+        interest_rate (float): The annual interest rate as a percentage (e.g., 5.5 for 5.5%).
+        term (int): The term of the loan in years.
+        extra_amount (float): The extra amount paid on top of the regular payment every month.
+    Returns:
+        dict: A dictionary containing:
+            - "role": The role of the message sender ("user").
+            - "content": The generated question string.
+            - "answer": The total interest saved over the life of the loan, rounded to two decimal places.
+    """
+    prepayment = calculate_prepayment_batch(
+        principal, interest_rate, term, extra_monthly=extra_amount
+    )
+    answer = float(prepayment["interest_saved"])
+    question = {
+        "role": "user",
+        "content": (
+            f"I have a ${principal:,.0f} loan at {interest_rate:.2f}% interest for {term} years with monthly payments "
+            f"that would fully pay it off. If I pay an extra ${extra_amount:,.0f} on top of every monthly payment "
+            f"until the loan is paid off, how much total interest will I save?"
+        ),
+        "answer": round(answer, 2),
+    }
+    return question
@@ -0,0 +1,256 @@
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+
+_call_loop = None
+_call_loop_lock = threading.Lock()
+
+
+def _get_call_loop():
+    """
+    The event loop the API calls run on, in a background thread started on first use.
+
+    Calls are asyncio tasks rather than threads, so a call that is given up on is
+    cancelled and its connection closed instead of running on to the end. There is no
+    thread pool to size: the number of calls in flight is bounded by the callers and by
+    each provider's connection pool, which is sized from its configured concurrency.
+    """
+    global _call_loop
+    with _call_loop_lock:
+        if _call_loop is None:
+            _call_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_call_loop.run_forever, name="api-calls", daemon=True
+            ).start()
+        return _call_loop
+
+
+class _Call:
+    """
+    One copy of a call, running as a task on the call loop.
+
+    The timeout is counted from when the call starts running, not from when it was
+    submitted. `future` holds the result, or TimeoutError if the call ran too long.
+    """
+
+    _pending = object()
+
+    def __init__(self, function, kwargs, timeout_seconds):
+        self._lock = threading.Lock()
+        self._result = self._pending
+        self._on_lost = None
+        self.future = asyncio.run_coroutine_threadsafe(
+            self._run(function, kwargs, timeout_seconds), _get_call_loop()
+        )
+
+    async def _run(self, function, kwargs, timeout_seconds):
+        result = await asyncio.wait_for(function(**kwargs), timeout_seconds)
+        with self._lock:
+            self._result = result
+            on_lost = self._on_lost
+        if on_lost is not None:
+            on_lost(result)
+        return result
+
+    def cancel(self, on_lost=None):
+        """
+        Cancels the call. If it returns anyway, because it finished before the
+        cancellation reached it, its result is passed to `on_lost`.
+        """
+        with self._lock:
+            self._on_lost = on_lost
+            result = self._result
+        if on_lost is not None and result is not self._pending:
+            on_lost(result)
+        self.future.cancel()
+
+
+class Hedger:
+    """
+    Sends a duplicate of a request once it has run longer than most requests of the run.
+
+    Latencies of finished requests are tracked in a sliding window; once `min_samples` are
+    in, a request still running after the `percentile` latency gets a hedge (a second copy).
+    Whichever copy answers first wins and the other is cancelled. Hedges are limited to
+    `max_extra_fraction` of the requests sent, which caps the extra spend.
+
+    The original request of a hedge that wins is cancelled, so the time it would have taken
+    is not known; `stats()["time_saved_seconds"]` estimates it from the recorded latencies
+    longer than the hedged request's.
+
+    Args:
+        percentile (float): Latency percentile after which a hedge is sent.
+        min_samples (int): Finished requests needed before hedging starts.
+        max_extra_fraction (float): Cap on hedges as a fraction of requests sent.
+        window (int): Number of recent latencies the percentile is computed over.
+        min_delay (float): Never hedge requests younger than this, in seconds.
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        min_samples=20,
+        max_extra_fraction=0.05,
+        window=1000,
+        min_delay=1.0,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_fraction = max_extra_fraction
+        self.min_delay = min_delay
+
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.time_saved = 0.0
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self):
+        """
+        Returns:
+            float or None: Seconds after which a request should be hedged, or None while
+            there are too few samples
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = np.fromiter(self._latencies, dtype=float)
+        return max(self.min_delay, float(np.percentile(latencies, self.percentile)))
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def try_hedge(self, acquire=None):
+        """
+        Takes budget for one hedge.
+
+        Args:
+            acquire (callable, optional): Takes the hedge's share of another budget, such as
+                the model's rate limiter, without waiting; returns whether it could
+
+        Returns:
+            bool: Whether the hedge may be sent
+        """
+        with self._lock:
+            if self.hedges_fired + 1 > self.max_extra_fraction * self.requests:
+                return False
+            if acquire is not None and not acquire():
+                return False
+            self.hedges_fired += 1
+            return True
+
+    def record_hedge_win(self, elapsed):
+        """
+        Counts a hedge that answered first, `elapsed` seconds after the original was sent.
+        """
+        with self._lock:
+            self.hedges_won += 1
+            slower = [latency for latency in self._latencies if latency > elapsed]
+            if slower:
+                self.time_saved += sum(slower) / len(slower) - elapsed
+
+    def stats(self):
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges_fired": self.hedges_fired,
+                "hedges_won": self.hedges_won,
+                "time_saved_seconds": self.time_saved,
+                "hedge_delay_seconds": delay,
+            }
+
+
+def call_with_hedging(
+    function, kwargs, timeout_seconds, hedger=None, acquire_hedge=None, on_loser=None
+):
+    """
+    Runs the coroutine function `function(**kwargs)` on the call loop, hedging it if it
+    runs long.
+
+    Without a hedger this is a plain call with a timeout. Every copy of the call has its
+    own `timeout_seconds`, counted from when it starts; a copy that is no longer needed is
+    cancelled, which closes its connection.
+
+    Args:
+        acquire_hedge (callable, optional): Takes rate limiter budget for a hedge without
+            waiting; the hedge is only sent if it returns True
+        on_loser (callable, optional): Called with the result of the losing copy if it
+            finished anyway, so its usage can be recorded
+
+    Returns:
+        The result of whichever call finished first
+
+    Raises:
+        concurrent.futures.TimeoutError: If no call finished within `timeout_seconds`
+    """
+    start_time = time.monotonic()
+    primary = _Call(function, kwargs, timeout_seconds)
+    hedge = None
+    try:
+        if hedger is not None:
+            hedger.record_request()
+        delay = hedger.hedge_delay() if hedger is not None else None
+
+        if delay is None or delay >= timeout_seconds:
+            result = primary.future.result()
+            if hedger is not None:
+                hedger.record_latency(time.monotonic() - start_time)
+            return result
+
+        done, _ = concurrent.futures.wait([primary.future], timeout=delay)
+        if done or not hedger.try_hedge(acquire_hedge):
+            result = primary.future.result()
+            hedger.record_latency(time.monotonic() - start_time)
+            return result
+
+        hedge = _Call(function, kwargs, timeout_seconds)
+        pending = {primary.future, hedge.future}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            winner = next(
+                (future for future in done if future.exception() is None), None
+            )
+            if winner is None:
+                error = error or next(iter(done)).exception()
+                continue
+            elapsed = time.monotonic() - start_time
+            hedger.record_latency(elapsed)
+            loser = primary if winner is hedge.future else hedge
+            loser.cancel(on_loser)
+            if winner is hedge.future:
+                hedger.record_hedge_win(elapsed)
+            return winner.result()
+        raise error
+    finally:
+        primary.future.cancel()
+        if hedge is not None:
+            hedge.future.cancel()
+
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(ai_model):
+    """
+    The shared hedger for a model, so its latency percentile is learned across the run.
+    """
+    model_name = getattr(ai_model, "value", ai_model)
+    with _hedgers_lock:
+        if model_name not in _hedgers:
+            _hedgers[model_name] = Hedger()
+        return _hedgers[model_name]
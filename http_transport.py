@@ -0,0 +1,144 @@
+import importlib.util
+import time
+
+import httpx
+import openai
+
+from runner_metrics import runner_metrics
+
+# HTTP/2 needs the optional `h2` package (`pip install -r requirements-http2.txt`).
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# In-flight requests a connection pool is sized for until a runner asks for more with
+# `Provider.ensure_concurrency`.
+DEFAULT_HTTP_CONCURRENCY = 10
+
+# Extra connections on top of the request slots, for hedged duplicates, container
+# management and abandoned requests that haven't returned yet.
+CONNECTION_HEADROOM = 0.25
+
+
+def pool_limits(concurrency, keepalive_expiry=30.0):
+    """
+    Connection limits for a client serving `concurrency` requests at once.
+
+    Every connection may be kept alive, so once the pool is warm no request pays for a
+    new TCP and TLS handshake. The default limits keep only 100 idle connections, for 5s.
+    """
+    max_connections = concurrency + max(10, int(concurrency * CONNECTION_HEADROOM))
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+def _use_http2(http2):
+    if http2 and not HTTP2_AVAILABLE:
+        print("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        return False
+    return http2
+
+
+class _PoolWaitTrace:
+    """
+    httpcore trace callback that records how long a request waited for a connection.
+
+    The wait ends when the pool opens a new connection for the request or starts sending
+    it on an existing one, whichever trace event comes first.
+    """
+
+    def __init__(self, host, inner=None):
+        self.host = host
+        self.inner = inner
+        self.start = time.monotonic()
+        self.recorded = False
+
+    def record(self, name):
+        if name == "connection.connect_tcp.started":
+            runner_metrics.record_connection_opened(self.host)
+        if not self.recorded and (
+            name == "connection.connect_tcp.started"
+            or name.endswith("send_request_headers.started")
+        ):
+            self.recorded = True
+            runner_metrics.record_pool_wait(self.host, time.monotonic() - self.start)
+
+    def __call__(self, name, info):
+        self.record(name)
+        if self.inner is not None:
+            self.inner(name, info)
+
+
+class _AsyncPoolWaitTrace(_PoolWaitTrace):
+    async def __call__(self, name, info):
+        self.record(name)
+        if self.inner is not None:
+            await self.inner(name, info)
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """
+    Transport that records connection pool waits and new connections in `runner_metrics`.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    def handle_request(self, request):
+        request.extensions["trace"] = _PoolWaitTrace(
+            request.url.host, request.extensions.get("trace")
+        )
+        return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    `InstrumentedTransport` for the async client.
+    """
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        request.extensions["trace"] = _AsyncPoolWaitTrace(
+            request.url.host, request.extensions.get("trace")
+        )
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def build_http_client(
+    concurrency=DEFAULT_HTTP_CONCURRENCY, http2=False, keepalive_expiry=30.0
+):
+    """
+    The httpx client for `OpenAI(http_client=...)`, with its pool sized for `concurrency`.
+
+    Args:
+        concurrency (int): Requests expected in flight at once across all models.
+        http2 (bool): Multiplex requests over HTTP/2 connections, if `h2` is installed.
+        keepalive_expiry (float): Seconds an idle connection is kept open.
+    """
+    transport = httpx.HTTPTransport(
+        limits=pool_limits(concurrency, keepalive_expiry), http2=_use_http2(http2)
+    )
+    return openai.DefaultHttpxClient(transport=InstrumentedTransport(transport))
+
+
+def build_async_http_client(
+    concurrency=DEFAULT_HTTP_CONCURRENCY, http2=False, keepalive_expiry=30.0
+):
+    """
+    `build_http_client` for `AsyncOpenAI`.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        limits=pool_limits(concurrency, keepalive_expiry), http2=_use_http2(http2)
+    )
+    return openai.DefaultAsyncHttpxClient(
+        transport=AsyncInstrumentedTransport(transport)
+    )
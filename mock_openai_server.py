@@ -0,0 +1,466 @@
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5 drops some.
+    request_queue_size = 128
+
+
+def default_responder(request_body):
+    """
+    Answers every question with a fixed structured output.
+
+    Returns:
+        dict: The `QuestionOutput` fields to return for the request
+    """
+    return {"final_answer": "0", "explanation": "Mock response."}
+
+
+def default_usage(request_body):
+    """
+    Token usage of a response: about 4 characters per input token and a fixed output size.
+    """
+    characters = len(request_body.get("instructions") or "")
+    for message in request_body.get("input") or request_body.get("messages") or []:
+        characters += len(message.get("content", ""))
+    input_tokens = characters // 4
+    output_tokens = 50
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens,
+    }
+
+
+def constant_latency(seconds):
+    return lambda: seconds
+
+
+def lognormal_latency(median, sigma=0.5):
+    """
+    Latency distribution with a long right tail, like real model responses.
+    """
+    return lambda: random.lognormvariate(0, sigma) * median
+
+
+class MockOpenAIServer:
+    """
+    Local stand-in for the parts of the OpenAI API the runners use, for offline testing.
+
+    Implements `POST /v1/responses` (what `responses.parse` calls), `POST
+    /v1/chat/completions` (for providers without the Responses API), the container
+    endpoints, file upload and download and the batch endpoints. Batches are processed in
+    a background thread `batch_delay` seconds after they are created, and every request in
+    them is answered by `responder`.
+
+    Responses are delayed by a draw from `latency`. A fraction of them can be answered
+    with a 429 and a `Retry-After` header, or left hanging for `hang_seconds`, to exercise
+    the runners' retry and timeout handling. `stats()` counts what was served.
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on; 0 picks a free port.
+        responder (callable): Maps a request body to the `QuestionOutput` fields to return.
+        batch_delay (float): Seconds a batch stays in progress before it completes.
+        latency (callable): Returns the seconds to wait before answering a response request.
+        usage (callable): Maps a request body to the token usage to report.
+        rate_limit_probability (float): Fraction of response requests answered with a 429.
+        retry_after (float): `Retry-After` seconds sent with a 429.
+        hang_probability (float): Fraction of response requests left hanging.
+        hang_seconds (float): How long a hanging request hangs before it is answered.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        responder=default_responder,
+        batch_delay=0.0,
+        latency=constant_latency(0.0),
+        usage=default_usage,
+        rate_limit_probability=0.0,
+        retry_after=1.0,
+        hang_probability=0.0,
+        hang_seconds=600.0,
+    ):
+        self.responder = responder
+        self.batch_delay = batch_delay
+        self.latency = latency
+        self.usage = usage
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.hang_probability = hang_probability
+        self.hang_seconds = hang_seconds
+        self.files = {}
+        self.batches = {}
+        self.containers = {}
+        self.request_counts = {}
+        self.responses_served = 0
+        self.rate_limited = 0
+        self.hung = 0
+        self.containers_created = 0
+        self.simulated_latency = 0.0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._server = _MockHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _new_id(self, prefix):
+        return f"{prefix}_{next(self._ids):06d}{uuid.uuid4().hex[:8]}"
+
+    def stats(self):
+        with self._lock:
+            return {
+                "responses_served": self.responses_served,
+                "rate_limited": self.rate_limited,
+                "hung": self.hung,
+                "simulated_latency_seconds": self.simulated_latency,
+                "containers_created": self.containers_created,
+                "containers_live": len(self.containers),
+            }
+
+    def make_response_body(self, request_body, usage=None):
+        """
+        Builds a Responses API object whose output text is the responder's structured answer.
+        """
+        output = json.dumps(self.responder(request_body))
+        usage = usage or self.usage(request_body)
+        return {
+            "id": self._new_id("resp"),
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": request_body.get("model"),
+            "output": [
+                {
+                    "id": self._new_id("msg"),
+                    "type": "message",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {"type": "output_text", "text": output, "annotations": []}
+                    ],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": request_body.get("tools", []),
+            "text": request_body.get("text", {"format": {"type": "text"}}),
+            "usage": usage,
+        }
+
+    def make_chat_completion_body(self, request_body, usage=None):
+        """
+        Builds a chat completion whose message is the responder's answer as a JSON object.
+        """
+        usage = usage or self.usage(request_body)
+        return {
+            "id": self._new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_body.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": json.dumps(self.responder(request_body)),
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": usage["input_tokens"],
+                "completion_tokens": usage["output_tokens"],
+                "total_tokens": usage["total_tokens"],
+                "prompt_tokens_details": {
+                    "cached_tokens": (usage.get("input_tokens_details") or {}).get(
+                        "cached_tokens", 0
+                    )
+                },
+            },
+        }
+
+    def _respond(self, request_body, make_body=None):
+        """
+        Handles a response or chat completion request; `make_body` builds the reply
+        (`make_response_body` by default).
+
+        Returns:
+            tuple: (status, body, headers) to send
+        """
+        roll = random.random()
+        if roll < self.rate_limit_probability:
+            with self._lock:
+                self.rate_limited += 1
+            return (
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached for requests (429)",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+                {"retry-after": str(self.retry_after)},
+            )
+
+        if roll < self.rate_limit_probability + self.hang_probability:
+            with self._lock:
+                self.hung += 1
+            delay = self.hang_seconds
+        else:
+            delay = self.latency()
+        time.sleep(delay)
+        with self._lock:
+            self.responses_served += 1
+            self.simulated_latency += delay
+        return 200, (make_body or self.make_response_body)(request_body), None
+
+    def _create_container(self, request_body):
+        container = {
+            "id": self._new_id("cntr"),
+            "object": "container",
+            "created_at": int(time.time()),
+            "status": "running",
+            "name": request_body.get("name", ""),
+            "expires_after": {"anchor": "last_active_at", "minutes": 20},
+        }
+        with self._lock:
+            self.containers[container["id"]] = container
+            self.containers_created += 1
+        return container
+
+    def _create_file(self, filename, purpose, content):
+        file_object = {
+            "id": self._new_id("file"),
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self._lock:
+            self.files[file_object["id"]] = (file_object, content)
+        return file_object
+
+    def _create_batch(self, request_body):
+        batch = {
+            "id": self._new_id("batch"),
+            "object": "batch",
+            "endpoint": request_body["endpoint"],
+            "input_file_id": request_body["input_file_id"],
+            "completion_window": request_body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        threading.Timer(self.batch_delay, self._run_batch, (batch["id"],)).start()
+        return batch
+
+    def _run_batch(self, batch_id):
+        with self._lock:
+            batch = self.batches[batch_id]
+            _, content = self.files[batch["input_file_id"]]
+
+        output_lines = []
+        for line in content.decode().splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            output_lines.append(
+                json.dumps(
+                    {
+                        "id": self._new_id("batch_req"),
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "request_id": self._new_id("req"),
+                            "body": self.make_response_body(request["body"]),
+                        },
+                        "error": None,
+                    }
+                )
+            )
+
+        output_file = self._create_file(
+            f"{batch_id}_output.jsonl",
+            "batch_output",
+            ("\n".join(output_lines) + "\n").encode(),
+        )
+        with self._lock:
+            batch.update(
+                status="completed",
+                output_file_id=output_file["id"],
+                completed_at=int(time.time()),
+                request_counts={
+                    "total": len(output_lines),
+                    "completed": len(output_lines),
+                    "failed": 0,
+                },
+            )
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, Nagle's algorithm
+            # holds the body back for a delayed ACK (~40ms) on every kept-alive connection.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _read_body(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return self.rfile.read(length)
+
+            def _not_found(self):
+                self._send_json(404, {"error": {"message": f"No route {self.path}"}})
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                with server._lock:
+                    server.request_counts[self.path] = (
+                        server.request_counts.get(self.path, 0) + 1
+                    )
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    with server._lock:
+                        batch = server.batches.get(parts[2])
+                        batch = dict(batch) if batch else None
+                    if batch is None:
+                        return self._not_found()
+                    return self._send_json(200, batch)
+                if parts[:2] == ["v1", "containers"] and len(parts) == 3:
+                    with server._lock:
+                        container = server.containers.get(parts[2])
+                        container = dict(container) if container else None
+                    if container is None:
+                        return self._not_found()
+                    return self._send_json(200, container)
+                if parts[:2] == ["v1", "files"] and len(parts) == 4:
+                    with server._lock:
+                        entry = server.files.get(parts[2])
+                    if entry is None:
+                        return self._not_found()
+                    content = entry[1]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                    return
+                self._not_found()
+
+            def do_POST(self):
+                path = self.path.split("?")[0].rstrip("/")
+                body = self._read_body()
+                if path == "/v1/files":
+                    message = BytesParser(policy=HTTP).parsebytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                        + body
+                    )
+                    fields = {
+                        part.get_param("name", header="content-disposition"): part
+                        for part in message.iter_parts()
+                    }
+                    file_part = fields["file"]
+                    return self._send_json(
+                        200,
+                        server._create_file(
+                            file_part.get_filename() or "upload.jsonl",
+                            fields["purpose"].get_content().strip(),
+                            file_part.get_payload(decode=True),
+                        ),
+                    )
+                if path == "/v1/batches":
+                    return self._send_json(200, server._create_batch(json.loads(body)))
+                if path == "/v1/responses":
+                    return self._send_json(*server._respond(json.loads(body)))
+                if path == "/v1/chat/completions":
+                    return self._send_json(
+                        *server._respond(
+                            json.loads(body), server.make_chat_completion_body
+                        )
+                    )
+                if path == "/v1/containers":
+                    return self._send_json(
+                        200, server._create_container(json.loads(body or b"{}"))
+                    )
+                self._not_found()
+
+            def do_DELETE(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:2] == ["v1", "containers"] and len(parts) == 3:
+                    with server._lock:
+                        container = server.containers.pop(parts[2], None)
+                    if container is None:
+                        return self._not_found()
+                    return self._send_json(
+                        200,
+                        {
+                            "id": parts[2],
+                            "object": "container.deleted",
+                            "deleted": True,
+                        },
+                    )
+                self._not_found()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with MockOpenAIServer(port=8765) as mock_server:
+        print(f"Mock OpenAI server listening on {mock_server.base_url}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,208 @@
+from generate_questions import get_questions_list
+from question_dataset import (
+    QUESTION_SCHEMA,
+    SCENARIO_PARAMETERS,
+    dataset_format,
+    iter_record_batches,
+    write_question_dataset,
+)
+import concurrent.futures
+import math
+import os
+import shutil
+import time
+
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+
+class ScenarioGrid:
+    """
+    Lazy, indexable cartesian product of `get_questions_list` parameter values.
+
+    Scenario `index` is decoded from the index alone, with the last parameter varying
+    fastest, so any process can build any contiguous range of the grid without the rest.
+
+    Args:
+        **parameter_values: A list of values for every `get_questions_list` parameter.
+    """
+
+    def __init__(self, **parameter_values):
+        missing = set(SCENARIO_PARAMETERS) - set(parameter_values)
+        if missing:
+            raise ValueError(f"No values given for {sorted(missing)}")
+        self.parameter_values = {
+            name: list(parameter_values[name]) for name in SCENARIO_PARAMETERS
+        }
+
+    def __len__(self):
+        return math.prod(len(values) for values in self.parameter_values.values())
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Scenario {index} is outside of a {len(self)} grid")
+        scenario = {}
+        for name in reversed(SCENARIO_PARAMETERS):
+            values = self.parameter_values[name]
+            index, value_index = divmod(index, len(values))
+            scenario[name] = values[value_index]
+        return {name: scenario[name] for name in SCENARIO_PARAMETERS}
+
+
+def shard_ranges(num_scenarios, num_shards):
+    """
+    Splits [0, num_scenarios) into `num_shards` contiguous (start, stop) ranges whose sizes
+    differ by at most one. The split depends only on the two counts, so it is the same on
+    every machine and every run.
+    """
+    num_shards = max(1, min(num_shards, num_scenarios))
+    size, remainder = divmod(num_scenarios, num_shards)
+    ranges = []
+    start = 0
+    for shard_index in range(num_shards):
+        stop = start + size + (shard_index < remainder)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _shard(scenarios, start, stop):
+    """
+    What a worker is sent to build scenarios [start, stop), as (scenarios, index of the
+    first one). A `ScenarioGrid` holds only the parameter values and is sent whole; other
+    sequences are sliced, so each worker gets only its own scenarios.
+    """
+    if isinstance(scenarios, ScenarioGrid):
+        return scenarios, 0
+    return scenarios[start:stop], start
+
+
+def _generate_shard(scenarios, offset, start, stop, path, batch_size, format):
+    return write_question_dataset(
+        path,
+        (scenarios[index - offset] for index in range(start, stop)),
+        batch_size,
+        format,
+        first_scenario_id=start,
+    )
+
+
+def _generate_questions_range(scenarios, offset, start, stop):
+    return [
+        get_questions_list(**scenarios[index - offset]) for index in range(start, stop)
+    ]
+
+
+def merge_question_chunks(chunk_paths, path, format=None, batch_size=50000):
+    """
+    Concatenates question dataset files into one, in the order given, batch by batch.
+
+    Returns:
+        int: The number of questions written.
+    """
+    if dataset_format(path, format) == "parquet":
+        writer = pq.ParquetWriter(path, QUESTION_SCHEMA, compression="zstd")
+    else:
+        writer = ipc.new_file(path, QUESTION_SCHEMA)
+
+    num_questions = 0
+    with writer:
+        for chunk_path in chunk_paths:
+            for batch in iter_record_batches(chunk_path, batch_size, format):
+                writer.write_batch(batch)
+                num_questions += batch.num_rows
+    return num_questions
+
+
+def generate_question_dataset(
+    path,
+    scenarios,
+    num_workers=None,
+    num_shards=None,
+    batch_size=50000,
+    format=None,
+    keep_chunks=False,
+):
+    """
+    `write_question_dataset` across processes: every shard of the scenarios is generated
+    and written to its own chunk file by a worker, then the chunks are merged in shard
+    order into `path`.
+
+    Shards are contiguous ranges of scenario indexes from `shard_ranges` and keep their
+    global `scenario_id`s, so the merged file is identical to a single-process
+    `write_question_dataset` of the same scenarios.
+
+    Args:
+        path (str): Output file, as for `write_question_dataset`.
+        scenarios: Indexable scenarios (a `ScenarioGrid` or a list of
+            `get_questions_list` keyword argument dicts). A grid is sent to every worker;
+            a list is sliced, so each worker receives only its shard.
+        num_workers (int, optional): Worker processes; defaults to the number of CPUs.
+        num_shards (int, optional): Chunks to split the work into; defaults to four per
+            worker, so a slow shard doesn't leave the other workers idle.
+        batch_size (int): Number of question rows per written batch.
+        format (str, optional): "parquet" or "arrow", overriding the file extension.
+        keep_chunks (bool): Keep the chunk files (in `<path>.chunks/`) after merging.
+
+    Returns:
+        int: The number of questions written.
+    """
+    format = dataset_format(path, format)
+    num_workers = num_workers or os.cpu_count() or 1
+    ranges = shard_ranges(len(scenarios), num_shards or num_workers * 4)
+    chunk_directory = f"{path}.chunks"
+    os.makedirs(chunk_directory, exist_ok=True)
+    chunk_paths = [
+        os.path.join(chunk_directory, f"shard-{shard_index:05d}.{format}")
+        for shard_index in range(len(ranges))
+    ]
+
+    start_time = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                _generate_shard,
+                *_shard(scenarios, start, stop),
+                start,
+                stop,
+                chunk_path,
+                batch_size,
+                format,
+            )
+            for (start, stop), chunk_path in zip(ranges, chunk_paths)
+        ]
+        for future in futures:
+            future.result()
+    generation_time = time.perf_counter() - start_time
+
+    num_questions = merge_question_chunks(chunk_paths, path, format, batch_size)
+    if not keep_chunks:
+        shutil.rmtree(chunk_directory)
+    print(
+        f"Generated {num_questions} questions from {len(scenarios)} scenarios in "
+        f"{generation_time:.2f}s ({len(ranges)} shards, {num_workers} workers)"
+    )
+    return num_questions
+
+
+def generate_questions_parallel(scenarios, num_workers=None, num_shards=None):
+    """
+    `get_questions_list` for every scenario, across processes, in scenario order.
+
+    Returns:
+        list: One question list per scenario.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    ranges = shard_ranges(len(scenarios), num_shards or num_workers * 4)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                _generate_questions_range, *_shard(scenarios, start, stop), start, stop
+            )
+            for start, stop in ranges
+        ]
+        return [
+            question_list for future in futures for question_list in future.result()
+        ]
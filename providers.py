@@ -0,0 +1,246 @@
+from openai import AsyncOpenAI, OpenAI
+from ai_models import *
+from http_transport import (
+    DEFAULT_HTTP_CONCURRENCY,
+    build_async_http_client,
+    build_http_client,
+)
+import asyncio
+import os
+import threading
+import weakref
+
+# Appended to the instructions for providers without structured outputs, which are only
+# asked for a JSON object.
+JSON_OUTPUT_INSTRUCTIONS = (
+    "Reply with a JSON object with two string fields: "
+    '"final_answer" (the plain number) and "explanation".'
+)
+
+
+class ChatCompletionResponse:
+    """
+    A chat completion wrapped to look like a parsed Responses API result.
+
+    `output_parsed` is the reply validated against the requested output model, and
+    `usage` is the token usage in the Responses API shape, so the runners, the cache and
+    the metrics handle it like any other response.
+    """
+
+    def __init__(self, completion, text_format):
+        self.completion = completion
+        self.output_parsed = text_format.model_validate_json(
+            completion.choices[0].message.content
+        )
+        usage = completion.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if cached_tokens is None:
+            # DeepSeek reports its context cache hits under its own field.
+            cached_tokens = getattr(usage, "prompt_cache_hit_tokens", 0) or 0
+        self.usage = {
+            "input_tokens": usage.prompt_tokens,
+            "input_tokens_details": {"cached_tokens": cached_tokens},
+            "output_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+
+def chat_completion_kwargs(model, input, instructions, text_format, tools=None):
+    """
+    Turns `responses.parse` arguments into `chat.completions.create` arguments.
+    """
+    if tools:
+        raise ValueError(
+            f"{model} is served over chat completions, which has no code interpreter"
+        )
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": instructions + JSON_OUTPUT_INSTRUCTIONS},
+            *input,
+        ],
+        "response_format": {"type": "json_object"},
+    }
+
+
+class Provider:
+    """
+    An OpenAI-compatible API endpoint and the clients the runners use for it.
+
+    Every provider has its own sync and async clients, each with a connection pool sized
+    for `concurrency`, so a sweep over several providers runs them side by side without
+    one provider's requests waiting on another's connections. The runners grow
+    `concurrency` to the request slots they use (`ensure_concurrency`) before sending
+    through the provider, so the pools follow `MODEL_THREADS` and `MODEL_CONCURRENCY`
+    rather than a fixed size. The clients are built on
+    first use, reading the API key from `api_key_env` unless one is configured. Async
+    connections can't be shared between event loops, so each loop gets its own async
+    client.
+
+    Args:
+        name (str): Key in `PROVIDERS`.
+        base_url (str): API endpoint.
+        api_key_env (str): Environment variable holding the API key.
+        concurrency (int): Requests in flight at once across the provider's models; the
+            least the pools are sized for.
+        rate_limits (dict, optional): Budget for the provider's models that have no entry
+            in `MODEL_RATE_LIMITS`, as keyword arguments of `AdaptiveRateLimiter`.
+        api (str): "responses" for the Responses API, or "chat_completions" for providers
+            that only implement chat completions.
+        max_retries (int): The clients' own retry count. Every request the runners send
+            waits on the model's rate limiter, which backs off and retries 429s itself,
+            so by default the clients don't retry on top of it.
+        http2 (bool): Use HTTP/2; needs `pip install -r requirements-http2.txt`,
+            else falls back to HTTP/1.1.
+        keepalive_expiry (float): Seconds idle connections are kept open.
+    """
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        api_key_env,
+        concurrency=DEFAULT_HTTP_CONCURRENCY,
+        rate_limits=None,
+        api="responses",
+        max_retries=0,
+        http2=False,
+        keepalive_expiry=30.0,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        self.api_key = None
+        self.concurrency = concurrency
+        self.rate_limits = rate_limits
+        self.api = api
+        self.max_retries = max_retries
+        self.http2 = http2
+        self.keepalive_expiry = keepalive_expiry
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def configure(self, **options):
+        """
+        Changes any of the constructor arguments (or `api_key`) and rebuilds the clients.
+
+        Requests already in flight finish on the old clients.
+        """
+        with self._lock:
+            for name, value in options.items():
+                if not hasattr(self, name) or name.startswith("_"):
+                    raise TypeError(f"Unknown provider option: {name}")
+                setattr(self, name, value)
+            self._client = None
+            self._async_clients = weakref.WeakKeyDictionary()
+
+    def ensure_concurrency(self, concurrency):
+        """
+        Grows the connection pools to serve `concurrency` requests at once, if they are
+        sized for fewer. Requests already in flight finish on the old clients.
+        """
+        with self._lock:
+            if concurrency <= self.concurrency:
+                return
+            self.concurrency = concurrency
+            self._client = None
+            self._async_clients = weakref.WeakKeyDictionary()
+
+    def _client_options(self):
+        api_key = self.api_key or os.environ.get(self.api_key_env)
+        if not api_key:
+            raise ValueError(
+                f"Set {self.api_key_env} to use models from the {self.name} provider"
+            )
+        return {
+            "api_key": api_key,
+            "base_url": self.base_url,
+            "max_retries": self.max_retries,
+        }
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(
+                    **self._client_options(),
+                    http_client=build_http_client(
+                        self.concurrency, self.http2, self.keepalive_expiry
+                    ),
+                )
+            return self._client
+
+    @property
+    def async_client(self):
+        """
+        The async client of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_clients:
+                self._async_clients[loop] = AsyncOpenAI(
+                    **self._client_options(),
+                    http_client=build_async_http_client(
+                        self.concurrency, self.http2, self.keepalive_expiry
+                    ),
+                )
+            return self._async_clients[loop]
+
+    def parse(self, **kwargs):
+        """
+        Sends `responses.parse` arguments to the provider and returns the parsed response.
+        """
+        if self.api == "chat_completions":
+            completion = self.client.chat.completions.create(
+                **chat_completion_kwargs(**kwargs)
+            )
+            return ChatCompletionResponse(completion, kwargs["text_format"])
+        return self.client.responses.parse(**kwargs)
+
+    async def parse_async(self, **kwargs):
+        """
+        `parse` on the async client.
+        """
+        if self.api == "chat_completions":
+            completion = await self.async_client.chat.completions.create(
+                **chat_completion_kwargs(**kwargs)
+            )
+            return ChatCompletionResponse(completion, kwargs["text_format"])
+        return await self.async_client.responses.parse(**kwargs)
+
+
+PROVIDERS = {
+    "openai": Provider("openai", "https://api.openai.com/v1", "OPENAI_API_KEY"),
+    "deepseek": Provider(
+        "deepseek",
+        "https://api.deepseek.com",
+        "DEEPSEEK_API_KEY",
+        concurrency=50,
+        rate_limits={"requests_per_minute": 1000, "tokens_per_minute": 1000000},
+        api="chat_completions",
+    ),
+}
+
+# Models served by a provider other than OpenAI.
+MODEL_PROVIDERS = {AIModels.DEEPSEEK_CHAT.value: "deepseek"}
+
+DEFAULT_PROVIDER = "openai"
+
+
+def register_provider(provider, models=()):
+    """
+    Adds (or replaces) a provider and routes `models` to it.
+    """
+    PROVIDERS[provider.name] = provider
+    for ai_model in models:
+        MODEL_PROVIDERS[getattr(ai_model, "value", ai_model)] = provider.name
+
+
+def get_provider(ai_model):
+    """
+    The provider serving a model, from `MODEL_PROVIDERS` (OpenAI if it isn't listed).
+    """
+    model_name = getattr(ai_model, "value", ai_model)
+    return PROVIDERS[MODEL_PROVIDERS.get(model_name, DEFAULT_PROVIDER)]
@@ -0,0 +1,161 @@
+from generate_questions import get_questions_list
+import inspect
+import itertools
+import os
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+SCENARIO_PARAMETERS = list(inspect.signature(get_questions_list).parameters)
+
+QUESTION_SCHEMA = pa.schema(
+    [
+        ("scenario_id", pa.int64()),
+        ("question_type", pa.int8()),
+        *(
+            (name, pa.bool_() if name == "out_of_pocket" else pa.float64())
+            for name in SCENARIO_PARAMETERS
+        ),
+        ("role", pa.dictionary(pa.int8(), pa.string())),
+        ("content", pa.string()),
+        ("answer", pa.float64()),
+    ]
+)
+
+
+def dataset_format(path, format=None):
+    """
+    The format of a question dataset file: `format` if given, else "parquet" for a
+    .parquet or .pq extension and "arrow" otherwise.
+    """
+    if format is not None:
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    return "parquet" if extension in (".parquet", ".pq") else "arrow"
+
+
+def _scenario_rows(scenario_id, scenario):
+    """
+    Yields one row per question generated for a `get_questions_list` scenario.
+    """
+    for question_type, question in enumerate(get_questions_list(**scenario), start=1):
+        yield {
+            "scenario_id": scenario_id,
+            "question_type": question_type,
+            **scenario,
+            "role": question["role"],
+            "content": question["content"],
+            "answer": question["answer"],
+        }
+
+
+def write_question_dataset(
+    path, scenarios, batch_size=50000, format=None, first_scenario_id=0
+):
+    """
+    Generates the questions for every scenario and writes them to a columnar file in batches.
+
+    Only `batch_size` rows are held in memory at a time, so suites far larger than RAM can be
+    generated once and shared across runs.
+
+    Args:
+        path (str): Output file. `.parquet` files are written as Parquet, anything else as an
+            Arrow IPC file, which can be memory-mapped without decoding.
+        scenarios (iterable): Dictionaries of `get_questions_list` keyword arguments.
+        batch_size (int): Number of question rows per written batch.
+        format (str, optional): "parquet" or "arrow", overriding the file extension.
+        first_scenario_id (int): `scenario_id` of the first scenario, for files that hold
+            one shard of a larger suite.
+
+    Returns:
+        int: The number of questions written.
+    """
+    format = dataset_format(path, format)
+    rows = itertools.chain.from_iterable(
+        _scenario_rows(scenario_id, scenario)
+        for scenario_id, scenario in enumerate(scenarios, start=first_scenario_id)
+    )
+
+    if format == "parquet":
+        writer = pq.ParquetWriter(path, QUESTION_SCHEMA, compression="zstd")
+    else:
+        writer = ipc.new_file(path, QUESTION_SCHEMA)
+
+    num_questions = 0
+    with writer:
+        while batch := list(itertools.islice(rows, batch_size)):
+            writer.write_batch(
+                pa.RecordBatch.from_pylist(batch, schema=QUESTION_SCHEMA)
+            )
+            num_questions += len(batch)
+    return num_questions
+
+
+def read_question_dataset(path, format=None, columns=None):
+    """
+    Opens a question dataset written by `write_question_dataset`.
+
+    Arrow IPC files are memory-mapped, so the table is backed by the file rather than copied
+    into RAM. Parquet files are compressed, so the whole table (or the selected columns) is
+    decoded into memory; use `iter_question_batches` to stream a large Parquet dataset.
+
+    Args:
+        path (str): The dataset file.
+        format (str, optional): "parquet" or "arrow", overriding the file extension.
+        columns (list, optional): Only read these columns.
+
+    Returns:
+        pa.Table: The questions, one row each.
+    """
+    if dataset_format(path, format) == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def iter_record_batches(path, batch_size, format=None, columns=None):
+    """
+    Yields the record batches of a question dataset without reading the whole file: Parquet
+    is decoded a batch at a time, and Arrow IPC batches are views of the memory map.
+    """
+    if dataset_format(path, format) == "parquet":
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(
+            batch_size=batch_size, columns=columns
+        )
+        return
+
+    for batch in read_question_dataset(path, format, columns).to_batches(
+        max_chunksize=batch_size
+    ):
+        yield batch
+
+
+def iter_question_batches(path, batch_size=1000, format=None, question_types=None):
+    """
+    Yields lists of question dicts ({"role", "content", "answer"}) ready for `run_ai_tests`.
+
+    The file is streamed, so only one batch of questions is decoded at a time.
+
+    Args:
+        path (str): The dataset file.
+        batch_size (int): Maximum number of questions per yielded list.
+        format (str, optional): "parquet" or "arrow", overriding the file extension.
+        question_types (list, optional): Only yield questions of these types (1 through 7).
+    """
+    batches = iter_record_batches(
+        path, batch_size, format, columns=["question_type", "role", "content", "answer"]
+    )
+    for batch in batches:
+        questions = [
+            {
+                "role": row["role"],
+                "content": row["content"],
+                "answer": row["answer"],
+            }
+            for row in batch.to_pylist()
+            if question_types is None or row["question_type"] in question_types
+        ]
+        if questions:
+            yield questions
@@ -0,0 +1,225 @@
+from generate_questions import get_question_1
+import itertools
+
+
+def _id_part(value):
+    """
+    Formats a question parameter for its ID, so equal numbers (2, 2.0, np.float64(2))
+    give the same ID. Whole numbers are written without a decimal point.
+    """
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class QuestionRegistry:
+    """
+    Builds each unique question once and hands out stable IDs for it.
+
+    Combinations that share a (loan_amount, interest_rate, loan_term) across models and
+    `run_code` variants hold the same `question_id` instead of their own copy of the question.
+
+    Args:
+        question_function (callable): Builds the question for (loan_amount, interest_rate, loan_term).
+    """
+
+    def __init__(self, question_function=get_question_1):
+        self.question_function = question_function
+        self.questions = {}
+
+    def register(self, loan_amount, interest_rate, loan_term):
+        """
+        Returns the ID of the question for these parameters, building it if it is new.
+        Parameters that compare equal as numbers share an ID.
+        """
+        question_id = ":".join(
+            [
+                self.question_function.__name__,
+                *map(_id_part, (loan_amount, interest_rate, loan_term)),
+            ]
+        )
+        if question_id not in self.questions:
+            self.questions[question_id] = self.question_function(
+                loan_amount, interest_rate, loan_term
+            )
+        return question_id
+
+    def __getitem__(self, question_id):
+        return self.questions[question_id]
+
+    def __len__(self):
+        return len(self.questions)
+
+    def to_dict(self):
+        return dict(self.questions)
+
+    @classmethod
+    def from_dict(cls, questions, question_function=get_question_1):
+        registry = cls(question_function)
+        registry.questions.update(questions)
+        return registry
+
+
+def expand_results(data):
+    """
+    Turns sweep results into a list of combinations that each carry their own question.
+
+    Accepts both the plain list of combinations and the deduplicated
+    `{"questions": ..., "combinations": ...}` layout written when a `QuestionRegistry` is used.
+    """
+    if isinstance(data, list):
+        return data
+
+    questions = data["questions"]
+    expanded = []
+    for combo in data["combinations"]:
+        combo = dict(combo)
+        question = questions[combo.pop("question_id")]
+        combo["question"] = question
+        if isinstance(combo.get("ai_response"), list):
+            combo["ai_response"] = [
+                (
+                    {
+                        "question": question["content"],
+                        "expected_answer": question["answer"],
+                        **response,
+                    }
+                    if isinstance(response, dict)
+                    else response
+                )
+                for response in combo["ai_response"]
+            ]
+        expanded.append(combo)
+    return expanded
+
+
+class QuestionGrid:
+    """
+    Lazy view over the test grid of models x interest rates x loan amounts x loan terms x run_code.
+
+    Combinations are ordered by model, interest rate, loan amount and loan term (code
+    capable models first, each loan with `run_code` True then False, then the non code
+    models), and each one, including its question, is only built when it is requested.
+    The grid supports `len()`, integer indexing, slicing and sharding without materializing
+    the rest of it.
+
+    Args:
+        interest_rates (list): Annual interest rates (percent) to test.
+        loan_amounts (list): Loan amounts to test.
+        loan_terms (list): Loan terms (years) to test.
+        code_capable_models (list): Models run both with and without the code interpreter.
+        non_code_models (list): Models run without the code interpreter only.
+        question_function (callable): Builds the question for (loan_amount, interest_rate, loan_term).
+        registry (QuestionRegistry, optional): If given, combinations hold a `question_id` into
+            the registry instead of their own copy of the question.
+    """
+
+    def __init__(
+        self,
+        interest_rates,
+        loan_amounts,
+        loan_terms,
+        code_capable_models,
+        non_code_models,
+        question_function=get_question_1,
+        registry=None,
+    ):
+        self.interest_rates = list(interest_rates)
+        self.loan_amounts = list(loan_amounts)
+        self.loan_terms = list(loan_terms)
+        self.code_capable_models = list(code_capable_models)
+        self.non_code_models = list(non_code_models)
+        self.question_function = question_function
+        self.registry = registry
+
+        self._loans_per_model = (
+            len(self.interest_rates) * len(self.loan_amounts) * len(self.loan_terms)
+        )
+        self._num_code_combinations = (
+            len(self.code_capable_models) * self._loans_per_model * 2
+        )
+
+    def __len__(self):
+        return (
+            self._num_code_combinations
+            + len(self.non_code_models) * self._loans_per_model
+        )
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return (self.combination(i) for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Combination {index} is outside of a {len(self)} grid")
+        return self.combination(index)
+
+    def _decode(self, index):
+        """
+        Maps a flat index to (model, interest_rate, loan_amount, loan_term, run_code).
+        """
+        if index < self._num_code_combinations:
+            index, code_flag = divmod(index, 2)
+            models = self.code_capable_models
+            run_code = code_flag == 0
+        else:
+            index -= self._num_code_combinations
+            models = self.non_code_models
+            run_code = False
+
+        index, term_index = divmod(index, len(self.loan_terms))
+        index, amount_index = divmod(index, len(self.loan_amounts))
+        model_index, rate_index = divmod(index, len(self.interest_rates))
+        return (
+            models[model_index],
+            self.interest_rates[rate_index],
+            self.loan_amounts[amount_index],
+            self.loan_terms[term_index],
+            run_code,
+        )
+
+    def combination(self, index):
+        """
+        Builds the combination dict for a flat index into the grid, with either the question
+        itself or its `question_id` in the registry.
+        """
+        model, rate, amount, term, run_code = self._decode(index)
+        combination = {
+            "model": model,
+            "interest_rate": rate,
+            "loan_amount": amount,
+            "loan_term": term,
+            "run_code": run_code,
+        }
+        if self.registry is not None:
+            combination["question_id"] = self.registry.register(amount, rate, term)
+        else:
+            combination["question"] = self.question_function(amount, rate, term)
+        return combination
+
+    def iter_range(self, start, stop):
+        """
+        Yields the combinations with indexes in [start, stop), one at a time.
+        """
+        for index in range(max(start, 0), min(stop, len(self))):
+            yield self.combination(index)
+
+    def shard(self, shard_index, num_shards):
+        """
+        Yields every combination whose index is congruent to `shard_index` modulo `num_shards`,
+        so `num_shards` workers can split the grid without coordinating.
+        """
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"shard_index must be in [0, {num_shards})")
+        for index in range(shard_index, len(self), num_shards):
+            yield self.combination(index)
+
+    def batches(self, batch_size):
+        """
+        Yields lists of up to `batch_size` consecutive combinations.
+        """
+        iterator = iter(self)
+        while batch := list(itertools.islice(iterator, batch_size)):
+            yield batch
@@ -0,0 +1,247 @@
+from ai_models import *
+from providers import get_provider
+import asyncio
+import email.utils
+import threading
+import time
+
+# Default output tokens reserved per request before the real usage is known.
+DEFAULT_OUTPUT_TOKENS = 1000
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`.
+
+    Requests bigger than the bucket are let through once it is full and leave it in
+    debt, so a single large request can never block forever.
+    """
+
+    def __init__(self, rate_per_minute, capacity):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.rate_per_minute / 60
+        )
+        self.updated = now
+
+    def time_until_available(self, amount, now):
+        self.refill(now)
+        needed = min(amount, self.capacity) - self.tokens
+        if needed <= 0:
+            return 0.0
+        return needed * 60 / self.rate_per_minute
+
+    def consume(self, amount):
+        self.tokens -= amount
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide request and token budget for one model.
+
+    Every request waits on a requests-per-minute bucket and a tokens-per-minute bucket
+    before it is sent. When the API answers with a 429 the send rate is cut
+    multiplicatively and, if the response carried a `Retry-After`, all senders pause
+    until it has passed. Successful requests raise the rate back additively (AIMD), so
+    throughput stays near the account limit instead of swinging between idle and throttled.
+
+    Args:
+        requests_per_minute: Request budget for the model
+        tokens_per_minute: Token budget (input plus output) for the model
+        min_rate_fraction: Lowest fraction of the budgets the limiter will throttle down to
+        increase_per_second: Fraction of the budgets regained per second without a 429
+        decrease_factor: Factor the send rate is multiplied by on every 429
+    """
+
+    def __init__(
+        self,
+        requests_per_minute,
+        tokens_per_minute,
+        min_rate_fraction=0.05,
+        increase_per_second=0.02,
+        decrease_factor=0.5,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_rate_fraction = min_rate_fraction
+        self.increase_per_second = increase_per_second
+        self.decrease_factor = decrease_factor
+
+        self.rate_fraction = 1.0
+        self.blocked_until = 0.0
+        self.rate_limited_count = 0
+        self._last_adjustment = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Allow roughly one second of burst on each budget.
+        self._requests = TokenBucket(
+            requests_per_minute, max(1.0, requests_per_minute / 60)
+        )
+        self._tokens = TokenBucket(tokens_per_minute, max(1.0, tokens_per_minute / 60))
+
+    def _set_rate_fraction(self, rate_fraction, now):
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        self.rate_fraction = min(1.0, max(self.min_rate_fraction, rate_fraction))
+        self._requests.rate_per_minute = self.requests_per_minute * self.rate_fraction
+        self._tokens.rate_per_minute = self.tokens_per_minute * self.rate_fraction
+        self._last_adjustment = now
+
+    def _try_acquire(self, estimated_tokens):
+        """
+        Takes budget for one request if it is available.
+
+        Returns:
+            float: 0 if the request may be sent now, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.blocked_until - now,
+                self._requests.time_until_available(1, now),
+                self._tokens.time_until_available(estimated_tokens, now),
+            )
+            if wait > 0:
+                return wait
+            self._requests.consume(1)
+            self._tokens.consume(estimated_tokens)
+            return 0.0
+
+    def acquire(self, estimated_tokens=0):
+        """
+        Blocks until the request fits in the budget.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        start_time = time.monotonic()
+        while (wait := self._try_acquire(estimated_tokens)) > 0:
+            time.sleep(wait)
+        return time.monotonic() - start_time
+
+    def try_acquire(self, estimated_tokens=0):
+        """
+        Takes budget for one request only if it is available now, for requests that are
+        only worth sending without a wait, such as hedges.
+
+        Returns:
+            bool: Whether the budget was taken
+        """
+        return self._try_acquire(estimated_tokens) == 0
+
+    async def acquire_async(self, estimated_tokens=0):
+        """
+        `acquire` for the asyncio runner; waits without blocking the event loop.
+        """
+        start_time = time.monotonic()
+        while (wait := self._try_acquire(estimated_tokens)) > 0:
+            await asyncio.sleep(wait)
+        return time.monotonic() - start_time
+
+    def record_success(self, used_tokens=None, estimated_tokens=0):
+        """
+        Credits back (or charges) the difference between the estimated and actual tokens and
+        additively raises the send rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if used_tokens is not None:
+                self._tokens.consume(used_tokens - estimated_tokens)
+            if self.rate_fraction < 1.0:
+                elapsed = now - self._last_adjustment
+                self._set_rate_fraction(
+                    self.rate_fraction + elapsed * self.increase_per_second, now
+                )
+
+    def record_rate_limit(self, retry_after=None):
+        """
+        Multiplicatively lowers the send rate and pauses every sender for `retry_after` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.rate_limited_count += 1
+            self._set_rate_fraction(self.rate_fraction * self.decrease_factor, now)
+            # Start the pause with empty buckets so senders resume at the new rate, not in a burst.
+            self._requests.tokens = min(self._requests.tokens, 0)
+            self._tokens.tokens = min(self._tokens.tokens, 0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate_fraction": self.rate_fraction,
+                "requests_per_minute": self._requests.rate_per_minute,
+                "tokens_per_minute": self._tokens.rate_per_minute,
+                "rate_limited_count": self.rate_limited_count,
+            }
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(ai_model):
+    """
+    The shared limiter for a model, created on first use from `MODEL_RATE_LIMITS`, or
+    else from its provider's budget.
+    """
+    model_name = ai_model.value if isinstance(ai_model, AIModels) else ai_model
+    with _rate_limiters_lock:
+        if model_name not in _rate_limiters:
+            limits = (
+                MODEL_RATE_LIMITS.get(model_name)
+                or get_provider(model_name).rate_limits
+                or DEFAULT_RATE_LIMITS
+            )
+            _rate_limiters[model_name] = AdaptiveRateLimiter(**limits)
+        return _rate_limiters[model_name]
+
+
+def estimate_tokens(request_kwargs):
+    """
+    Rough token estimate for a request (about 4 characters per token plus the output reserve).
+    """
+    characters = len(request_kwargs.get("instructions") or "")
+    for message in request_kwargs.get("input", []):
+        characters += len(message.get("content", ""))
+    return characters // 4 + DEFAULT_OUTPUT_TOKENS
+
+
+def retry_after_seconds(error):
+    """
+    Reads `retry-after-ms` or `retry-after` from the response attached to an API error.
+
+    Returns:
+        float or None: Seconds to wait, if the server said
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class CachedUsage(dict):
+    """
+    Token usage of a response served from a `ResponseCache`. The tokens were spent by the
+    run that first got the response, so reports count them apart from the tokens spent now.
+    """
+
+
+class ResponseCache:
+    """
+    On-disk cache of parsed model responses, backed by SQLite.
+
+    Responses are keyed by model, instructions, whether tools were enabled, the prompt and
+    the iteration index, and each one is committed as soon as it arrives. A rerun, or a
+    run that crashed halfway, skips every request that already has an answer and only
+    pays for the rest.
+
+    Args:
+        path (str): The SQLite database file. Created if it doesn't exist.
+    """
+
+    def __init__(self, path="ai_response_cache.sqlite3"):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    iteration INTEGER NOT NULL,
+                    final_answer TEXT,
+                    explanation TEXT,
+                    usage TEXT,
+                    created_at REAL NOT NULL
+                )
+                """)
+
+    @staticmethod
+    def make_key(ai_model, instructions, use_tools, prompt, iteration):
+        model_name = getattr(ai_model, "value", ai_model)
+        payload = json.dumps(
+            [model_name, instructions, bool(use_tools), prompt, iteration]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Returns:
+            tuple or None: (final_answer, explanation, usage) if the response is cached
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT final_answer, explanation, usage FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        final_answer, explanation, usage = row
+        return final_answer, explanation, json.loads(usage)
+
+    def put(self, key, ai_model, prompt, iteration, final_answer, explanation, usage):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    getattr(ai_model, "value", ai_model),
+                    prompt,
+                    iteration,
+                    final_answer,
+                    explanation,
+                    json.dumps(usage),
+                    time.time(),
+                ),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -1,5 +1,6 @@
 from generate_questions import *
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+import asyncio
 import dotenv
 import pandas as pd
 from pydantic import BaseModel
@@ -8,17 +9,69 @@ import re
 import json
 from enum import Enum
 from ai_models import *
+from rate_limiter import estimate_tokens, get_rate_limiter, retry_after_seconds
+from response_cache import CachedUsage, ResponseCache
+from container_pool import get_container_pool
+from hedging import call_with_hedging, get_hedger
+from runner_metrics import runner_metrics
+from http_transport import DEFAULT_HTTP_CONCURRENCY
+from providers import PROVIDERS, get_provider
+import logging
 import time
 import random
+import weakref
 
 executor = concurrent.futures.ThreadPoolExecutor()
 
+logger = logging.getLogger(__name__)
+
 dotenv.load_dotenv()
 openai_api_key = dotenv.get_key(".env", "OPENAI_API_KEY")
 
-openai_url = "https://api.openai.com/v1"
+openai_url = PROVIDERS["openai"].base_url
+
+# Maximum number of in-flight requests per model for the asyncio runner.
+DEFAULT_MODEL_CONCURRENCY = 50
+MODEL_CONCURRENCY = {}
+
+
+def configure_client(
+    base_url=openai_url,
+    api_key=openai_api_key,
+    max_retries=0,
+    concurrency=DEFAULT_HTTP_CONCURRENCY,
+    http2=False,
+    keepalive_expiry=30.0,
+):
+    """
+    Rebuilds the OpenAI provider's clients, which every runner shares for OpenAI models.
+
+    Call it to point the runners at another OpenAI-compatible endpoint, such as
+    `MockOpenAIServer`, or to resize the pool for a different concurrency; with no
+    arguments it restores the defaults. Other providers are set up in `providers.py`.
+
+    Args:
+        base_url (str): API endpoint
+        api_key (str): API key; read from the environment if None
+        max_retries (int): The client's own retry count; 0 leaves every 429 to the runners' rate limiter
+        concurrency (int): Least number of requests the connection pools are sized for; the runners grow them to their threads
+        http2 (bool): Use HTTP/2; needs `pip install -r requirements-http2.txt`, else falls back to HTTP/1.1
+        keepalive_expiry (float): Seconds idle connections are kept open
+    """
+    global client
+    provider = PROVIDERS["openai"]
+    provider.configure(
+        base_url=base_url,
+        api_key=api_key,
+        max_retries=max_retries,
+        concurrency=concurrency,
+        http2=http2,
+        keepalive_expiry=keepalive_expiry,
+    )
+    client = provider.client
+
 
-client = OpenAI(api_key=openai_api_key, base_url=openai_url)
+configure_client()
 
 ASSISTANT_INSTRUCTIONS_CODE = (
     "You are trying to help people that are not very knowledgeable about finance answer questions about their mortgage. "
@@ -45,12 +98,337 @@ class QuestionOutput(BaseModel):
     explanation: str
 
 
+def build_messages(question_list, num_iterations):
+    """
+    Pairs every question input with its index across all iterations of the question list.
+    """
+    return [
+        (
+            [{"role": msg["role"], "content": msg["content"]}],
+            idx + iteration * len(question_list),
+        )
+        for iteration in range(num_iterations)
+        for idx, msg in enumerate(question_list)
+    ]
+
+
+def build_request_kwargs(ai_model, message_input, use_code_interpreter, container_id):
+    """
+    Arguments for `responses.parse` for a single question.
+    """
+    return {
+        "model": ai_model,
+        "input": message_input,
+        "tools": (
+            [{"type": "code_interpreter", "container": container_id}]
+            if use_code_interpreter
+            else []
+        ),
+        "instructions": (
+            ASSISTANT_INSTRUCTIONS_CODE
+            if use_code_interpreter
+            else ASSISTANT_INSTRUCTIONS
+        ),
+        "text_format": QuestionOutput,
+    }
+
+
+def is_rate_limit_error(error):
+    if getattr(error, "status_code", None) == 429:
+        return True
+    error_msg = str(error).lower()
+    return "rate limit" in error_msg and "429" in error_msg
+
+
+def rate_limit_pause(error, retry_count, base_delay=5):
+    """
+    How long every sender to the model should pause after a 429: the server's Retry-After
+    if it sent one, otherwise exponential backoff.
+    """
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        return retry_after
+    return base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 1)
+
+
+def usage_to_dict(usage):
+    """
+    Token usage as a plain dict, whether the API returned a model object or a dict.
+    """
+    if usage is None:
+        return {}
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    return dict(usage)
+
+
+def response_cache_key(message, num_questions, ai_model, use_code_interpreter):
+    return ResponseCache.make_key(
+        ai_model,
+        ASSISTANT_INSTRUCTIONS_CODE if use_code_interpreter else ASSISTANT_INSTRUCTIONS,
+        use_code_interpreter,
+        message[0][0]["content"],
+        message[1] // num_questions,
+    )
+
+
+def split_cached_responses(
+    messages, num_questions, ai_model, use_code_interpreter, cache
+):
+    """
+    Separates messages that already have a response in `cache` from those still to be sent.
+
+    Returns:
+        Tuple of (cached responses as (parsed_output, usage, message_index) tuples, pending messages).
+        The usage of cached responses is a `CachedUsage`.
+    """
+    if cache is None:
+        return [], messages
+
+    cached = []
+    pending = []
+    for message in messages:
+        entry = cache.get(
+            response_cache_key(message, num_questions, ai_model, use_code_interpreter)
+        )
+        if entry is None:
+            pending.append(message)
+        else:
+            final_answer, explanation, usage = entry
+            cached.append(
+                (
+                    QuestionOutput(final_answer=final_answer, explanation=explanation),
+                    CachedUsage(usage),
+                    message[1],
+                )
+            )
+    return cached, pending
+
+
+def store_cached_response(
+    cache, message, num_questions, ai_model, use_code_interpreter, response
+):
+    if cache is None:
+        return
+    parsed = response.output_parsed
+    cache.put(
+        response_cache_key(message, num_questions, ai_model, use_code_interpreter),
+        ai_model,
+        message[0][0]["content"],
+        message[1] // num_questions,
+        getattr(parsed, "final_answer", None),
+        getattr(parsed, "explanation", None),
+        usage_to_dict(response.usage),
+    )
+
+
+def summarize_responses(responses, question_list, output_file, verbose=True):
+    """
+    Turns (parsed_output, usage, message_index) tuples into the result records returned by
+    `run_ai_tests`, saving them to `output_file` if one is given. With `verbose`, prints the
+    tokens spent, and separately the tokens of responses served from the cache.
+    """
+    responses = sorted(responses, key=lambda x: x[2])
+
+    results = []
+    total_input_tokens = 0
+    total_output_tokens = 0
+    num_cached = 0
+    cached_input_tokens = 0
+    cached_output_tokens = 0
+
+    for idx, (resp, usage, _) in enumerate(responses):
+        cached = isinstance(usage, CachedUsage)
+        usage = usage_to_dict(usage)
+        if cached:
+            num_cached += 1
+            cached_input_tokens += usage.get("input_tokens", 0)
+            cached_output_tokens += usage.get("output_tokens", 0)
+        else:
+            total_input_tokens += usage.get("input_tokens", 0)
+            total_output_tokens += usage.get("output_tokens", 0)
+
+        question_data = question_list[idx % len(question_list)]
+        result = {
+            "question": question_data["content"],
+            "expected_answer": question_data["answer"],
+            "ai_response": getattr(resp, "explanation", None),
+            "actual_answer": getattr(resp, "final_answer", None),
+            "usage": usage,
+            "cached": cached,
+        }
+        results.append(result)
+
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Output saved to {output_file}")
+
+    if verbose:
+        print(f"Total input tokens: {total_input_tokens}")
+        print(f"Total output tokens: {total_output_tokens}")
+        print(f"Total tokens: {total_input_tokens + total_output_tokens}")
+        if num_cached:
+            print(
+                f"Cached responses: {num_cached} ({cached_input_tokens} input and "
+                f"{cached_output_tokens} output tokens, not spent again)"
+            )
+        print(f"Finished {len(results)} questions.")
+    return results
+
+
+def request_response(
+    message,
+    ai_model,
+    use_code_interpreter=False,
+    container_id=None,
+    num_questions=1,
+    cache=None,
+    timeout_seconds=300,
+    hedger=None,
+    queued_at=None,
+):
+    """
+    Sends one question to the model, retrying hung and rate-limited requests.
+
+    Latency, queue wait, retries and token usage are recorded in `runner_metrics`.
+
+    Args:
+        message: A (message_input, message_index) pair from `build_messages`
+        ai_model: The model to send it to
+        use_code_interpreter: Whether to enable the code interpreter tool
+        container_id: The code interpreter container to use, if enabled
+        num_questions: Length of the question list the message was built from
+        cache (ResponseCache, optional): Where to save the response once it arrives
+        timeout_seconds: How long to wait for a response before retrying
+        hedger (Hedger, optional): Sends a duplicate request if this one runs long
+        queued_at (float, optional): `time.monotonic()` when the request was submitted
+    Returns:
+        Tuple of (parsed_output, usage, message_index)
+    """
+    model_name = getattr(ai_model, "value", ai_model)
+    if queued_at is not None:
+        runner_metrics.record_queue_wait(model_name, time.monotonic() - queued_at)
+    rate_limiter = get_rate_limiter(ai_model)
+    provider = get_provider(ai_model)
+    kwargs = build_request_kwargs(
+        ai_model, message[0], use_code_interpreter, container_id
+    )
+
+    max_retries = 5
+    retry_count = 0
+    base_delay = 20
+    estimated_tokens = estimate_tokens(kwargs)
+
+    def record_hedge_loser(response):
+        # A hedge takes its own limiter budget, which the losing copy settles here.
+        usage = usage_to_dict(response.usage)
+        rate_limiter.record_success(usage.get("total_tokens"), estimated_tokens)
+        runner_metrics.record_hedge_loser(model_name, usage)
+
+    while True:
+        try:
+            runner_metrics.record_rate_limit_wait(
+                model_name, rate_limiter.acquire(estimated_tokens)
+            )
+            request_start = time.monotonic()
+            response = call_with_hedging(
+                provider.parse_async,
+                kwargs,
+                timeout_seconds,
+                hedger,
+                acquire_hedge=lambda: rate_limiter.try_acquire(estimated_tokens),
+                on_loser=record_hedge_loser,
+            )
+            latency = time.monotonic() - request_start
+
+            store_cached_response(
+                cache,
+                message,
+                num_questions,
+                ai_model,
+                use_code_interpreter,
+                response,
+            )
+            token_usage = response.usage
+            usage = usage_to_dict(token_usage)
+            rate_limiter.record_success(usage.get("total_tokens"), estimated_tokens)
+            runner_metrics.record_response(model_name, latency, usage)
+            logger.debug(
+                f"Finished question: {message[1]} | {latency:.2f}s | "
+                f"Input tokens: {usage.get('input_tokens')}, "
+                f"Output tokens: {usage.get('output_tokens')}"
+            )
+
+            return response.output_parsed, token_usage, message[1]
+
+        except concurrent.futures.TimeoutError:
+            runner_metrics.record_retry(model_name, "timeout")
+            if retry_count < max_retries:
+                retry_count += 1
+                delay = base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 1)
+                logger.info(
+                    f"Request hung for {timeout_seconds}s, retrying in {delay:.2f}s "
+                    f"(attempt {retry_count}/{max_retries})"
+                )
+                time.sleep(delay)
+            else:
+                runner_metrics.record_error(model_name)
+                raise TimeoutError(
+                    f"Request timed out after {timeout_seconds}s (max retries reached)"
+                )
+
+        except Exception as e:
+            if is_rate_limit_error(e) and retry_count < max_retries:
+                retry_count += 1
+                pause = rate_limit_pause(e, retry_count)
+                rate_limiter.record_rate_limit(pause)
+                runner_metrics.record_retry(model_name, "rate_limit")
+                logger.info(
+                    f"Rate limit hit, pausing {ai_model} for {pause:.2f}s (attempt {retry_count}/{max_retries})"
+                )
+            else:
+                runner_metrics.record_error(model_name)
+                print(f"Error calling {provider.name} API: {str(e)}")
+                raise
+
+
+def request_pooled_response(
+    message,
+    ai_model,
+    container_pool,
+    num_questions=1,
+    cache=None,
+    timeout_seconds=300,
+    queued_at=None,
+):
+    """
+    `request_response` with the code interpreter, on a container leased from `container_pool`.
+
+    Time spent waiting for a container counts as queue wait.
+    """
+    with container_pool.lease() as container_id:
+        return request_response(
+            message,
+            ai_model,
+            True,
+            container_id,
+            num_questions,
+            cache,
+            timeout_seconds,
+            queued_at=queued_at,
+        )
+
+
 def run_ai_tests(
     question_list,
     num_iterations=1,
     ai_model=AIModels.GPT_4O,
     use_code_interpreter=False,
     output_file="ai_responses.json",
+    cache=None,
+    container_pool=None,
+    hedge=False,
 ):
     """
     Runs a series of AI-powered tests on a list of finance-related questions, specifically focused on mortgage calculations.
@@ -60,6 +438,9 @@ def run_ai_tests(
         ai_model (str, optional): The identifier of the AI model to use for generating responses. o3-mini.
         use_code_interpreter: Whether or not to enable code interpreter in OpenAI API
         output_file: The filename to output responses to
+        cache (ResponseCache, optional): On-disk cache; cached responses are reused and new ones are saved as they arrive
+        container_pool (ContainerPool, optional): Containers for code interpreter requests; defaults to the shared pool
+        hedge (bool): Send a duplicate of requests slower than the model's p95 latency (see `Hedger`); not used with the code interpreter
     Returns:
         list: A list of dictionaries, each containing:
             - 'question': The question text.
@@ -67,124 +448,235 @@ def run_ai_tests(
             - 'ai_response': The full response from the AI model.
             - 'code': The code the AI model generated if applicable
             - 'actual_answer': The numeric answer extracted from the AI's response.
+            - 'usage': The token usage of the response.
+            - 'cached': Whether the response came from `cache`, so its tokens were not spent by this run.
     """
 
-    messages = [
-        (
-            [{"role": msg["role"], "content": msg["content"]}],
-            idx + iteration * len(question_list),
-        )
-        for iteration in range(num_iterations)
-        for idx, msg in enumerate(question_list)
-    ]
+    messages = build_messages(question_list, num_iterations)
+    cached_responses, messages = split_cached_responses(
+        messages, len(question_list), ai_model, use_code_interpreter, cache
+    )
 
-    container = (
-        client.containers.create(name="code-interpreter-container")
-        if use_code_interpreter
-        else None
+    print(
+        f"Running {len(messages)} questions with model {ai_model} "
+        f"({len(cached_responses)} cached)"
     )
 
-    def get_response(message):
-        kwargs = {
-            "model": ai_model,
-            "input": message[0],
-            "tools": (
-                [{"type": "code_interpreter", "container": container.id}]
-                if use_code_interpreter
-                else []
-            ),
-            "instructions": (
-                ASSISTANT_INSTRUCTIONS_CODE
+    runner_metrics.record_submitted(len(messages))
+    hedger = get_hedger(ai_model) if hedge and not use_code_interpreter else None
+    max_threads = max(1, min(10, len(messages)))
+    if use_code_interpreter and messages:
+        # Each request leases its own container, so code runs parallelize up to the pool size.
+        container_pool = container_pool or get_container_pool(
+            get_provider(ai_model).client
+        )
+        max_threads = min(max_threads, container_pool.size)
+    get_provider(ai_model).ensure_concurrency(max_threads)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
+        futures = [
+            (
+                executor.submit(
+                    request_pooled_response,
+                    msg,
+                    ai_model,
+                    container_pool,
+                    len(question_list),
+                    cache,
+                    queued_at=time.monotonic(),
+                )
                 if use_code_interpreter
-                else ASSISTANT_INSTRUCTIONS
-            ),
-            "text_format": QuestionOutput,
-        }
+                else executor.submit(
+                    request_response,
+                    msg,
+                    ai_model,
+                    False,
+                    None,
+                    len(question_list),
+                    cache,
+                    hedger=hedger,
+                    queued_at=time.monotonic(),
+                )
+            )
+            for msg in messages
+        ]
+        responses_parallel = cached_responses + [future.result() for future in futures]
+    runner_metrics.end_progress()
+
+    if hedger is not None:
+        print(f"Hedging: {hedger.stats()}")
+
+    return summarize_responses(responses_parallel, question_list, output_file)
+
+
+_model_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_model_semaphore(ai_model):
+    """
+    Semaphore limiting in-flight requests for a model within the running event loop.
+
+    Every `run_ai_tests_async` call in the same loop shares it, so concurrent runs of the
+    same model stay within `MODEL_CONCURRENCY` together. The model's provider pools are
+    grown to the concurrency of its models in the loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphores = _model_semaphores.setdefault(loop, {})
+    if ai_model not in semaphores:
+        semaphores[ai_model] = asyncio.Semaphore(
+            MODEL_CONCURRENCY.get(ai_model, DEFAULT_MODEL_CONCURRENCY)
+        )
+        provider = get_provider(ai_model)
+        provider.ensure_concurrency(
+            sum(
+                MODEL_CONCURRENCY.get(model, DEFAULT_MODEL_CONCURRENCY)
+                for model in semaphores
+                if get_provider(model) is provider
+            )
+        )
+    return semaphores[ai_model]
+
+
+async def run_ai_tests_async(
+    question_list,
+    num_iterations=1,
+    ai_model=AIModels.GPT_4O,
+    use_code_interpreter=False,
+    output_file="ai_responses.json",
+    timeout_seconds=300,
+    cache=None,
+    container_pool=None,
+):
+    """
+    asyncio version of `run_ai_tests`, built on the async OpenAI client.
+
+    All requests run as tasks in one event loop instead of threads. In-flight requests are
+    capped per model by `MODEL_CONCURRENCY` (and, with the code interpreter, by the
+    containers in `container_pool`), each request is cancelled if it takes longer
+    than `timeout_seconds`, and if one request fails for good the rest are cancelled.
+    Responses already finished are kept in `cache`, if one is given, so nothing is lost.
+    Takes the same arguments and returns the same list of result dicts as `run_ai_tests`.
+    """
+    messages = build_messages(question_list, num_iterations)
+    cached_responses, messages = split_cached_responses(
+        messages, len(question_list), ai_model, use_code_interpreter, cache
+    )
+
+    if use_code_interpreter and messages:
+        container_pool = container_pool or await asyncio.to_thread(
+            get_container_pool, get_provider(ai_model).client
+        )
+    semaphore = get_model_semaphore(ai_model)
+
+    rate_limiter = get_rate_limiter(ai_model)
+    provider = get_provider(ai_model)
+    model_name = getattr(ai_model, "value", ai_model)
+
+    async def get_response(message):
+        if not use_code_interpreter:
+            return await send_request(message, None)
+        # Each request leases its own container from the pool for as long as it runs.
+        container_id = await asyncio.to_thread(container_pool.acquire)
+        failed = True
+        try:
+            response = await send_request(message, container_id)
+            failed = False
+            return response
+        finally:
+            container_pool.release(container_id, failed)
+
+    async def send_request(message, container_id):
+        kwargs = build_request_kwargs(
+            ai_model, message[0], use_code_interpreter, container_id
+        )
 
         max_retries = 5
         retry_count = 0
         base_delay = 20
-        timeout_seconds = 300  # 5 minutes
+        estimated_tokens = estimate_tokens(kwargs)
 
         while True:
             try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(client.responses.parse, **kwargs)
-                    response = future.result(timeout=timeout_seconds)
+                runner_metrics.record_rate_limit_wait(
+                    model_name, await rate_limiter.acquire_async(estimated_tokens)
+                )
+                queued_at = time.monotonic()
+                async with semaphore:
+                    request_start = time.monotonic()
+                    runner_metrics.record_queue_wait(
+                        model_name, request_start - queued_at
+                    )
+                    response = await asyncio.wait_for(
+                        provider.parse_async(**kwargs),
+                        timeout=timeout_seconds,
+                    )
+                latency = time.monotonic() - request_start
 
-                print(response)
+                store_cached_response(
+                    cache,
+                    message,
+                    len(question_list),
+                    ai_model,
+                    use_code_interpreter,
+                    response,
+                )
                 token_usage = response.usage
-                print(
-                    f"Finished question: {message[1]} | "
-                    f"Input tokens: {token_usage.input_tokens}, "
-                    f"Output tokens: {token_usage.output_tokens}"
+                usage = usage_to_dict(token_usage)
+                rate_limiter.record_success(usage.get("total_tokens"), estimated_tokens)
+                runner_metrics.record_response(model_name, latency, usage)
+                logger.debug(
+                    f"Finished question: {message[1]} | {latency:.2f}s | "
+                    f"Input tokens: {usage.get('input_tokens')}, "
+                    f"Output tokens: {usage.get('output_tokens')}"
                 )
 
                 return response.output_parsed, token_usage, message[1]
 
-            except concurrent.futures.TimeoutError:
+            except asyncio.TimeoutError:
+                runner_metrics.record_retry(model_name, "timeout")
                 if retry_count < max_retries:
                     retry_count += 1
                     delay = base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 1)
-                    print(
+                    logger.info(
                         f"Request hung for {timeout_seconds}s, retrying in {delay:.2f}s "
                         f"(attempt {retry_count}/{max_retries})"
                     )
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
                 else:
+                    runner_metrics.record_error(model_name)
                     raise TimeoutError(
                         f"Request timed out after {timeout_seconds}s (max retries reached)"
                     )
 
             except Exception as e:
-                error_msg = str(e).lower()
-                if (
-                    "rate limit" in error_msg and "429" in error_msg
-                ) and retry_count < max_retries:
+                if is_rate_limit_error(e) and retry_count < max_retries:
                     retry_count += 1
-                    delay = base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 1)
-                    print(
-                        f"Rate limit hit, retrying in {delay:.2f}s (attempt {retry_count}/{max_retries})"
+                    pause = rate_limit_pause(e, retry_count)
+                    rate_limiter.record_rate_limit(pause)
+                    runner_metrics.record_retry(model_name, "rate_limit")
+                    logger.info(
+                        f"Rate limit hit, pausing {ai_model} for {pause:.2f}s (attempt {retry_count}/{max_retries})"
                     )
-                    time.sleep(delay)
                 else:
-                    print(f"Error calling OpenAI API: {str(e)}")
+                    runner_metrics.record_error(model_name)
+                    print(f"Error calling {provider.name} API: {str(e)}")
                     raise
 
-    print(f"Running {len(messages)} questions with model {ai_model}")
-
-    max_threads = 1 if use_code_interpreter else min(10, len(messages))
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
-        futures = [executor.submit(get_response, msg) for msg in messages]
-        responses_parallel = [future.result() for future in futures]
-
-    responses_parallel.sort(key=lambda x: x[2])
-
-    results = []
-    total_input_tokens = 0
-    total_output_tokens = 0
+    print(
+        f"Running {len(messages)} questions with model {ai_model} "
+        f"({len(cached_responses)} cached)"
+    )
 
-    for idx, (resp, usage, _) in enumerate(responses_parallel):
-        total_input_tokens += usage.get("input_tokens", 0)
-        total_output_tokens += usage.get("output_tokens", 0)
+    runner_metrics.record_submitted(len(messages))
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [task_group.create_task(get_response(msg)) for msg in messages]
+    runner_metrics.end_progress()
+    responses = cached_responses + [task.result() for task in tasks]
 
-        question_data = question_list[idx % len(question_list)]
-        result = {
-            "question": question_data["content"],
-            "expected_answer": question_data["answer"],
-            "ai_response": getattr(resp, "explanation", None),
-            "actual_answer": getattr(resp, "final_answer", None),
-            "usage": usage,
-        }
-        results.append(result)
+    return summarize_responses(responses, question_list, output_file)
 
-    if output_file:
-        with open(output_file, "w") as f:
-            json.dump(results, f, indent=2)
-        print(f"Output saved to {output_file}")
 
-    print(f"Total input tokens: {total_input_tokens}")
-    print(f"Total output tokens: {total_output_tokens}")
-    print(f"Total tokens: {total_input_tokens + total_output_tokens}")
-    print(f"Finished {len(results)} questions.")
-    return results
+def run_ai_tests_asyncio(*args, **kwargs):
+    """
+    Runs `run_ai_tests_async` to completion from synchronous code.
+    """
+    return asyncio.run(run_ai_tests_async(*args, **kwargs))
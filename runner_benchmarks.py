@@ -0,0 +1,254 @@
+import os
+
+# The runners need an API key at import time; the mock server accepts any key.
+os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+from contextlib import ExitStack, contextmanager
+from ai_models import MODEL_RATE_LIMITS
+from container_pool import ContainerPool
+from mock_openai_server import MockOpenAIServer, constant_latency, lognormal_latency
+from providers import MODEL_PROVIDERS, PROVIDERS, Provider, register_provider
+from question_grid import QuestionGrid, QuestionRegistry
+from rate_limiter import get_rate_limiter
+from runner_metrics import runner_metrics
+from sweep_scheduler import DEFAULT_MODEL_THREADS, SweepScheduler
+import run_ai_tests
+import time
+
+# Budgets for the mock models, high enough that only injected 429s slow the runners down.
+MOCK_RATE_LIMITS = {"requests_per_minute": 1000000, "tokens_per_minute": 1000000000}
+
+
+@contextmanager
+def mock_api(**server_options):
+    """
+    Starts a `MockOpenAIServer` and points the runners at it for the duration of the block.
+
+    The client's own retries are turned off, so injected 429s reach the runners.
+    """
+    with MockOpenAIServer(**server_options) as server:
+        run_ai_tests.configure_client(server.base_url, "mock", max_retries=0)
+        runner_metrics.reset()
+        try:
+            yield server
+        finally:
+            run_ai_tests.configure_client()
+
+
+@contextmanager
+def mock_models(prefix, count):
+    """
+    Names `count` mock models and gives them `MOCK_RATE_LIMITS` for the duration of the block.
+
+    `MODEL_RATE_LIMITS` is restored afterwards.
+    """
+    models = [f"{prefix}-{index}" for index in range(count)]
+    saved = {
+        model: MODEL_RATE_LIMITS[model]
+        for model in models
+        if model in MODEL_RATE_LIMITS
+    }
+    for model in models:
+        MODEL_RATE_LIMITS[model] = MOCK_RATE_LIMITS
+    try:
+        yield models
+    finally:
+        for model in models:
+            MODEL_RATE_LIMITS.pop(model, None)
+        MODEL_RATE_LIMITS.update(saved)
+
+
+@contextmanager
+def registered_provider(provider, models=()):
+    """
+    `register_provider` for the duration of the block; `PROVIDERS` and `MODEL_PROVIDERS`
+    are restored afterwards.
+    """
+    saved_providers = dict(PROVIDERS)
+    saved_model_providers = dict(MODEL_PROVIDERS)
+    register_provider(provider, models)
+    try:
+        yield provider
+    finally:
+        PROVIDERS.clear()
+        PROVIDERS.update(saved_providers)
+        MODEL_PROVIDERS.clear()
+        MODEL_PROVIDERS.update(saved_model_providers)
+
+
+def report(name, elapsed, server, concurrency, models):
+    """
+    Prints throughput and scheduler efficiency for a finished benchmark run.
+
+    Efficiency is the time the run would take if every worker were always waiting on a
+    response (total simulated latency / concurrency) divided by the time it really took.
+    """
+    stats = server.stats()
+    ideal = stats["simulated_latency_seconds"] / concurrency
+    rate_limited = sum(get_rate_limiter(model).rate_limited_count for model in models)
+    print(name)
+    print(
+        f"  {stats['responses_served']} responses in {elapsed:.2f}s "
+        f"({stats['responses_served'] / elapsed:.1f} requests/s)"
+    )
+    print(f"  scheduler efficiency: {ideal / elapsed:.0%} of {concurrency} workers")
+    print(
+        f"  429s injected: {stats['rate_limited']}, seen by the runner: {rate_limited}, "
+        f"hangs: {stats['hung']}, containers created: {stats['containers_created']}"
+    )
+    for model, metrics in runner_metrics.summary().items():
+        if "connections_opened" in metrics:
+            pool_wait = metrics.get("pool_wait_seconds") or {}
+            print(
+                f"  {model}: {metrics['connections_opened']} connections opened, "
+                f"pool wait p95 {pool_wait.get('p95') or 0:.3f}s"
+            )
+            continue
+        latency = metrics.get("request_latency_seconds") or {}
+        queue_wait = metrics.get("queue_wait_seconds") or {}
+        print(
+            f"  {model}: latency p50 {latency.get('p50') or 0:.3f}s "
+            f"p95 {latency.get('p95') or 0:.3f}s, "
+            f"queue wait p95 {queue_wait.get('p95') or 0:.3f}s"
+        )
+
+
+def benchmark_run_ai_tests(
+    num_questions=50,
+    num_iterations=4,
+    median_latency=0.2,
+    rate_limit_probability=0.0,
+):
+    """
+    Drives a single `run_ai_tests` call (10 worker threads) against the mock server.
+    """
+    questions = [
+        {"role": "user", "content": f"Mock question {index}?", "answer": 0}
+        for index in range(num_questions)
+    ]
+    with mock_models("mock-run", 1) as (model,), mock_api(
+        latency=lognormal_latency(median_latency),
+        rate_limit_probability=rate_limit_probability,
+        retry_after=0.5,
+    ) as server:
+        start_time = time.perf_counter()
+        run_ai_tests.run_ai_tests(questions, num_iterations, model, output_file=None)
+        elapsed = time.perf_counter() - start_time
+        report("run_ai_tests", elapsed, server, min(10, len(questions)), [model])
+
+
+def benchmark_sweep(
+    num_models=3,
+    median_latency=0.2,
+    rate_limit_probability=0.0,
+    hang_probability=0.0,
+    timeout_seconds=300,
+    code_interpreter=False,
+):
+    """
+    Drives a `SweepScheduler` sweep over several mock models against the mock server.
+
+    With `code_interpreter`, the first model also runs the code combinations on a
+    `ContainerPool` backed by the mock container endpoints.
+    """
+    with mock_models("mock-sweep", num_models) as models:
+        code_models = models[:1] if code_interpreter else []
+        registry = QuestionRegistry()
+        grid = QuestionGrid(
+            [2, 4, 6, 8],
+            [300000, 700000, 1100000],
+            [15, 30],
+            code_models,
+            models[len(code_models) :],
+            registry=registry,
+        )
+        with mock_api(
+            latency=lognormal_latency(median_latency),
+            rate_limit_probability=rate_limit_probability,
+            retry_after=0.5,
+            hang_probability=hang_probability,
+            hang_seconds=timeout_seconds * 2,
+        ) as server:
+            container_pool = ContainerPool(run_ai_tests.client) if code_models else None
+            start_time = time.perf_counter()
+            with SweepScheduler(
+                num_iterations=5,
+                timeout_seconds=timeout_seconds,
+                container_pool=container_pool,
+            ) as scheduler:
+                scheduler.run(grid, registry)
+            elapsed = time.perf_counter() - start_time
+            # Every model has a plain pool; code models add one capped by the containers.
+            concurrency = DEFAULT_MODEL_THREADS * len(models)
+            if container_pool is not None:
+                concurrency += min(DEFAULT_MODEL_THREADS, container_pool.size) * len(
+                    code_models
+                )
+            report(
+                f"sweep ({len(grid)} combinations)",
+                elapsed,
+                server,
+                concurrency,
+                models,
+            )
+            if container_pool is not None:
+                print(f"  container pool: {container_pool.stats()}")
+                container_pool.close()
+
+
+def benchmark_providers(latencies=(0.2, 0.4), num_iterations=5):
+    """
+    Sweeps one model per provider, each provider served by its own mock server.
+
+    Every other provider speaks chat completions instead of the Responses API. The sweep
+    should take about as long as the slowest provider alone, not the sum of all of them.
+    """
+    registry = QuestionRegistry()
+    with ExitStack() as stack:
+        models = []
+        servers = []
+        for index, latency in enumerate(latencies):
+            server = stack.enter_context(
+                MockOpenAIServer(latency=constant_latency(latency))
+            )
+            (model,) = stack.enter_context(mock_models(f"mock-provider-{index}", 1))
+            provider = Provider(
+                f"mock-{index}",
+                server.base_url,
+                "MOCK_API_KEY",
+                api="chat_completions" if index % 2 else "responses",
+                max_retries=0,
+            )
+            provider.configure(api_key="mock")
+            stack.enter_context(registered_provider(provider, [model]))
+            models.append(model)
+            servers.append(server)
+        grid = QuestionGrid(
+            [2, 4, 6, 8], [300000, 700000], [15, 30], [], models, registry=registry
+        )
+        runner_metrics.reset()
+        start_time = time.perf_counter()
+        with SweepScheduler(num_iterations=num_iterations) as scheduler:
+            scheduler.run(grid, registry)
+        elapsed = time.perf_counter() - start_time
+
+    # Each model's requests run on its own pool of worker threads.
+    requests_per_model = len(grid) // len(models) * num_iterations
+    slowest = max(latencies) * requests_per_model / DEFAULT_MODEL_THREADS
+    print(f"providers ({len(models)} mock endpoints, {len(grid)} combinations)")
+    print(
+        f"  {sum(server.stats()['responses_served'] for server in servers)} responses "
+        f"in {elapsed:.2f}s; slowest provider alone: at least {slowest:.2f}s, "
+        f"all in sequence: at least "
+        f"{sum(latencies) * requests_per_model / DEFAULT_MODEL_THREADS:.2f}s"
+    )
+    for model, server in zip(models, servers):
+        print(f"  {model}: {server.stats()['responses_served']} responses")
+
+
+if __name__ == "__main__":
+    benchmark_run_ai_tests()
+    benchmark_run_ai_tests(rate_limit_probability=0.05)
+    benchmark_sweep()
+    benchmark_sweep(code_interpreter=True)
+    benchmark_providers()
@@ -0,0 +1,355 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import csv
+import json
+import sys
+import threading
+import time
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+# Histograms kept per model (per host for the connection pool), with their bucket boundaries.
+HISTOGRAMS = {
+    "request_latency_seconds": LATENCY_BUCKETS,
+    "queue_wait_seconds": WAIT_BUCKETS,
+    "rate_limit_wait_seconds": WAIT_BUCKETS,
+    "pool_wait_seconds": WAIT_BUCKETS,
+    "input_tokens": TOKEN_BUCKETS,
+    "output_tokens": TOKEN_BUCKETS,
+    "cached_tokens": TOKEN_BUCKETS,
+}
+
+COUNTERS = (
+    "requests",
+    "errors",
+    "rate_limit_retries",
+    "timeouts",
+    "hedge_losers",
+    "connections_opened",
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, as in Prometheus: per-bucket counts plus count, sum, min and max.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimates a quantile by interpolating inside its bucket (like `histogram_quantile`).
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                lower = self.buckets[index - 1] if index > 0 else self.min
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class RunnerMetrics:
+    """
+    Per-model request metrics for the runners, plus a one-line progress display.
+
+    Records latency, queue wait (time between submitting a request and starting it),
+    rate limiter wait and input/output/cached tokens per request as histograms, and
+    requests, errors, rate-limit retries, timeouts and hedged copies that lost (whose
+    tokens are still recorded) as counters. The HTTP transport adds the wait for a pooled
+    connection and the connections opened, keyed by host instead of model. The progress
+    line is rewritten in place on stderr at most every `progress_interval` seconds.
+
+    Export with `summary`, `write_json`, `write_csv` or `prometheus_text`, or serve the
+    Prometheus text with `start_http_server`.
+    """
+
+    def __init__(self, progress_interval=1.0, progress_stream=sys.stderr):
+        self.progress_interval = progress_interval
+        self.progress_stream = progress_stream
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self._submitted = 0
+            self._completed = 0
+            self._start_time = time.monotonic()
+            self._last_progress = 0.0
+
+    def _histogram(self, name, model):
+        key = (name, model)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(HISTOGRAMS[name])
+        return self._histograms[key]
+
+    def _increment(self, name, model, amount=1):
+        self._counters[(name, model)] = self._counters.get((name, model), 0) + amount
+
+    def record_submitted(self, count=1):
+        with self._lock:
+            self._submitted += count
+
+    def record_queue_wait(self, model, seconds):
+        with self._lock:
+            self._histogram("queue_wait_seconds", model).observe(seconds)
+
+    def record_rate_limit_wait(self, model, seconds):
+        with self._lock:
+            self._histogram("rate_limit_wait_seconds", model).observe(seconds)
+
+    def record_pool_wait(self, host, seconds):
+        with self._lock:
+            self._histogram("pool_wait_seconds", host).observe(seconds)
+
+    def record_connection_opened(self, host):
+        with self._lock:
+            self._increment("connections_opened", host)
+
+    def record_retry(self, model, reason):
+        """
+        Args:
+            reason (str): "rate_limit" or "timeout"
+        """
+        with self._lock:
+            self._increment(
+                "rate_limit_retries" if reason == "rate_limit" else "timeouts", model
+            )
+        self.progress()
+
+    def record_response(self, model, latency, usage):
+        """
+        Records a successful request.
+
+        Args:
+            usage (dict): Token usage as returned by `usage_to_dict`
+        """
+        with self._lock:
+            self._increment("requests", model)
+            self._completed += 1
+            self._histogram("request_latency_seconds", model).observe(latency)
+            self._observe_usage(model, usage)
+        self.progress()
+
+    def record_hedge_loser(self, model, usage):
+        """
+        Records the tokens of a hedged copy whose answer was not used. It is not counted
+        as a completed request.
+        """
+        with self._lock:
+            self._increment("hedge_losers", model)
+            self._observe_usage(model, usage)
+
+    def _observe_usage(self, model, usage):
+        details = usage.get("input_tokens_details") or {}
+        self._histogram("input_tokens", model).observe(usage.get("input_tokens", 0))
+        self._histogram("output_tokens", model).observe(usage.get("output_tokens", 0))
+        self._histogram("cached_tokens", model).observe(
+            details.get("cached_tokens") or 0
+        )
+
+    def record_error(self, model):
+        with self._lock:
+            self._increment("errors", model)
+            self._completed += 1
+        self.progress()
+
+    def progress(self, force=False):
+        """
+        Rewrites the progress line if `progress_interval` has passed since the last one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_progress < self.progress_interval:
+                return
+            self._last_progress = now
+            elapsed = now - self._start_time
+            completed = self._completed
+            submitted = self._submitted
+            retries = sum(
+                value
+                for (name, _), value in self._counters.items()
+                if name in ("rate_limit_retries", "timeouts")
+            )
+            errors = sum(
+                value for (name, _), value in self._counters.items() if name == "errors"
+            )
+        if self.progress_stream is None:
+            return
+        self.progress_stream.write(
+            f"\r{completed}/{submitted} requests | {completed / max(elapsed, 1e-9):.1f}/s "
+            f"| {retries} retries | {errors} errors | {elapsed:.0f}s"
+        )
+        self.progress_stream.flush()
+
+    def end_progress(self):
+        """
+        Prints the final progress line and moves past it.
+        """
+        self.progress(force=True)
+        if self.progress_stream is not None:
+            self.progress_stream.write("\n")
+            self.progress_stream.flush()
+
+    def models(self):
+        with self._lock:
+            return sorted(
+                {model for _, model in self._histograms}
+                | {model for _, model in self._counters}
+            )
+
+    def summary(self):
+        """
+        Returns:
+            dict: Per model, the counters and each histogram's count, sum, quantiles and buckets
+        """
+        with self._lock:
+            summary = {}
+            for (name, model), value in self._counters.items():
+                summary.setdefault(model, {})[name] = value
+            for (name, model), histogram in self._histograms.items():
+                summary.setdefault(model, {})[name] = histogram.to_dict()
+            return summary
+
+    def write_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_csv(self, path):
+        """
+        Writes one row per model (or host) with the counters, wait quantiles and token totals.
+        """
+        summary = self.summary()
+        columns = ["model", *COUNTERS]
+        for name in HISTOGRAMS:
+            if name.endswith("_seconds"):
+                columns += [f"{name}_p50", f"{name}_p95", f"{name}_max"]
+            else:
+                columns.append(f"{name}_total")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for model, metrics in sorted(summary.items()):
+                row = {"model": model}
+                for name in COUNTERS:
+                    row[name] = metrics.get(name, 0)
+                for name in HISTOGRAMS:
+                    histogram = metrics.get(name) or {}
+                    if name.endswith("_seconds"):
+                        row[f"{name}_p50"] = histogram.get("p50")
+                        row[f"{name}_p95"] = histogram.get("p95")
+                        row[f"{name}_max"] = histogram.get("max")
+                    else:
+                        row[f"{name}_total"] = histogram.get("sum", 0)
+                writer.writerow(row)
+
+    def prometheus_text(self, prefix="ai_runner"):
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            for name in COUNTERS:
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for (counter_name, model), value in counters:
+                    if counter_name == name:
+                        lines.append(
+                            f'{prefix}_{name}_total{{model="{model}"}} {value}'
+                        )
+            for name in HISTOGRAMS:
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for (histogram_name, model), histogram in histograms:
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(
+                        [*histogram.buckets, "+Inf"], histogram.counts
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f'{prefix}_{name}_bucket{{model="{model}",le="{bound}"}} '
+                            f"{cumulative}"
+                        )
+                    lines.append(
+                        f'{prefix}_{name}_sum{{model="{model}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{prefix}_{name}_count{{model="{model}"}} {histogram.count}'
+                    )
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port=9100, host="127.0.0.1"):
+        """
+        Serves `prometheus_text` at /metrics and `summary` at /metrics.json in a background thread.
+
+        Returns:
+            The running `ThreadingHTTPServer`; call `shutdown()` on it to stop it.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body = metrics.prometheus_text().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body = json.dumps(metrics.summary()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Shared by every runner in the process.
+runner_metrics = RunnerMetrics()
@@ -0,0 +1,293 @@
+from run_ai_tests import *
+from adaptive_sampling import SequentialSampler
+import concurrent.futures
+import threading
+import time
+
+# Worker threads per model for the sweep scheduler.
+DEFAULT_MODEL_THREADS = 10
+MODEL_THREADS = {}
+
+
+class SweepScheduler:
+    """
+    Runs every request of a combination sweep from one global work queue.
+
+    All combinations × iterations are flattened into individual requests and handed to a
+    thread pool per model (sized by `MODEL_THREADS`), so each model fills its own slots
+    and a slow or throttled model never holds up the others. Each model's requests go to
+    its provider's endpoint and connection pool, which is grown to fit the threads of the
+    provider's models, so providers run side by side. Requests
+    that use the code interpreter lease a container from `container_pool` for as long as
+    they run, so they run in parallel up to the pool size.
+    A combination is finished, summarized and passed to `on_combination_done` as soon as
+    its last request returns, while the rest of the sweep keeps running. No more
+    combinations are in flight than the model pools have worker threads, so a long sweep
+    holds only the combinations being worked on.
+
+    With a `sampler`, each combination starts with the sampler's minimum iterations and
+    is asked again only while the sampler finds its accuracy uncertain, within the
+    budget of `num_iterations` per combination.
+
+    Args:
+        num_iterations (int): How many times each combination's question is asked.
+        cache (ResponseCache, optional): Responses already in the cache are not sent again.
+        timeout_seconds (int): Per-request timeout before a retry.
+        on_combination_done (callable, optional): Called with (combo, question) whenever a
+            combination finishes. Calls are serialized, so it may write to a shared file.
+        container_pool (ContainerPool, optional): Containers for code interpreter requests;
+            defaults to the shared pool.
+        hedge (bool): Send a duplicate of requests slower than the model's p95 latency
+            (see `Hedger`). Code interpreter requests are never hedged.
+        sampler (SequentialSampler, optional): Stops asking settled combinations early.
+    """
+
+    def __init__(
+        self,
+        num_iterations=5,
+        cache=None,
+        timeout_seconds=300,
+        on_combination_done=None,
+        container_pool=None,
+        hedge=False,
+        sampler=None,
+    ):
+        self.num_iterations = num_iterations
+        self.cache = cache
+        self.timeout_seconds = timeout_seconds
+        self.on_combination_done = on_combination_done
+        self.container_pool = container_pool
+        self.hedge = hedge
+        self.sampler = sampler
+        self._executors = {}
+        self._pool_sizes = {}
+        self._lock = threading.Lock()
+        self._callback_lock = threading.Lock()
+        self._all_finished = threading.Condition(self._lock)
+        self._unfinished = 0
+
+    def _executor(self, ai_model, use_code_interpreter):
+        key = (ai_model, use_code_interpreter)
+        with self._lock:
+            if key not in self._executors:
+                threads = MODEL_THREADS.get(ai_model, DEFAULT_MODEL_THREADS)
+                if use_code_interpreter:
+                    if self.container_pool is None:
+                        self.container_pool = get_container_pool(
+                            get_provider(ai_model).client
+                        )
+                    threads = min(threads, self.container_pool.size)
+                self._pool_sizes[key] = threads
+                provider = get_provider(ai_model)
+                provider.ensure_concurrency(
+                    sum(
+                        size
+                        for (model, _), size in self._pool_sizes.items()
+                        if get_provider(model) is provider
+                    )
+                )
+                self._executors[key] = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=threads, thread_name_prefix=f"sweep-{ai_model}"
+                )
+            return self._executors[key]
+
+    def _send(self, state, message, queued_at):
+        combo = state["combo"]
+        response = None
+        error = None
+        # Skip the request if another one of this combination already failed for good.
+        if state["error"] is None:
+            try:
+                if combo["run_code"]:
+                    response = request_pooled_response(
+                        message,
+                        combo["model"],
+                        self.container_pool,
+                        len(state["question_list"]),
+                        self.cache,
+                        self.timeout_seconds,
+                        queued_at=queued_at,
+                    )
+                else:
+                    response = request_response(
+                        message,
+                        combo["model"],
+                        False,
+                        None,
+                        len(state["question_list"]),
+                        self.cache,
+                        self.timeout_seconds,
+                        get_hedger(combo["model"]) if self.hedge else None,
+                        queued_at=queued_at,
+                    )
+            except Exception as e:
+                error = e
+
+        with self._lock:
+            if response is not None:
+                state["responses"].append(response)
+            if error is not None and state["error"] is None:
+                state["error"] = error
+            state["remaining"] -= 1
+            if state["remaining"]:
+                return
+        # The combination's last request is done, so this thread owns its state now.
+        self._continue(state, self._next_messages(state))
+
+    def _continue(self, state, messages):
+        if messages:
+            self._submit(state, messages)
+        else:
+            self._finish(state)
+
+    def _submit(self, state, messages):
+        combo = state["combo"]
+        executor = self._executor(combo["model"], combo["run_code"])
+        runner_metrics.record_submitted(len(messages))
+        for message in messages:
+            executor.submit(self._send, state, message, time.monotonic())
+
+    def _next_messages(self, state):
+        """
+        Called once none of a combination's requests are in flight.
+
+        Returns:
+            list: The messages to send next; empty once the combination is finished
+        """
+        combo = state["combo"]
+        question_list = state["question_list"]
+        while state["error"] is None and self.sampler is not None:
+            extra = self.sampler.request_more(
+                state["responses"], question_list[0]["answer"]
+            )
+            if not extra:
+                break
+            messages = build_messages(question_list, state["iterations"] + extra)
+            messages = messages[state["iterations"] * len(question_list) :]
+            state["iterations"] += extra
+            cached_responses, messages = split_cached_responses(
+                messages,
+                len(question_list),
+                combo["model"],
+                combo["run_code"],
+                self.cache,
+            )
+            state["responses"].extend(cached_responses)
+            if messages:
+                state["remaining"] += len(messages)
+                return messages
+        return []
+
+    def _finish(self, state):
+        combo = state["combo"]
+        if state["error"] is not None:
+            print(f"Error testing combination {combo}: {str(state['error'])}")
+            combo["ai_response"] = {"error": str(state["error"])}
+        else:
+            combo["ai_response"] = summarize_responses(
+                state["responses"], state["question_list"], None, verbose=False
+            )
+        if self.on_combination_done is not None:
+            # Serialized on a lock of its own, so a slow callback (a checkpoint fsync)
+            # doesn't stall the requests of other combinations.
+            with self._callback_lock:
+                try:
+                    self.on_combination_done(combo, state["question_list"][0])
+                except Exception as e:
+                    print(f"Error handling finished combination {combo}: {e}")
+        with self._lock:
+            self._unfinished -= 1
+            self._all_finished.notify_all()
+
+    def run(self, combinations, registry=None):
+        """
+        Runs all combinations and waits for them to finish.
+
+        Combinations are read from `combinations` one at a time, and the next one is only
+        read while fewer combinations are in flight than the model pools have worker
+        threads, so a lazy `QuestionGrid` is never held in memory as a whole. Each
+        combination gets its `ai_response` filled in and is passed to
+        `on_combination_done`.
+
+        Args:
+            combinations: Iterable of combination dicts, as yielded by `QuestionGrid`.
+            registry (QuestionRegistry, optional): Resolves `question_id` for combinations
+                that don't carry their question.
+
+        Returns:
+            int: The number of combinations run.
+        """
+        num_iterations = self.num_iterations
+        sized = hasattr(combinations, "__len__")
+        if self.sampler is not None:
+            # Without a length, the budget grows as combinations are scheduled.
+            self.sampler.start(len(combinations) if sized else 0, self.num_iterations)
+            num_iterations = min(self.sampler.min_iterations, self.num_iterations)
+        num_combinations = 0
+        models = set()
+        scheduled = 0
+        for combo in combinations:
+            num_combinations += 1
+            models.add(combo["model"])
+            if self.sampler is not None and not sized:
+                self.sampler.add_combinations(1)
+            if registry is not None:
+                question = registry[combo["question_id"]]
+            else:
+                question = combo["question"]
+            question_list = [question]
+            messages = build_messages(question_list, num_iterations)
+            cached_responses, messages = split_cached_responses(
+                messages,
+                len(question_list),
+                combo["model"],
+                combo["run_code"],
+                self.cache,
+            )
+            state = {
+                "combo": combo,
+                "question_list": question_list,
+                "responses": cached_responses,
+                "iterations": num_iterations,
+                "remaining": len(messages),
+                "error": None,
+            }
+            with self._lock:
+                self._unfinished += 1
+            if not messages:
+                messages = self._next_messages(state)
+            scheduled += len(messages)
+            self._continue(state, messages)
+            # Backpressure: wait for a free worker before reading the next combination.
+            with self._lock:
+                while self._unfinished >= max(sum(self._pool_sizes.values()), 1):
+                    self._all_finished.wait()
+
+        with self._lock:
+            pool_sizes = dict(self._pool_sizes)
+        print(
+            f"Scheduled {scheduled} requests for {num_combinations} combinations "
+            f"across {len(pool_sizes)} model pools"
+        )
+        with self._all_finished:
+            while self._unfinished:
+                self._all_finished.wait()
+        runner_metrics.end_progress()
+        if self.sampler is not None:
+            print(f"Sequential sampling: {self.sampler.stats()}")
+        if self.hedge:
+            for ai_model in models:
+                print(f"Hedging {ai_model}: {get_hedger(ai_model).stats()}")
+        return num_combinations
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown()
+        self._executors.clear()
+        self._pool_sizes.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
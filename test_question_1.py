@@ -1,88 +1,84 @@
 import run_ai_tests as test
-from generate_questions import get_question_1
 from ai_models import *
+from answer_cache import enable_answer_cache
+from question_grid import QuestionGrid, QuestionRegistry
+from response_cache import ResponseCache
+from checkpoint import (
+    CheckpointWriter,
+    combination_key,
+    compact_checkpoint,
+    finished_combination_keys,
+    strip_question_copies,
+)
+from sweep_scheduler import SweepScheduler
+from adaptive_sampling import SequentialSampler
+from runner_metrics import runner_metrics
+from work_queue import WorkQueue
 import json
 import logging
 import time
 
-
 output_file = "test_results_question_123.json"
-
-
-def generate_test_combinations(
-    interest_rates, loan_amounts, loan_terms, code_capable_models, non_code_models
-):
-    test_combinations = []
-
-    for model in code_capable_models:
-        for rate in interest_rates:
-            for amount in loan_amounts:
-                for term in loan_terms:
-                    test_combinations.append(
-                        {
-                            "model": model,
-                            "interest_rate": rate,
-                            "loan_amount": amount,
-                            "loan_term": term,
-                            "run_code": True,
-                        }
-                    )
-
-                    test_combinations.append(
-                        {
-                            "model": model,
-                            "interest_rate": rate,
-                            "loan_amount": amount,
-                            "loan_term": term,
-                            "run_code": False,
-                        }
-                    )
-
-    for model in non_code_models:
-        for rate in interest_rates:
-            for amount in loan_amounts:
-                for term in loan_terms:
-                    test_combinations.append(
-                        {
-                            "model": model,
-                            "interest_rate": rate,
-                            "loan_amount": amount,
-                            "loan_term": term,
-                            "run_code": False,
-                        }
-                    )
-
-    for combo in test_combinations:
-        combo["question"] = get_question_1(
-            combo["loan_amount"],
-            combo["interest_rate"],
-            combo["loan_term"],
+metrics_file = "runner_metrics_question_123"
+checkpoint_file = "test_results_question_123.jsonl"
+# Set to a file name to hand the sweep to `python work_queue.py worker <file>` processes
+# instead of running it here.
+work_queue_file = None
+# Continue an interrupted sweep: combinations the checkpoint already holds a result for
+# are skipped. Otherwise the checkpoint is started over.
+resume_sweep = False
+# Stop asking combinations whose accuracy is already settled and spend the saved
+# iterations on uncertain ones (in-process sweeps only).
+adaptive_sampling = False
+# Set to a file name (such as "ai_response_cache.sqlite3") to reuse the responses to
+# identical requests across runs instead of asking the models again.
+response_cache_file = None
+response_cache = ResponseCache(response_cache_file) if response_cache_file else None
+
+
+def run_tests_in_work_queue(combinations, registry=None):
+    # Workers can run in other processes, or on other hosts via `python work_queue.py serve`.
+    queue = WorkQueue(work_queue_file)
+    added = queue.enqueue(combinations, registry, num_iterations=5)
+    print(
+        f"Queued {added} requests in {work_queue_file}; start workers with "
+        f"`python work_queue.py worker {work_queue_file}`"
+    )
+    queue.wait()
+    written = queue.write_checkpoint(checkpoint_file)
+    queue.close()
+    print(f"Collected {written} combinations from {work_queue_file}")
+
+
+def run_tests_for_combinations(combinations, registry=None):
+    if resume_sweep:
+        finished = finished_combination_keys(checkpoint_file)
+        print(f"Resuming {checkpoint_file}: skipping {len(finished)} combinations")
+        combinations = (
+            combo for combo in combinations if combination_key(combo) not in finished
         )
+    checkpoint = CheckpointWriter(checkpoint_file, resume=resume_sweep)
 
-    return test_combinations
-
-
-def run_tests_for_combinations(combinations):
-    for combo in combinations:
+    def write_checkpoint(combo, question):
+        if registry is not None:
+            combo["ai_response"] = strip_question_copies(combo["ai_response"])
         try:
-            ai_response = test.run_ai_tests(
-                [combo["question"]],
-                num_iterations=5,
-                ai_model=combo["model"],
-                use_code_interpreter=combo["run_code"],
-                output_file=None,
-            )
+            if registry is not None:
+                checkpoint.write_question(combo["question_id"], question)
+            checkpoint.write_combination(combo)
         except Exception as e:
-            print(f"Error testing combination {combo}: {str(e)}")
-            ai_response = {"error": str(e)}
-        combo["ai_response"] = ai_response
-        try:
-            with open(output_file, "w") as f:
-                json.dump(combinations, f, indent=4)
-            print(f"Results written to {output_file}")
-        except Exception as e:
-            print(f"Error writing results to {output_file}: {e}")
-    return combinations
+            print(f"Error writing checkpoint to {checkpoint_file}: {e}")
+
+    # Every combo's iterations go into one queue, filling each model's slots independently.
+    with SweepScheduler(
+        num_iterations=5,
+        cache=response_cache,
+        on_combination_done=write_checkpoint,
+        sampler=SequentialSampler() if adaptive_sampling else None,
+    ) as scheduler:
+        completed = scheduler.run(combinations, registry)
+    checkpoint.close()
+    return completed
 
 
 # interest_rates = list(range(1, 11))
@@ -100,18 +96,35 @@ code_capable_models = [
 non_code_models = [AIModels.O4_MINI.value]
 
 
-combinations = generate_test_combinations(
-    interest_rates, loan_amounts, loan_terms, code_capable_models, non_code_models
+answer_cache = enable_answer_cache(maxsize=4096)
+question_registry = QuestionRegistry()
+combinations = QuestionGrid(
+    interest_rates,
+    loan_amounts,
+    loan_terms,
+    code_capable_models,
+    non_code_models,
+    registry=question_registry,
 )
+print(f"Running {len(combinations)} combinations")
 
 start_time = time.time()
-combinations_with_ai = run_tests_for_combinations(combinations)
+if work_queue_file:
+    run_tests_in_work_queue(combinations, question_registry)
+else:
+    run_tests_for_combinations(combinations, question_registry)
 end_time = time.time()
 print(f"Total time to run: {end_time - start_time:.2f} seconds")
+print(f"Unique questions: {len(question_registry)}")
+print(f"Answer cache: {answer_cache.stats()}")
+if response_cache is not None:
+    print(f"Response cache: {response_cache.stats()}")
+runner_metrics.write_json(f"{metrics_file}.json")
+runner_metrics.write_csv(f"{metrics_file}.csv")
+print(f"Runner metrics written to {metrics_file}.json and {metrics_file}.csv")
 
 try:
-    with open(output_file, "w") as f:
-        json.dump(combinations_with_ai, f, indent=4)
+    compact_checkpoint(checkpoint_file, output_file)
     print(f"Results written to {output_file}")
 except Exception as e:
     print(f"Error writing results to {output_file}: {e}")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The runners need an API key at import time; the tests only talk to the mock server.
+os.environ.setdefault("OPENAI_API_KEY", "mock")
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from amortization import (
+    AmortizationSchedule,
+    calculate_prepayment_batch,
+    prepayment_balance_path,
+)
+from answers import calculate_monthly_payment, calculate_remaining_balance
+from generate_questions import get_question_2
+
+
+@pytest.mark.parametrize("years_elapsed", [2.54, 2.5, 5, 1 / 12])
+def test_remaining_balance_matches_closed_form(years_elapsed):
+    schedule = AmortizationSchedule(300000, 6.5, 30)
+    expected = calculate_remaining_balance(300000, 6.5, 30, years_elapsed)
+
+    assert schedule.remaining_balance(years_elapsed) == pytest.approx(expected)
+    assert get_question_2(300000, 6.5, 30, years_elapsed, schedule=schedule) == (
+        get_question_2(300000, 6.5, 30, years_elapsed)
+    )
+
+
+def test_zero_rate_schedule_pays_down_principal_evenly():
+    schedule = AmortizationSchedule(360000, 0, 30)
+
+    assert schedule.payment == pytest.approx(1000)
+    assert schedule.balance == pytest.approx(360000 - 1000 * np.arange(361))
+    assert schedule.interest_principal_payment(12) == pytest.approx((0, 1000))
+    assert schedule.year(30)["cumulative_interest"] == 0
+    assert schedule.remaining_balance(2.54) == pytest.approx(
+        calculate_remaining_balance(360000, 0, 30, 2.54)
+    )
+
+
+def simulate_prepayment(
+    principal,
+    annual_interest_rate,
+    loan_term_years,
+    extra_monthly=0,
+    lump_sum=0,
+    lump_sum_month=0,
+):
+    """
+    Steps through the loan one payment at a time.
+
+    Returns:
+        Tuple of (payoff month, total interest, balance after each month)
+    """
+    monthly_interest_rate = annual_interest_rate / 12 / 100
+    payment = (
+        calculate_monthly_payment(principal, annual_interest_rate, loan_term_years)
+        + extra_monthly
+    )
+    balance = principal
+    if lump_sum_month == 0:
+        balance -= min(lump_sum, balance)
+    balances = [balance]
+    total_interest = 0.0
+    month = 0
+    while balance > 1e-6:
+        month += 1
+        interest = balance * monthly_interest_rate
+        total_interest += interest
+        balance -= min(payment, balance + interest) - interest
+        if month == lump_sum_month:
+            balance -= min(lump_sum, balance)
+        balances.append(balance)
+    return month, total_interest, balances
+
+
+PREPAYMENTS = {
+    "recurring": {"extra_monthly": 200},
+    "lump_sum": {"lump_sum": 25000, "lump_sum_month": 60},
+    "lump_sum_up_front": {"lump_sum": 25000},
+    "combined": {"extra_monthly": 150, "lump_sum": 40000, "lump_sum_month": 24},
+    "lump_sum_overpays": {"lump_sum": 10**6, "lump_sum_month": 12},
+    "extra_overpays": {"extra_monthly": 10**6},
+}
+
+
+@pytest.mark.parametrize("annual_interest_rate", [6.5, 0])
+@pytest.mark.parametrize("prepayment", PREPAYMENTS.values(), ids=PREPAYMENTS.keys())
+def test_prepayment_matches_month_by_month_simulation(annual_interest_rate, prepayment):
+    principal, loan_term_years = 360000, 30
+    payoff_month, total_interest, balances = simulate_prepayment(
+        principal, annual_interest_rate, loan_term_years, **prepayment
+    )
+    original_interest = simulate_prepayment(
+        principal, annual_interest_rate, loan_term_years
+    )[1]
+
+    result = calculate_prepayment_batch(
+        principal, annual_interest_rate, loan_term_years, **prepayment
+    )
+    assert result["payoff_month"] == payoff_month
+    assert result["months_saved"] == loan_term_years * 12 - payoff_month
+    assert result["total_interest"] == pytest.approx(total_interest, abs=1e-6)
+    assert result["interest_saved"] == pytest.approx(
+        original_interest - total_interest, abs=1e-6
+    )
+
+    path = prepayment_balance_path(
+        principal, annual_interest_rate, loan_term_years, **prepayment
+    )
+    assert path[: len(balances)] == pytest.approx(balances, abs=1e-6)
+    assert not path[len(balances) :].any()
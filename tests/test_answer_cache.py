@@ -0,0 +1,40 @@
+import numpy as np
+
+from answer_cache import AnswerCache, disable_answer_cache, enable_answer_cache
+from answers import calculate_monthly_payment
+
+
+def test_answer_cache_evicts_least_recently_used():
+    cache = AnswerCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_answer_cache_normalizes_keys():
+    cache = AnswerCache()
+    key = cache.make_key("f", (2, True), {"rate": 6.5})
+
+    assert cache.make_key("f", (2.0, np.bool_(True)), {"rate": 6.5}) == key
+    assert (
+        cache.make_key("f", (np.float64(2.0000000000001), True), {"rate": 6.5}) == key
+    )
+    assert cache.make_key("f", (2.001, True), {"rate": 6.5}) != key
+    assert cache.make_key("f", (np.array([2.0]), True), {"rate": 6.5}) is None
+
+
+def test_memoized_answers_hit_the_active_cache():
+    cache = enable_answer_cache()
+    try:
+        payment = calculate_monthly_payment(300000, 6.5, 30)
+        assert calculate_monthly_payment(300000.0, np.float64(6.5), 30) == payment
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    finally:
+        disable_answer_cache()
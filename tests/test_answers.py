@@ -0,0 +1,98 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from answers import (
+    calculate_interest_principal_payment,
+    calculate_interest_principal_payment_batch,
+    calculate_monthly_payment,
+    calculate_monthly_payment_batch,
+    calculate_remaining_balance,
+    calculate_remaining_balance_batch,
+    find__better_loan_option,
+    find__better_loan_option_batch,
+)
+
+RATES = [0, 2.5, 7]
+
+
+@pytest.mark.parametrize("rate", RATES)
+def test_scalar_and_batch_agree(rate):
+    rates = np.array(RATES, dtype=float)
+    index = RATES.index(rate)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        payment = calculate_monthly_payment(300000, rate, 30)
+        balance = calculate_remaining_balance(300000, rate, 30, 2.5)
+        breakdown = calculate_interest_principal_payment(300000, rate, 30, 31)
+        payments = calculate_monthly_payment_batch(300000, rates, 30)
+        balances = calculate_remaining_balance_batch(300000, rates, 30, 2.5)
+        interest, principal = calculate_interest_principal_payment_batch(
+            300000, rates, 30, 31
+        )
+        difference = find__better_loan_option(200000, rate, 50000, 8, 250000, 6, 30)
+        differences = find__better_loan_option_batch(
+            200000, rates, 50000, 8, 250000, 6, 30
+        )
+
+    assert type(payment) is float and type(balance) is float
+    assert type(difference) is float
+    assert payment == pytest.approx(payments[index])
+    assert balance == pytest.approx(balances[index])
+    assert breakdown == pytest.approx((interest[index], principal[index]))
+    assert difference == pytest.approx(differences[index])
+
+
+def test_scalar_matches_batch_on_random_loans():
+    rng = np.random.default_rng(0)
+    principal = rng.uniform(50000, 1500000, 200)
+    rate = np.round(rng.uniform(0, 12, 200), 2)
+    rate[::10] = 0
+    term = rng.choice([10, 15, 20, 30], 200)
+    years_elapsed = np.trunc(rng.uniform(0, 1, 200) * term)
+    month_number = years_elapsed * 12 + 1
+
+    payments = calculate_monthly_payment_batch(principal, rate, term)
+    balances = calculate_remaining_balance_batch(principal, rate, term, years_elapsed)
+    interest, principal_paid = calculate_interest_principal_payment_batch(
+        principal, rate, term, month_number
+    )
+    differences = find__better_loan_option_batch(
+        principal * 0.8, rate, principal * 0.2, rate + 1, principal, rate + 0.5, term
+    )
+    for index in range(200):
+        args = (float(principal[index]), float(rate[index]), int(term[index]))
+        assert calculate_monthly_payment(*args) == pytest.approx(payments[index])
+        assert calculate_remaining_balance(
+            *args, float(years_elapsed[index])
+        ) == pytest.approx(balances[index], abs=1e-6)
+        assert calculate_interest_principal_payment(
+            *args, float(month_number[index])
+        ) == pytest.approx((interest[index], principal_paid[index]), abs=1e-6)
+        assert find__better_loan_option(
+            args[0] * 0.8,
+            args[1],
+            args[0] * 0.2,
+            args[1] + 1,
+            args[0],
+            args[1] + 0.5,
+            args[2],
+        ) == pytest.approx(differences[index], abs=1e-6)
+
+
+def test_zero_rate_repays_principal_in_equal_installments():
+    assert calculate_monthly_payment(360000, 0, 30) == 1000
+    assert calculate_remaining_balance(360000, 0, 30, 10) == 240000
+    assert calculate_interest_principal_payment(360000, 0, 30, 121) == (0, 1000)
+
+
+def test_array_arguments_use_the_batch_kernels():
+    payments = calculate_monthly_payment([300000, 400000], 6, 30)
+    assert isinstance(payments, np.ndarray)
+    assert payments == pytest.approx(
+        [
+            calculate_monthly_payment(300000, 6, 30),
+            calculate_monthly_payment(400000, 6, 30),
+        ]
+    )
@@ -0,0 +1,42 @@
+import json
+
+from batch_runner import parse_batch_line
+
+
+def batch_line(text, index=3):
+    return json.dumps(
+        {
+            "custom_id": f"question-{index}",
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "output": [
+                        {
+                            "type": "message",
+                            "content": [{"type": "output_text", "text": text}],
+                        }
+                    ],
+                    "usage": {"input_tokens": 120, "output_tokens": 30},
+                },
+            },
+        }
+    )
+
+
+def test_parses_output():
+    output, usage, index = parse_batch_line(
+        batch_line('{"final_answer": "1896.20", "explanation": "Amortized."}')
+    )
+
+    assert output.final_answer == "1896.20"
+    assert usage == {"input_tokens": 120, "output_tokens": 30}
+    assert index == 3
+
+
+def test_malformed_output_keeps_usage():
+    for text in ['{"final_answer": "1896.20"', '{"explanation": "No answer."}']:
+        assert parse_batch_line(batch_line(text)) == (
+            None,
+            {"input_tokens": 120, "output_tokens": 30},
+            3,
+        )
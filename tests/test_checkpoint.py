@@ -0,0 +1,77 @@
+import gzip
+import os
+
+import pytest
+
+from checkpoint import (
+    CheckpointWriter,
+    finished_combination_keys,
+    load_checkpoint,
+    combination_key,
+)
+
+
+def combo(index):
+    return {
+        "model": "gpt-4o",
+        "interest_rate": index,
+        "loan_amount": 300000,
+        "loan_term": 30,
+        "run_code": False,
+        "ai_response": [],
+    }
+
+
+def truncate_mid_record(path):
+    size = os.path.getsize(path)
+    with open(path, "rb+") as f:
+        f.truncate(size - 20)
+
+
+@pytest.mark.parametrize("name", ["checkpoint.jsonl", "checkpoint.jsonl.gz"])
+def test_resume_after_truncated_record(tmp_path, name):
+    path = str(tmp_path / name)
+    with CheckpointWriter(path, fsync=False) as writer:
+        writer.write_combination(combo(1))
+        writer.write_combination(combo(2))
+    truncate_mid_record(path)
+
+    with CheckpointWriter(path, fsync=False, resume=True) as writer:
+        writer.write_combination(combo(3))
+        writer.write_combination(combo(4))
+
+    rates = [record["interest_rate"] for record in load_checkpoint(path)]
+    assert rates[-2:] == [3, 4]
+    assert rates[0] == 1
+
+
+def test_truncated_gzip_loads_readable_prefix(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl.gz")
+    with CheckpointWriter(path, fsync=False) as writer:
+        for index in range(50):
+            writer.write_combination(combo(index))
+    truncate_mid_record(path)
+
+    records = load_checkpoint(path)
+    assert [record["interest_rate"] for record in records] == list(range(len(records)))
+
+
+def test_new_sweep_starts_the_checkpoint_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    with CheckpointWriter(path, fsync=False) as writer:
+        writer.write_combination(combo(1))
+    with CheckpointWriter(path, fsync=False) as writer:
+        writer.write_combination(combo(2))
+
+    assert [record["interest_rate"] for record in load_checkpoint(path)] == [2]
+
+
+def test_resume_skips_only_finished_combinations(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    failed = {**combo(2), "ai_response": {"error": "timeout"}}
+    with CheckpointWriter(path, fsync=False) as writer:
+        writer.write_combination(combo(1))
+        writer.write_combination(failed)
+        writer.write_question("q", {"content": "How much?"})
+
+    assert finished_combination_keys(path) == {combination_key(combo(1))}
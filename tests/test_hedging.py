@@ -0,0 +1,87 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from hedging import Hedger, call_with_hedging
+
+
+def warmed_up_hedger():
+    hedger = Hedger(min_samples=1, max_extra_fraction=1.0, min_delay=0.05)
+    hedger.record_latency(0.05)
+    return hedger
+
+
+class Calls:
+    """
+    A coroutine function whose first call waits for the second one to start, then hangs
+    or, with `hang=False`, finishes right after it.
+    """
+
+    def __init__(self, hang=True):
+        self.hang = hang
+        self.count = 0
+        self.cancelled = threading.Event()
+        self.hedge_started = None
+
+    async def __call__(self, answer):
+        self.count += 1
+        if self.count == 1:
+            self.hedge_started = asyncio.Event()
+            try:
+                await self.hedge_started.wait()
+                if self.hang:
+                    await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled.set()
+                raise
+            return "primary"
+        self.hedge_started.set()
+        return answer
+
+
+def test_losing_call_is_cancelled():
+    calls = Calls()
+    hedger = warmed_up_hedger()
+
+    assert call_with_hedging(calls, {"answer": "hedge"}, 5, hedger) == "hedge"
+    assert calls.cancelled.wait(timeout=5)
+    assert hedger.stats()["hedges_won"] == 1
+
+
+def test_hedge_needs_rate_limiter_budget():
+    calls = Calls()
+    hedger = warmed_up_hedger()
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        call_with_hedging(
+            calls, {"answer": "hedge"}, 0.3, hedger, acquire_hedge=lambda: False
+        )
+    assert calls.count == 1
+    assert hedger.stats()["hedges_fired"] == 0
+
+
+def test_loser_that_finishes_is_reported():
+    calls = Calls(hang=False)
+    losers = []
+
+    winner = call_with_hedging(
+        calls, {"answer": "hedge"}, 5, warmed_up_hedger(), on_loser=losers.append
+    )
+    assert sorted([winner, *losers]) == ["hedge", "primary"]
+
+
+def test_timeout_counts_from_call_start():
+    cancelled = threading.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        call_with_hedging(hang, {}, 0.1)
+    assert cancelled.wait(timeout=5)
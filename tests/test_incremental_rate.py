@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+from answers import calculate_monthly_payment, find_incremental_rate_batch
+
+# (principal_1, interest_rate_1, term, principal_2, interest_rate_2)
+SCENARIOS = [
+    (300000, 4, 30, 350000, 4.5),
+    (200000, 6.5, 15, 260000, 7),
+    (450000, 3, 30, 500000, 3),
+    (350000, 5.25, 20, 300000, 5),
+]
+
+
+def reference_rate(principal_1, interest_rate_1, term, principal_2, interest_rate_2):
+    """
+    The incremental rate found by scipy's Brent solver on a wide bracket.
+    """
+    incremental_principal = principal_2 - principal_1
+    incremental_payment = calculate_monthly_payment(
+        principal_2, interest_rate_2, term
+    ) - calculate_monthly_payment(principal_1, interest_rate_1, term)
+
+    def payment_difference(rate_percent):
+        return (
+            calculate_monthly_payment(incremental_principal, rate_percent, term)
+            - incremental_payment
+        )
+
+    return optimize.brentq(payment_difference, -600, 1000, xtol=1e-10)
+
+
+def solve(scenarios, **options):
+    return find_incremental_rate_batch(*np.array(scenarios).T, **options)
+
+
+def test_newton_matches_scipy():
+    rate, converged, used_bracketing = solve(SCENARIOS)
+
+    assert converged.all() and not used_bracketing.any()
+    assert rate == pytest.approx(
+        [reference_rate(*scenario) for scenario in SCENARIOS], abs=1e-6
+    )
+
+
+@pytest.mark.parametrize("options", [{"maxiter": 1}, {"initial_guess": -1100}])
+def test_bisection_fallback_matches_scipy(options):
+    rate, converged, used_bracketing = solve(SCENARIOS, **options)
+
+    assert converged.all() and used_bracketing.all()
+    assert rate == pytest.approx(
+        [reference_rate(*scenario) for scenario in SCENARIOS], abs=1e-6
+    )
+
+
+def test_no_root_is_nan():
+    # Borrowing $10,000 more costs less per month, which no rate explains.
+    no_root = (300000, 7, 30, 310000, 3)
+    with pytest.raises(ValueError):
+        reference_rate(*no_root)
+
+    rate, converged, used_bracketing = solve([SCENARIOS[0], no_root])
+
+    assert np.isnan(rate[1]) and not converged[1] and used_bracketing[1]
+    assert rate[0] == pytest.approx(reference_rate(*SCENARIOS[0]), abs=1e-6)
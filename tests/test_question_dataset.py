@@ -0,0 +1,74 @@
+import pytest
+
+from generate_questions import get_questions_list
+from parallel_generation import (
+    ScenarioGrid,
+    _shard,
+    generate_question_dataset,
+    generate_questions_parallel,
+)
+from question_dataset import (
+    iter_question_batches,
+    read_question_dataset,
+    write_question_dataset,
+)
+
+SCENARIOS = ScenarioGrid(
+    principal_1=[200000, 300000],
+    interest_rate_1=[3, 4.5],
+    term_1=[15, 30],
+    years_elapsed_1=[5],
+    month_number_1=[12],
+    principal_2=[450000],
+    interest_rate_2=[5.5],
+    term_2=[30],
+    years_elapsed_2=[5],
+    extra_amount=[200],
+    penalty_rate=[2],
+    fees=[3000],
+    out_of_pocket=[True],
+    principal_a2=[50000],
+    rate_a2=[7],
+    principal_b=[350000],
+    rate_b=[5.25],
+)
+
+
+@pytest.mark.parametrize("name", ["questions.parquet", "questions.arrow"])
+def test_iter_question_batches_streams_every_question(tmp_path, name):
+    path = str(tmp_path / name)
+    num_questions = write_question_dataset(path, SCENARIOS, batch_size=7)
+
+    batches = list(iter_question_batches(path, batch_size=5))
+    table = read_question_dataset(path, columns=["role", "content", "answer"])
+
+    assert all(len(batch) <= 5 for batch in batches)
+    assert [question for batch in batches for question in batch] == table.to_pylist()
+    assert table.num_rows == num_questions
+
+    first_types = list(iter_question_batches(path, batch_size=5, question_types=[1]))
+    assert sum(len(batch) for batch in first_types) == len(SCENARIOS)
+
+
+@pytest.mark.parametrize("as_list", [False, True])
+def test_parallel_generation_matches_single_process(tmp_path, as_list):
+    scenarios = list(SCENARIOS) if as_list else SCENARIOS
+    single_path = str(tmp_path / "single.arrow")
+    parallel_path = str(tmp_path / "parallel.arrow")
+    write_question_dataset(single_path, SCENARIOS)
+
+    generate_question_dataset(parallel_path, scenarios, num_workers=2, num_shards=3)
+
+    assert read_question_dataset(parallel_path).equals(
+        read_question_dataset(single_path)
+    )
+    assert generate_questions_parallel(scenarios, num_workers=2, num_shards=3) == [
+        get_questions_list(**scenario) for scenario in SCENARIOS
+    ]
+
+
+def test_workers_get_only_their_shard_of_a_list():
+    scenarios = list(SCENARIOS)
+
+    assert _shard(scenarios, 2, 5) == (scenarios[2:5], 2)
+    assert _shard(SCENARIOS, 2, 5) == (SCENARIOS, 0)
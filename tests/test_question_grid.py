@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+
+from question_grid import QuestionGrid, QuestionRegistry
+
+
+def describe(amount, rate, term):
+    return {"content": f"{amount} {rate} {term}", "answer": 0}
+
+
+def test_registry_builds_each_question_once():
+    calls = []
+
+    def question_function(amount, rate, term):
+        calls.append((amount, rate, term))
+        return describe(amount, rate, term)
+
+    registry = QuestionRegistry(question_function)
+    question_id = registry.register(300000, 2, 30)
+
+    assert question_id == "question_function:300000:2:30"
+    assert registry.register(300000.0, 2.0, np.int64(30)) == question_id
+    assert registry.register(300000, np.float64(2), 30.0) == question_id
+    assert registry.register(300000, 2.5, 30) == "question_function:300000:2.5:30"
+    assert calls == [(300000, 2, 30), (300000, 2.5, 30)]
+    assert len(registry) == 2
+    assert registry[question_id] == describe(300000, 2, 30)
+
+
+def test_decode_orders_by_model_rate_amount_term_and_run_code():
+    rates, amounts, terms = [2, 4, 6], [300000, 700000], [15, 30]
+    code_models, non_code_models = ["code-a", "code-b"], ["plain"]
+    grid = QuestionGrid(rates, amounts, terms, code_models, non_code_models, describe)
+
+    expected = list(
+        itertools.product(code_models, rates, amounts, terms, [True, False])
+    ) + [
+        (model, rate, amount, term, False)
+        for model, rate, amount, term in itertools.product(
+            non_code_models, rates, amounts, terms
+        )
+    ]
+    assert len(grid) == len(expected)
+    assert [grid._decode(index) for index in range(len(grid))] == expected
+    assert grid[-1]["question"] == describe(700000, 6, 30)
+
+
+def test_registry_grid_shares_questions_across_models():
+    registry = QuestionRegistry(describe)
+    grid = QuestionGrid([2, 4], [300000], [30], ["code"], ["plain"], registry=registry)
+
+    question_ids = [combo["question_id"] for combo in grid]
+    assert len(question_ids) == 6
+    assert len(registry) == 2
+    assert all("question" not in combo for combo in grid)
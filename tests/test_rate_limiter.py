@@ -0,0 +1,88 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # Like a real sleep, always lets some time pass, even for a rounding-error wait.
+        self.now += max(seconds, 1e-6)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=5)
+    bucket.consume(5)
+
+    assert bucket.time_until_available(2, clock.now) == pytest.approx(2)
+    assert bucket.time_until_available(2, clock.now + 2) == 0
+    assert bucket.time_until_available(1, clock.now + 600) == 0
+    assert bucket.tokens == 5
+
+    # A request bigger than the bucket waits for a full bucket, then leaves it in debt.
+    assert bucket.time_until_available(50, clock.now + 600) == 0
+    bucket.consume(50)
+    assert bucket.time_until_available(1, clock.now + 600) == pytest.approx(46)
+
+
+def test_rate_limit_backs_off_and_pauses(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+
+    limiter.record_rate_limit(retry_after=3)
+    assert limiter.stats()["rate_fraction"] == 0.5
+    assert limiter.stats()["requests_per_minute"] == 300
+    assert not limiter.try_acquire(100)
+    assert limiter.acquire(100) == pytest.approx(3, abs=1e-5)
+
+    for _ in range(10):
+        limiter.record_rate_limit()
+    assert limiter.stats()["rate_fraction"] == limiter.min_rate_fraction
+    assert limiter.stats()["rate_limited_count"] == 11
+
+
+def test_resumes_at_the_lowered_rate_without_a_burst(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=10**9)
+
+    limiter.record_rate_limit()
+    waits = [limiter.acquire() for _ in range(5)]
+
+    # 300 requests per minute is one every 0.2 seconds, starting from an empty bucket.
+    assert waits == pytest.approx([0.2] * 5, abs=1e-5)
+
+
+def test_success_raises_the_rate_back_additively(clock):
+    limiter = AdaptiveRateLimiter(
+        requests_per_minute=600, tokens_per_minute=60000, increase_per_second=0.02
+    )
+    limiter.record_rate_limit()
+
+    clock.sleep(10)
+    limiter.record_success()
+    assert limiter.stats()["rate_fraction"] == pytest.approx(0.7)
+
+    clock.sleep(60)
+    limiter.record_success()
+    assert limiter.stats()["rate_fraction"] == 1.0
+    assert limiter.stats()["tokens_per_minute"] == 60000
+
+
+def test_success_settles_the_token_estimate(clock):
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+
+    assert limiter.try_acquire(1000)
+    assert not limiter.try_acquire(1000)
+    limiter.record_success(used_tokens=200, estimated_tokens=1000)
+    assert limiter.try_acquire(800)
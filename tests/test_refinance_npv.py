@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from scipy import optimize
+
+from answers import (
+    calculate_refinance_npv,
+    calculate_refinance_npv_batch,
+    calculate_refinance_npv_closed_form,
+    find_break_even_refinance_rate_batch,
+)
+from generate_questions import get_question_6
+
+
+def random_scenarios(num_scenarios=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(100000, 2000000, num_scenarios).round(-3),
+        rng.choice([15, 20, 30], num_scenarios),
+        rng.choice([0, 1.5, 3.25, 6, 9.9], num_scenarios),
+        # Whole, half and arbitrary fractional years.
+        rng.choice([0, 5, 2.5, 7.25, 2.54, 13.9], num_scenarios),
+        rng.choice([10, 15, 20, 30], num_scenarios),
+        rng.choice([0, 0.5, 2.75, 5, 10], num_scenarios),
+        rng.integers(0, 5, num_scenarios),
+        rng.uniform(0, 10000, num_scenarios).round(),
+        rng.random(num_scenarios) < 0.5,
+    )
+
+
+def test_closed_form_agrees_with_cash_flows_to_the_cent():
+    scenarios = random_scenarios()
+    cash_flow_npv = np.array(
+        [calculate_refinance_npv(*scenario) for scenario in zip(*scenarios)]
+    )
+    closed_form_npv = calculate_refinance_npv_batch(*scenarios)
+
+    np.testing.assert_array_equal(
+        np.round(closed_form_npv, 2), np.round(cash_flow_npv, 2)
+    )
+
+
+@pytest.mark.parametrize("years_elapsed", [0, 2.54, 12.5])
+@pytest.mark.parametrize("rate_1, rate_2", [(0, 4), (5, 0), (0, 0), (6.5, 4.25)])
+def test_question_6_answer(rate_1, rate_2, years_elapsed):
+    scenario = (400000, 30, rate_1, years_elapsed, 15, rate_2, 2, 3000, False)
+
+    answer = get_question_6(*scenario)["answer"]
+    assert answer == round(calculate_refinance_npv_closed_form(*scenario), 2)
+    assert answer == round(calculate_refinance_npv(*scenario), 2)
+
+
+# (principal, term_1, rate_1, years_elapsed, term_2, penalty_rate, fee, out_of_pocket)
+BREAK_EVEN_SCENARIOS = [
+    (300000, 30, 6, 5, 15, 2, 3000, True),
+    (300000, 30, 4, 25, 30, 2, 3000, False),
+    (500000, 15, 7.5, 2.5, 30, 0, 0, True),
+]
+
+
+def test_break_even_rate_matches_scipy():
+    rates = find_break_even_refinance_rate_batch(*np.array(BREAK_EVEN_SCENARIOS).T)
+
+    for rate, (*loan, term_2, penalty_rate, fee, out_of_pocket) in zip(
+        rates, BREAK_EVEN_SCENARIOS
+    ):
+        expected = optimize.brentq(
+            lambda rate_2: calculate_refinance_npv(
+                *loan, term_2, rate_2, penalty_rate, fee, out_of_pocket
+            ),
+            0.01,
+            100,
+            xtol=1e-10,
+        )
+        assert rate == pytest.approx(expected, abs=1e-6)
+
+
+def test_break_even_rate_is_nan_without_a_sign_change():
+    # A 10-year loan replacing 30 remaining years: the NPV first falls, then rises with
+    # the rate, but stays negative.
+    scenario = (300000, 30, 6, 0, 10, 2, 3000, True)
+    npv = calculate_refinance_npv_batch(
+        *scenario[:5], np.linspace(0.01, 100, 50), 2, 3000
+    )
+    assert (npv < 0).all() and not (np.diff(npv) < 0).all()
+
+    rates = find_break_even_refinance_rate_batch(
+        *np.array([scenario, BREAK_EVEN_SCENARIOS[0]]).T
+    )
+    assert np.isnan(rates[0]) and np.isfinite(rates[1])
@@ -0,0 +1,48 @@
+import run_ai_tests
+from response_cache import CachedUsage, ResponseCache
+from runner_benchmarks import mock_api, mock_models
+
+USAGE = {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120}
+
+
+def test_response_cache_persists_hits(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    key = ResponseCache.make_key("gpt-4o", "Be exact.", False, "How much?", 0)
+    cache = ResponseCache(path)
+    assert cache.get(key) is None
+    cache.put(key, "gpt-4o", "How much?", 0, "1896.20", "Amortized.", USAGE)
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get(key) == ("1896.20", "Amortized.", USAGE)
+    assert (
+        cache.get(ResponseCache.make_key("gpt-4o", "Be exact.", True, "How much?", 0))
+        is None
+    )
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+    cache.close()
+
+
+def test_cached_rerun_reports_no_spent_tokens(tmp_path, capsys):
+    questions = [
+        {"role": "user", "content": f"Mock question {index}?", "answer": 0}
+        for index in range(3)
+    ]
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    with mock_models("mock-cache", 1) as (model,), mock_api() as server:
+        first = run_ai_tests.run_ai_tests(questions, 2, model, None, cache=cache)
+        capsys.readouterr()
+        requests_sent = server.stats()["responses_served"]
+        rerun = run_ai_tests.run_ai_tests(questions, 2, model, None, cache=cache)
+        assert server.stats()["responses_served"] == requests_sent
+    cache.close()
+
+    output = capsys.readouterr().out
+    assert "Total tokens: 0" in output
+    assert "Cached responses: 6" in output
+    assert not any(result["cached"] for result in first)
+    assert all(result["cached"] for result in rerun)
+    assert [result["usage"] for result in rerun] == [
+        result["usage"] for result in first
+    ]
+    assert not isinstance(rerun[0]["usage"], CachedUsage)
@@ -0,0 +1,76 @@
+import pytest
+
+import sweep_scheduler
+from adaptive_sampling import SequentialSampler
+from ai_models import MODEL_RATE_LIMITS
+from providers import PROVIDERS, Provider, get_provider
+from question_grid import QuestionGrid, QuestionRegistry
+from runner_benchmarks import (
+    MOCK_RATE_LIMITS,
+    mock_api,
+    mock_models,
+    registered_provider,
+)
+from sweep_scheduler import SweepScheduler
+
+POOL_THREADS = 2
+
+
+@pytest.mark.parametrize("sampler", [None, SequentialSampler()])
+def test_run_reads_combinations_lazily(monkeypatch, sampler):
+    pulled = []
+    pulled_when_finished = []
+
+    def on_combination_done(combo, question):
+        # The scheduler's lock is free while the callback runs.
+        assert scheduler._lock.acquire(timeout=5)
+        scheduler._lock.release()
+        pulled_when_finished.append(len(pulled))
+
+    with mock_models("mock-lazy", 1) as (model,), mock_api():
+        monkeypatch.setitem(sweep_scheduler.MODEL_THREADS, model, POOL_THREADS)
+        registry = QuestionRegistry()
+        grid = QuestionGrid(
+            range(1, 11), [300000, 700000], [15, 30], [], [model], registry=registry
+        )
+
+        def combinations():
+            for combo in grid:
+                pulled.append(combo)
+                yield combo
+
+        with SweepScheduler(
+            num_iterations=3, on_combination_done=on_combination_done, sampler=sampler
+        ) as scheduler:
+            assert scheduler.run(combinations(), registry) == len(grid)
+
+    # Until the first combination finishes, at most one per worker thread is read.
+    assert pulled_when_finished[0] <= POOL_THREADS
+    assert len(pulled) == len(pulled_when_finished) == len(grid)
+    assert all("error" not in combo["ai_response"] for combo in pulled)
+    if sampler is not None:
+        assert sampler.stats()["fixed_iterations"] == 3 * len(grid)
+
+
+def test_connection_pool_grows_to_the_sweep_threads(monkeypatch):
+    with mock_models("mock-pool", 2) as models, mock_api():
+        for model in models:
+            monkeypatch.setitem(sweep_scheduler.MODEL_THREADS, model, 15)
+        registry = QuestionRegistry()
+        grid = QuestionGrid([5], [300000], [30], [], models, registry=registry)
+        provider = get_provider(models[0])
+        assert provider.concurrency < 30
+        with SweepScheduler(num_iterations=1) as scheduler:
+            scheduler.run(grid, registry)
+        assert provider.concurrency == 30
+
+
+def test_mock_registrations_are_undone():
+    provider = Provider("mock-registry", "http://localhost", "MOCK_API_KEY")
+    with mock_models("mock-registry", 1) as (model,):
+        with registered_provider(provider, [model]):
+            assert MODEL_RATE_LIMITS[model] == MOCK_RATE_LIMITS
+            assert get_provider(model) is provider
+        assert get_provider(model) is PROVIDERS["openai"]
+        assert "mock-registry" not in PROVIDERS
+    assert model not in MODEL_RATE_LIMITS
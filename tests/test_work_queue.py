@@ -0,0 +1,128 @@
+import httpx
+import pytest
+
+import work_queue
+from work_queue import RemoteWorkQueue, WorkQueue, run_worker, serve_work_queue
+
+COMBINATION = {
+    "model": "mock-model",
+    "interest_rate": 2,
+    "loan_amount": 300000,
+    "loan_term": 30,
+    "run_code": False,
+    "question": {"role": "user", "content": "How much?", "answer": 1.0},
+}
+RESULT = {"final_answer": "1", "explanation": "", "usage": {}}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue([COMBINATION], num_iterations=1)
+    yield queue
+    queue.close()
+
+
+def test_complete_needs_the_lease(queue):
+    (item,) = queue.lease("worker-1", 1)
+
+    assert not queue.complete("worker-2", item["id"], RESULT)
+    assert queue.status()["leased"] == 1
+    assert queue.complete("worker-1", item["id"], RESULT)
+    assert queue.status()["done"] == 1
+
+
+def test_server_checks_token_and_rejects_bad_requests(queue):
+    server = serve_work_queue(queue, port=0, token="secret")
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            RemoteWorkQueue(url, token="wrong").status()
+        assert error.value.response.status_code == 401
+
+        response = httpx.post(
+            f"{url}/lease",
+            json={"owner": "worker-1", "unknown": 1},
+            headers={"Authorization": "Bearer secret"},
+        )
+        assert response.status_code == 400
+        assert "error" in response.json()
+
+        remote = RemoteWorkQueue(url, token="secret")
+        (item,) = remote.lease("worker-1", 1)
+        assert remote.complete("worker-1", item["id"], RESULT)
+        assert remote.status()["done"] == 1
+        remote.close()
+    finally:
+        server.shutdown()
+
+
+def test_server_needs_a_token_off_loopback(queue):
+    with pytest.raises(ValueError):
+        serve_work_queue(queue, host="0.0.0.0", port=0)
+
+
+def test_enqueue_commits_in_chunks(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = WorkQueue(path)
+    other_worker = WorkQueue(path)
+    leased_during_enqueue = []
+
+    def combinations():
+        for rate in range(5):
+            if rate == 3:
+                leased_during_enqueue.extend(other_worker.lease("worker-1", 10))
+            yield {**COMBINATION, "interest_rate": rate}
+
+    assert queue.enqueue(combinations(), num_iterations=2, chunk_size=2) == 10
+    assert len(leased_during_enqueue) == 4
+    assert queue.status() == {"pending": 6, "leased": 4, "done": 0, "failed": 0}
+    queue.close()
+    other_worker.close()
+
+
+class UnreachableQueue:
+    """
+    Wraps a queue whose `complete` and `fail` calls raise the first `failures` times.
+    """
+
+    def __init__(self, queue, failures):
+        self.queue = queue
+        self.failures = {"complete": failures, "fail": failures}
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
+
+    def _maybe_raise(self, name):
+        if self.failures[name] > 0:
+            self.failures[name] -= 1
+            raise httpx.ConnectError("queue unreachable")
+
+    def complete(self, *args):
+        self._maybe_raise("complete")
+        return self.queue.complete(*args)
+
+    def fail(self, *args):
+        self._maybe_raise("fail")
+        return self.queue.fail(*args)
+
+
+def test_worker_survives_an_unreachable_queue(queue, monkeypatch):
+    monkeypatch.setattr(work_queue, "run_item", lambda item, *args: RESULT)
+    unreachable = UnreachableQueue(queue, failures=1)
+
+    completed = run_worker(unreachable, lease_seconds=0.3, poll_interval=0.05)
+
+    assert completed == 1
+    assert queue.status()["done"] == 1
+
+
+def test_worker_survives_failing_releases(queue, monkeypatch):
+    def run_item(item, *args):
+        raise RuntimeError("request failed")
+
+    monkeypatch.setattr(work_queue, "run_item", run_item)
+    unreachable = UnreachableQueue(queue, failures=2)
+
+    assert run_worker(unreachable, lease_seconds=0.3, poll_interval=0.05) == 0
+    assert queue.status()["failed"] == 1
@@ -0,0 +1,706 @@
+from run_ai_tests import *
+from checkpoint import (
+    CheckpointWriter,
+    combination_key,
+    compact_checkpoint,
+    strip_question_copies,
+)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import concurrent.futures
+import hmac
+import httpx
+import ipaddress
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# How long a worker holds an item before another worker may take it over. Workers renew
+# their leases while requests run, so this only matters when a worker dies.
+DEFAULT_LEASE_SECONDS = 120
+
+# Leases after which an item whose requests keep failing is given up on.
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Combinations `enqueue` writes per transaction, so workers leasing from the same file
+# don't wait for a whole grid to be written.
+ENQUEUE_CHUNK_SIZE = 1000
+
+DEFAULT_QUEUE_PORT = 8790
+
+# Shared secret between `serve_work_queue` and its `RemoteWorkQueue` workers.
+QUEUE_TOKEN_ENV = "WORK_QUEUE_TOKEN"
+
+
+class WorkQueue:
+    """
+    Durable queue of sweep requests in a SQLite file, shared by any number of workers.
+
+    A coordinator `enqueue`s the combinations of a sweep; every combination × iteration
+    becomes one item. Workers `lease` items for `lease_seconds`, run them and report each
+    one with `complete` or `fail`. A lease that runs out (the worker died or hung) makes
+    the item available again, and an item is marked failed after `max_attempts` leases.
+    Enqueueing is idempotent, so rerunning the coordinator resumes a sweep.
+
+    Workers on the same machine open the file directly; workers on other machines reach it
+    through `serve_work_queue` with a `RemoteWorkQueue`.
+
+    Args:
+        path (str): The SQLite database file. Created if it doesn't exist.
+        max_attempts (int): Leases after which a failing item is marked failed.
+    """
+
+    def __init__(self, path="sweep_queue.sqlite3", max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=60, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS combinations (
+                    key TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    combination TEXT NOT NULL,
+                    question TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS items (
+                    id INTEGER PRIMARY KEY,
+                    combination_key TEXT NOT NULL,
+                    iteration INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    UNIQUE (combination_key, iteration)
+                );
+                CREATE INDEX IF NOT EXISTS items_status ON items (status, lease_expires);
+                """)
+
+    def _transaction(self, statements):
+        """
+        Runs `statements(connection)` in an immediate transaction, so concurrent workers
+        in other processes never lease the same item.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+    def enqueue(
+        self,
+        combinations,
+        registry=None,
+        num_iterations=5,
+        chunk_size=ENQUEUE_CHUNK_SIZE,
+    ):
+        """
+        Adds every combination × iteration that isn't queued yet.
+
+        The combinations are committed `chunk_size` at a time. If enqueueing is
+        interrupted, the chunks already committed stay queued and enqueueing again adds
+        the rest.
+
+        Args:
+            combinations: Iterable of combination dicts, as yielded by `QuestionGrid`.
+            registry (QuestionRegistry, optional): Resolves `question_id` for combinations
+                that don't carry their question.
+            num_iterations (int): How many times each combination's question is asked.
+            chunk_size (int): Combinations written per transaction.
+
+        Returns:
+            int: The number of items added.
+        """
+
+        def insert(connection, chunk):
+            added = 0
+            (position,) = connection.execute(
+                "SELECT COUNT(*) FROM combinations"
+            ).fetchone()
+            for combo in chunk:
+                combo = dict(combo)
+                question = (
+                    registry[combo["question_id"]]
+                    if registry is not None
+                    else combo.pop("question")
+                )
+                key = combination_key(combo)
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO combinations VALUES (?, ?, ?, ?)",
+                    (key, position, json.dumps(combo), json.dumps(question)),
+                )
+                position += cursor.rowcount
+                cursor = connection.executemany(
+                    "INSERT OR IGNORE INTO items (combination_key, iteration) "
+                    "VALUES (?, ?)",
+                    [(key, iteration) for iteration in range(num_iterations)],
+                )
+                added += cursor.rowcount
+            return added
+
+        combinations = iter(combinations)
+        added = 0
+        while chunk := list(itertools.islice(combinations, chunk_size)):
+            added += self._transaction(lambda connection: insert(connection, chunk))
+        return added
+
+    def lease(self, owner, count, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Takes up to `count` pending items (or items whose lease ran out).
+
+        Returns:
+            list: Dicts with the item `id`, its `combination`, `question` and `iteration`
+        """
+
+        def take(connection):
+            now = time.time()
+            # Items whose last lease ran out on the final attempt are given up on.
+            connection.execute(
+                "UPDATE items SET status = 'failed', lease_owner = NULL, "
+                "error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            rows = connection.execute(
+                """
+                UPDATE items
+                SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM items
+                    WHERE status = 'pending'
+                        OR (status = 'leased' AND lease_expires < ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING id, combination_key, iteration
+                """,
+                (owner, now + lease_seconds, now, count),
+            ).fetchall()
+            items = []
+            for item_id, key, iteration in sorted(rows):
+                combination, question = connection.execute(
+                    "SELECT combination, question FROM combinations WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                items.append(
+                    {
+                        "id": item_id,
+                        "combination": json.loads(combination),
+                        "question": json.loads(question),
+                        "iteration": iteration,
+                    }
+                )
+            return items
+
+        return self._transaction(take)
+
+    def renew(self, owner, item_ids, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Extends the leases `owner` still holds on `item_ids`.
+        """
+
+        def extend(connection):
+            connection.executemany(
+                "UPDATE items SET lease_expires = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                [(time.time() + lease_seconds, item_id, owner) for item_id in item_ids],
+            )
+
+        self._transaction(extend)
+
+    def complete(self, owner, item_id, result):
+        """
+        Stores an item's result if `owner` still holds its lease. A result that arrives
+        after the item was re-leased to another worker is dropped; that worker's counts.
+
+        Returns:
+            bool: Whether the result was stored.
+        """
+
+        def store(connection):
+            cursor = connection.execute(
+                "UPDATE items SET status = 'done', result = ?, lease_owner = NULL, "
+                "error = NULL WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result), item_id, owner),
+            )
+            return cursor.rowcount == 1
+
+        return self._transaction(store)
+
+    def fail(self, owner, item_id, error):
+        """
+        Returns an item to the queue for another attempt, or marks it failed once it has
+        used up `max_attempts`.
+        """
+
+        def release(connection):
+            connection.execute(
+                "UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' "
+                "ELSE 'pending' END, lease_owner = NULL, lease_expires = NULL, "
+                "error = ? WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (self.max_attempts, str(error), item_id, owner),
+            )
+
+        self._transaction(release)
+
+    def status(self):
+        """
+        Returns:
+            dict: Number of items per status
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM items GROUP BY status"
+            ).fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(rows)
+        return counts
+
+    def wait(self, poll_interval=10):
+        """
+        Blocks until no item is pending or leased, printing the queue status as it goes.
+        """
+        while True:
+            counts = self.status()
+            print(f"Work queue {self.path}: {counts}")
+            if counts["pending"] == 0 and counts["leased"] == 0:
+                return counts
+            time.sleep(poll_interval)
+
+    def results(self):
+        """
+        The queued combinations, in the order they were enqueued, with their results.
+
+        Each combination has its `ai_response` built from its items as `run_ai_tests`
+        would, or `{"error": ...}` if one of its items failed. Combinations with items
+        still outstanding are left out.
+
+        Returns:
+            list: (combination, question) pairs
+        """
+        with self._lock:
+            combinations = self._connection.execute(
+                "SELECT key, combination, question FROM combinations ORDER BY position"
+            ).fetchall()
+            items = self._connection.execute(
+                "SELECT combination_key, iteration, status, result, error FROM items"
+            ).fetchall()
+
+        items_by_combination = {}
+        for key, iteration, status, result, error in items:
+            items_by_combination.setdefault(key, []).append(
+                (iteration, status, result, error)
+            )
+
+        results = []
+        for key, combination, question in combinations:
+            combo = json.loads(combination)
+            question = json.loads(question)
+            combo_items = items_by_combination.get(key, [])
+            if any(status in ("pending", "leased") for _, status, _, _ in combo_items):
+                continue
+            errors = [
+                error for _, status, _, error in combo_items if status == "failed"
+            ]
+            if errors:
+                combo["ai_response"] = {"error": errors[0]}
+            else:
+                responses = []
+                for iteration, _, result, _ in combo_items:
+                    result = json.loads(result)
+                    responses.append(
+                        (
+                            QuestionOutput(
+                                final_answer=result["final_answer"],
+                                explanation=result["explanation"],
+                            ),
+                            (
+                                CachedUsage(result["usage"])
+                                if result.get("cached")
+                                else result["usage"]
+                            ),
+                            iteration,
+                        )
+                    )
+                combo["ai_response"] = summarize_responses(
+                    responses, [question], None, verbose=False
+                )
+            results.append((combo, question))
+        return results
+
+    def write_checkpoint(self, path):
+        """
+        Writes the finished combinations to a checkpoint, in the layout the in-process
+        sweep writes, so `compact_checkpoint` produces the same results file. The
+        checkpoint is started over, since the queue holds every result of the sweep.
+
+        Returns:
+            int: The number of combinations written.
+        """
+        results = self.results()
+        with CheckpointWriter(path) as checkpoint:
+            for combo, question in results:
+                if "question_id" in combo:
+                    checkpoint.write_question(combo["question_id"], question)
+                    combo["ai_response"] = strip_question_copies(combo["ai_response"])
+                else:
+                    combo["question"] = question
+                checkpoint.write_combination(combo)
+        return len(results)
+
+    def close(self):
+        self._connection.close()
+
+
+class RemoteWorkQueue:
+    """
+    Client for a `WorkQueue` served by `serve_work_queue`, for workers on other machines.
+
+    Args:
+        url (str): The server's address, such as "http://coordinator:8790".
+        token (str, optional): The server's shared token; defaults to the
+            `WORK_QUEUE_TOKEN` environment variable.
+    """
+
+    def __init__(self, url, timeout=60, token=None):
+        token = token or os.environ.get(QUEUE_TOKEN_ENV)
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        self._client = httpx.Client(base_url=url, timeout=timeout, headers=headers)
+
+    def _post(self, path, **body):
+        response = self._client.post(path, json=body)
+        response.raise_for_status()
+        return response.json()
+
+    def lease(self, owner, count, lease_seconds=DEFAULT_LEASE_SECONDS):
+        return self._post(
+            "/lease", owner=owner, count=count, lease_seconds=lease_seconds
+        )
+
+    def renew(self, owner, item_ids, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self._post(
+            "/renew", owner=owner, item_ids=item_ids, lease_seconds=lease_seconds
+        )
+
+    def complete(self, owner, item_id, result):
+        return self._post("/complete", owner=owner, item_id=item_id, result=result)
+
+    def fail(self, owner, item_id, error):
+        self._post("/fail", owner=owner, item_id=item_id, error=error)
+
+    def status(self):
+        response = self._client.get("/status")
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self._client.close()
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_work_queue(queue, host="127.0.0.1", port=DEFAULT_QUEUE_PORT, token=None):
+    """
+    Serves `queue` to `RemoteWorkQueue` workers over HTTP in a background thread.
+
+    Only local workers can connect by default. To take workers from other machines, pass
+    the address to listen on as `host` along with a shared `token`, which every request
+    must carry as a bearer token.
+
+    Args:
+        queue (WorkQueue): The queue to serve.
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        token (str, optional): Shared secret; required unless `host` is a loopback address.
+
+    Returns:
+        The running `ThreadingHTTPServer`; call `shutdown()` on it to stop it.
+    """
+    if not token and not _is_loopback(host):
+        raise ValueError(
+            f"Serving the work queue on {host} needs a shared token; set "
+            f"{QUEUE_TOKEN_ENV} on the coordinator and the workers"
+        )
+    routes = {
+        "/lease": queue.lease,
+        "/renew": queue.renew,
+        "/complete": queue.complete,
+        "/fail": queue.fail,
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, body, status=200):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _authorized(self):
+            if not token:
+                return True
+            sent = self.headers.get("Authorization", "")
+            if hmac.compare_digest(sent.encode(), f"Bearer {token}".encode()):
+                return True
+            self._send_json({"error": "Missing or wrong work queue token"}, 401)
+            return False
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path.split("?")[0] != "/status":
+                self.send_error(404)
+                return
+            self._send_json(queue.status())
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            route = routes.get(self.path.split("?")[0])
+            if route is None:
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                if not isinstance(body, dict):
+                    raise ValueError("The request body must be a JSON object")
+                result = route(**body)
+            except (TypeError, ValueError) as e:
+                self._send_json({"error": str(e)}, 400)
+                return
+            self._send_json(result)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_item(item, cache=None, timeout_seconds=300, container_pool=None):
+    """
+    Sends one queued request with `request_response` (`request_pooled_response` for code
+    interpreter combinations) and returns its result record.
+
+    A request with a response in `cache` is not sent again.
+    """
+    combo = item["combination"]
+    message_input, _ = build_messages([item["question"]], 1)[0]
+    message = (message_input, item["iteration"])
+    cached_responses, _ = split_cached_responses(
+        [message], 1, combo["model"], combo["run_code"], cache
+    )
+    if cached_responses:
+        parsed, usage, _ = cached_responses[0]
+    elif combo["run_code"]:
+        container_pool = container_pool or get_container_pool(
+            get_provider(combo["model"]).client
+        )
+        parsed, usage, _ = request_pooled_response(
+            message, combo["model"], container_pool, 1, cache, timeout_seconds
+        )
+    else:
+        parsed, usage, _ = request_response(
+            message, combo["model"], False, None, 1, cache, timeout_seconds
+        )
+    return {
+        "final_answer": getattr(parsed, "final_answer", None),
+        "explanation": getattr(parsed, "explanation", None),
+        "usage": usage_to_dict(usage),
+        "cached": isinstance(usage, CachedUsage),
+    }
+
+
+def run_worker(
+    queue,
+    threads=10,
+    worker_id=None,
+    lease_seconds=DEFAULT_LEASE_SECONDS,
+    cache=None,
+    timeout_seconds=300,
+    poll_interval=5,
+    exit_when_empty=True,
+):
+    """
+    Leases items from `queue` and runs them until it is empty.
+
+    Keeps up to `threads` requests in flight, leasing more as requests finish, and renews
+    the leases of running requests every third of `lease_seconds`. A request that fails
+    after `request_response`'s own retries goes back to the queue for another worker. If
+    the queue can't be reached to store a result or release an item, the worker carries
+    on and the item's lease runs out, so it is run again.
+
+    Args:
+        queue (WorkQueue or RemoteWorkQueue): Where to take work from.
+        threads (int): Requests in flight at once.
+        worker_id (str, optional): Lease owner name; defaults to host name and process id.
+        lease_seconds (float): Length of a lease.
+        cache (ResponseCache, optional): Responses already cached are not sent again.
+        timeout_seconds (int): Per-request timeout before a retry.
+        poll_interval (float): Seconds between polls of an empty queue.
+        exit_when_empty (bool): Return once nothing is pending or leased, instead of
+            waiting for more work.
+
+    Returns:
+        int: The number of items this worker completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    running = {}
+    last_renewal = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            if len(running) < threads:
+                for item in queue.lease(
+                    worker_id, threads - len(running), lease_seconds
+                ):
+                    get_provider(item["combination"]["model"]).ensure_concurrency(
+                        threads
+                    )
+                    runner_metrics.record_submitted()
+                    future = executor.submit(run_item, item, cache, timeout_seconds)
+                    running[future] = item
+
+            if not running:
+                counts = queue.status()
+                if exit_when_empty and counts["pending"] == 0 and counts["leased"] == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=min(poll_interval, lease_seconds / 3),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                item = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Error running queued item {item['id']}: {e}")
+                    try:
+                        queue.fail(worker_id, item["id"], str(e))
+                    except Exception as e:
+                        # The lease runs out and the item goes back to the queue.
+                        print(f"Could not release queued item {item['id']}: {e}")
+                    continue
+                try:
+                    if queue.complete(worker_id, item["id"], result):
+                        completed += 1
+                except Exception as e:
+                    # Not a failure of the request: the lease runs out and it is run again.
+                    print(
+                        f"Could not store the result of queued item {item['id']}: {e}"
+                    )
+
+            if running and time.monotonic() - last_renewal > lease_seconds / 3:
+                queue.renew(
+                    worker_id, [item["id"] for item in running.values()], lease_seconds
+                )
+                last_renewal = time.monotonic()
+
+    runner_metrics.end_progress()
+    print(f"Worker {worker_id} completed {completed} items")
+    return completed
+
+
+def open_queue(location):
+    """
+    A `RemoteWorkQueue` for an http(s) URL, else a `WorkQueue` on the SQLite file.
+
+    Remote queues authenticate with the `WORK_QUEUE_TOKEN` environment variable.
+    """
+    if location.startswith(("http://", "https://")):
+        return RemoteWorkQueue(location)
+    return WorkQueue(location)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep work queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = commands.add_parser("worker", help="Run queued requests")
+    worker_parser.add_argument("queue", help="Queue file or coordinator URL")
+    worker_parser.add_argument("--threads", type=int, default=10)
+    worker_parser.add_argument(
+        "--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS
+    )
+    worker_parser.add_argument("--cache", help="Response cache file")
+    worker_parser.add_argument(
+        "--wait", action="store_true", help="Keep polling once the queue is empty"
+    )
+
+    serve_parser = commands.add_parser(
+        "serve", help="Serve a queue file to remote workers"
+    )
+    serve_parser.add_argument("queue", help="Queue file")
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help=f"Address to listen on; other than loopback, {QUEUE_TOKEN_ENV} must be set",
+    )
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_QUEUE_PORT)
+
+    status_parser = commands.add_parser("status", help="Print item counts per status")
+    status_parser.add_argument("queue", help="Queue file or coordinator URL")
+
+    collect_parser = commands.add_parser(
+        "collect", help="Write finished combinations to a checkpoint and results file"
+    )
+    collect_parser.add_argument("queue", help="Queue file")
+    collect_parser.add_argument("checkpoint", help="Checkpoint file to write")
+    collect_parser.add_argument("--output", help="Results JSON file")
+
+    args = parser.parse_args()
+    if args.command == "worker":
+        run_worker(
+            open_queue(args.queue),
+            threads=args.threads,
+            lease_seconds=args.lease_seconds,
+            cache=ResponseCache(args.cache) if args.cache else None,
+            exit_when_empty=not args.wait,
+        )
+    elif args.command == "serve":
+        server = serve_work_queue(
+            WorkQueue(args.queue),
+            args.host,
+            args.port,
+            token=os.environ.get(QUEUE_TOKEN_ENV),
+        )
+        print(f"Serving {args.queue} on {args.host}:{args.port}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == "status":
+        print(open_queue(args.queue).status())
+    else:
+        written = WorkQueue(args.queue).write_checkpoint(args.checkpoint)
+        compact_checkpoint(args.checkpoint, args.output)
+        print(f"Wrote {written} combinations to {args.checkpoint}")